@@ -59,7 +59,7 @@ echo "✅ Setup complete!"
 echo ""
 echo "🎯 Available commands:"
 echo "   Start API server:     uv run uvicorn app.main:app --reload"
-echo "   Start Celery worker:  uv run celery -A app.workers.celery_app worker --loglevel=info"
+echo "   Start Celery worker:  uv run celery -A app.workers.celery_app worker -Q interactive,periodic,maintenance --loglevel=info"
 echo "   Start Celery beat:    uv run celery -A app.workers.celery_app beat --loglevel=info"
 echo "   Run tests:            uv run pytest"
 echo "   Format code:          uv run black ."
@@ -0,0 +1,28 @@
+-- yoyo-migrations
+-- Migration: health_checks_history_indexes
+-- Description: Composite and partial indexes for health check history queries
+-- File: 02_health_checks_history_indexes.sql
+-- depends: 01_create_database
+-- transactional: false
+
+-- CONCURRENTLY keeps health check inserts flowing while the indexes build,
+-- which is why this migration runs outside a transaction.
+
+-- History of one resource, newest first: serves
+-- WHERE resource_type = ? AND namespace = ? AND resource_name = ?
+-- ORDER BY checked_at DESC, id DESC with keyset pagination
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_health_checks_resource_history
+    ON health_checks (resource_type, namespace, resource_name, checked_at DESC, id DESC);
+
+-- Non-healthy checks only (a small fraction of the table): recent problems
+-- across the cluster, and per namespace
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_health_checks_not_healthy
+    ON health_checks (checked_at DESC, id DESC)
+    WHERE status <> 'healthy';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_health_checks_not_healthy_namespace
+    ON health_checks (namespace, checked_at DESC, id DESC)
+    WHERE status <> 'healthy';
+
+-- Covered by the leading column of idx_health_checks_resource_history
+DROP INDEX CONCURRENTLY IF EXISTS idx_health_checks_resource_type;
@@ -0,0 +1,42 @@
+-- yoyo-migrations
+-- Migration: create_health_status
+-- Description: Current health status per resource, upserted as checks land
+-- File: 03_create_health_status.sql
+-- depends: 02_health_checks_history_indexes
+
+-- One row per resource holding its latest check; health_checks keeps the history
+CREATE TABLE IF NOT EXISTS health_status (
+    resource_key VARCHAR(600) PRIMARY KEY,  -- resource_type/namespace/resource_name
+    resource_type VARCHAR(50) NOT NULL,
+    resource_name VARCHAR(255) NOT NULL,
+    namespace VARCHAR(255),
+    status VARCHAR(50) NOT NULL,
+    message TEXT,
+    details JSONB,
+    checked_at TIMESTAMP NOT NULL,
+    status_since TIMESTAMP NOT NULL  -- when the resource entered its current status
+);
+
+-- Non-healthy resources only, so listing them doesn't touch healthy rows
+CREATE INDEX IF NOT EXISTS idx_health_status_not_healthy
+    ON health_status (namespace, resource_type)
+    WHERE status <> 'healthy';
+
+-- Backfill from the latest check per resource
+INSERT INTO health_status (
+    resource_key, resource_type, resource_name, namespace, status, message, details, checked_at, status_since
+)
+SELECT DISTINCT ON (resource_type, namespace, resource_name)
+    resource_type || '/' || COALESCE(namespace, '') || '/' || resource_name,
+    resource_type,
+    resource_name,
+    namespace,
+    status,
+    message,
+    details,
+    checked_at,
+    checked_at
+FROM health_checks
+WHERE checked_at IS NOT NULL
+ORDER BY resource_type, namespace, resource_name, checked_at DESC, id DESC
+ON CONFLICT (resource_key) DO NOTHING;
@@ -0,0 +1,39 @@
+-- yoyo-migrations
+-- Migration: native_keys_and_label_indexes
+-- Description: Native uuid keys, GIN indexes on labels, and new bigint keys prepared on the history tables
+-- File: 04_native_keys_and_label_indexes.sql
+-- depends: 03_create_health_status
+
+-- Resource tables: text ids -> uuid (16 bytes instead of 36+ in every index).
+-- These tables hold one row per cluster object, so the rewrite is short.
+ALTER TABLE nodes ALTER COLUMN id DROP DEFAULT;
+ALTER TABLE nodes ALTER COLUMN id TYPE uuid USING id::uuid;
+ALTER TABLE nodes ALTER COLUMN id SET DEFAULT gen_random_uuid();
+
+ALTER TABLE pods ALTER COLUMN id DROP DEFAULT;
+ALTER TABLE pods ALTER COLUMN id TYPE uuid USING id::uuid;
+ALTER TABLE pods ALTER COLUMN id SET DEFAULT gen_random_uuid();
+
+ALTER TABLE services ALTER COLUMN id DROP DEFAULT;
+ALTER TABLE services ALTER COLUMN id TYPE uuid USING id::uuid;
+ALTER TABLE services ALTER COLUMN id SET DEFAULT gen_random_uuid();
+
+-- Time-series tables: text ids -> bigint, in three steps so the (large)
+-- tables are never rewritten under an exclusive lock. Here the new key is
+-- added next to the old one; a column without a default and a default set
+-- afterwards are both catalog-only changes, so new rows are numbered from
+-- now on and existing rows stay NULL. 06_backfill_history_ids numbers them
+-- and builds the indexes, 07_swap_history_ids makes it the primary key.
+CREATE SEQUENCE IF NOT EXISTS cluster_stats_new_id_seq AS BIGINT;
+ALTER TABLE cluster_stats ADD COLUMN IF NOT EXISTS new_id BIGINT;
+ALTER TABLE cluster_stats ALTER COLUMN new_id SET DEFAULT nextval('cluster_stats_new_id_seq');
+
+CREATE SEQUENCE IF NOT EXISTS health_checks_new_id_seq AS BIGINT;
+ALTER TABLE health_checks ADD COLUMN IF NOT EXISTS new_id BIGINT;
+ALTER TABLE health_checks ALTER COLUMN new_id SET DEFAULT nextval('health_checks_new_id_seq');
+
+-- Label selectors against stored resources: @> for key=value, ? / ?| for
+-- exists, served by the default jsonb_ops GIN operator class
+CREATE INDEX IF NOT EXISTS idx_nodes_labels ON nodes USING GIN (labels);
+CREATE INDEX IF NOT EXISTS idx_pods_labels ON pods USING GIN (labels);
+CREATE INDEX IF NOT EXISTS idx_services_labels ON services USING GIN (labels);
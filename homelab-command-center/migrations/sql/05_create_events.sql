@@ -0,0 +1,27 @@
+-- yoyo-migrations
+-- Migration: create_events
+-- Description: Kubernetes Events, one row per involved object and reason
+-- File: 05_create_events.sql
+-- depends: 04_native_keys_and_label_indexes
+
+-- Repeats of an event are merged into its row: count grows, last_seen moves
+CREATE TABLE IF NOT EXISTS events (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    event_key VARCHAR(700) NOT NULL UNIQUE,  -- kind/namespace/name/reason
+    namespace VARCHAR(255),
+    kind VARCHAR(100) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    reason VARCHAR(255),
+    type VARCHAR(50),
+    message TEXT,
+    source VARCHAR(255),
+    count BIGINT NOT NULL DEFAULT 1,
+    first_seen TIMESTAMP NOT NULL,
+    last_seen TIMESTAMP NOT NULL
+);
+
+-- Keyset pagination on (last_seen, id), overall and per namespace
+CREATE INDEX IF NOT EXISTS idx_events_last_seen
+    ON events (last_seen DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_events_namespace_last_seen
+    ON events (namespace, last_seen DESC, id DESC);
@@ -0,0 +1,110 @@
+-- yoyo-migrations
+-- Migration: backfill_history_ids
+-- Description: Number existing history rows in time order and index the new bigint keys
+-- File: 06_backfill_history_ids.sql
+-- depends: 05_create_events
+-- transactional: false
+
+-- Runs outside a transaction, like 02_health_checks_history_indexes: the
+-- backfill commits every batch and the indexes build CONCURRENTLY, so
+-- stats and health checks keep being written throughout.
+
+-- Existing rows are numbered oldest first, walking (time, old id) in
+-- batches of 5000, so within one timestamp the new ids keep the order the
+-- old ids gave the (checked_at, id) keyset. Rows written since
+-- 04_native_keys_and_label_indexes already have an id from the sequence
+-- and are skipped; rows without a timestamp are numbered last.
+DO $$
+DECLARE
+    last_timestamp TIMESTAMP := '-infinity';
+    last_id VARCHAR := '';
+BEGIN
+    LOOP
+        WITH batch AS (
+            SELECT id, timestamp FROM cluster_stats
+            WHERE (timestamp, id) > (last_timestamp, last_id)
+            ORDER BY timestamp, id
+            LIMIT 5000
+        ), numbered AS (
+            SELECT id, nextval('cluster_stats_new_id_seq') AS new_id FROM batch
+        ), updated AS (
+            UPDATE cluster_stats AS stats
+            SET new_id = numbered.new_id
+            FROM numbered
+            WHERE stats.id = numbered.id AND stats.new_id IS NULL
+        )
+        SELECT timestamp, id INTO last_timestamp, last_id
+        FROM batch ORDER BY timestamp DESC, id DESC LIMIT 1;
+        EXIT WHEN NOT FOUND;
+        COMMIT;
+    END LOOP;
+    UPDATE cluster_stats SET new_id = nextval('cluster_stats_new_id_seq') WHERE new_id IS NULL;
+END
+$$;
+
+DO $$
+DECLARE
+    last_checked_at TIMESTAMP := '-infinity';
+    last_id VARCHAR := '';
+BEGIN
+    LOOP
+        WITH batch AS (
+            SELECT id, checked_at FROM health_checks
+            WHERE (checked_at, id) > (last_checked_at, last_id)
+            ORDER BY checked_at, id
+            LIMIT 5000
+        ), numbered AS (
+            SELECT id, nextval('health_checks_new_id_seq') AS new_id FROM batch
+        ), updated AS (
+            UPDATE health_checks AS checks
+            SET new_id = numbered.new_id
+            FROM numbered
+            WHERE checks.id = numbered.id AND checks.new_id IS NULL
+        )
+        SELECT checked_at, id INTO last_checked_at, last_id
+        FROM batch ORDER BY checked_at DESC, id DESC LIMIT 1;
+        EXIT WHEN NOT FOUND;
+        COMMIT;
+    END LOOP;
+    UPDATE health_checks SET new_id = nextval('health_checks_new_id_seq') WHERE new_id IS NULL;
+END
+$$;
+
+-- Proves the backfill complete, so 07_swap_history_ids can set NOT NULL
+-- without scanning the table under its lock. VALIDATE doesn't block writes.
+DO $$
+BEGIN
+    ALTER TABLE cluster_stats
+        ADD CONSTRAINT cluster_stats_new_id_not_null CHECK (new_id IS NOT NULL) NOT VALID;
+EXCEPTION WHEN duplicate_object THEN NULL;
+END
+$$;
+ALTER TABLE cluster_stats VALIDATE CONSTRAINT cluster_stats_new_id_not_null;
+
+DO $$
+BEGIN
+    ALTER TABLE health_checks
+        ADD CONSTRAINT health_checks_new_id_not_null CHECK (new_id IS NOT NULL) NOT VALID;
+EXCEPTION WHEN duplicate_object THEN NULL;
+END
+$$;
+ALTER TABLE health_checks VALIDATE CONSTRAINT health_checks_new_id_not_null;
+
+-- The future primary keys, and migration 02's history indexes on the new
+-- key; 07_swap_history_ids gives them their final names
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS cluster_stats_new_id_key
+    ON cluster_stats (new_id);
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS health_checks_new_id_key
+    ON health_checks (new_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_health_checks_resource_history_new
+    ON health_checks (resource_type, namespace, resource_name, checked_at DESC, new_id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_health_checks_not_healthy_new
+    ON health_checks (checked_at DESC, new_id DESC)
+    WHERE status <> 'healthy';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_health_checks_not_healthy_namespace_new
+    ON health_checks (namespace, checked_at DESC, new_id DESC)
+    WHERE status <> 'healthy';
@@ -0,0 +1,47 @@
+-- yoyo-migrations
+-- Migration: swap_history_ids
+-- Description: Make the backfilled bigint keys the history tables' identity primary keys
+-- File: 07_swap_history_ids.sql
+-- depends: 06_backfill_history_ids
+
+-- Catalog-only changes under a brief lock: NOT NULL is proven by the
+-- validated check, the primary key takes over the prebuilt unique index,
+-- and dropping the old id (which also drops migration 02's indexes on it)
+-- doesn't rewrite the table. The identity continues from the sequence.
+ALTER TABLE cluster_stats ALTER COLUMN new_id SET NOT NULL;
+ALTER TABLE cluster_stats DROP CONSTRAINT cluster_stats_new_id_not_null;
+ALTER TABLE cluster_stats DROP CONSTRAINT cluster_stats_pkey;
+ALTER TABLE cluster_stats DROP COLUMN id;
+ALTER TABLE cluster_stats RENAME COLUMN new_id TO id;
+ALTER TABLE cluster_stats ADD CONSTRAINT cluster_stats_pkey PRIMARY KEY USING INDEX cluster_stats_new_id_key;
+ALTER TABLE cluster_stats ALTER COLUMN id DROP DEFAULT;
+ALTER TABLE cluster_stats ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY;
+
+ALTER TABLE health_checks ALTER COLUMN new_id SET NOT NULL;
+ALTER TABLE health_checks DROP CONSTRAINT health_checks_new_id_not_null;
+ALTER TABLE health_checks DROP CONSTRAINT health_checks_pkey;
+ALTER TABLE health_checks DROP COLUMN id;
+ALTER TABLE health_checks RENAME COLUMN new_id TO id;
+ALTER TABLE health_checks ADD CONSTRAINT health_checks_pkey PRIMARY KEY USING INDEX health_checks_new_id_key;
+ALTER TABLE health_checks ALTER COLUMN id DROP DEFAULT;
+ALTER TABLE health_checks ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY;
+
+DO $$
+BEGIN
+    EXECUTE format(
+        'ALTER TABLE cluster_stats ALTER COLUMN id RESTART WITH %s',
+        nextval('cluster_stats_new_id_seq')
+    );
+    EXECUTE format(
+        'ALTER TABLE health_checks ALTER COLUMN id RESTART WITH %s',
+        nextval('health_checks_new_id_seq')
+    );
+END
+$$;
+
+DROP SEQUENCE cluster_stats_new_id_seq;
+DROP SEQUENCE health_checks_new_id_seq;
+
+ALTER INDEX idx_health_checks_resource_history_new RENAME TO idx_health_checks_resource_history;
+ALTER INDEX idx_health_checks_not_healthy_new RENAME TO idx_health_checks_not_healthy;
+ALTER INDEX idx_health_checks_not_healthy_namespace_new RENAME TO idx_health_checks_not_healthy_namespace;
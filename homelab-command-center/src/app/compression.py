@@ -0,0 +1,165 @@
+from typing import Callable, Dict, List, Optional
+import gzip
+
+import brotli
+import zstandard
+
+from app import timing
+from app.config import settings
+
+# Server preference when the client accepts several encodings equally
+SUPPORTED_ENCODINGS = ("zstd", "br", "gzip")
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-msgpack",
+    "text/",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+
+def _compress_gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=settings.compression_gzip_level, mtime=0)
+
+
+def _compress_brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=settings.compression_brotli_level)
+
+
+def _compress_zstd(body: bytes) -> bytes:
+    compressor = zstandard.ZstdCompressor(level=settings.compression_zstd_level)
+    return compressor.compress(body)
+
+
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    "gzip": _compress_gzip,
+    "br": _compress_brotli,
+    "zstd": _compress_zstd,
+}
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with one of SUPPORTED_ENCODINGS."""
+    return COMPRESSORS[encoding](body)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header."""
+    if not accept_encoding or not settings.compression_enabled:
+        return None
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[token.strip().lower()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    candidates = [
+        (weights.get(encoding, wildcard), -index, encoding)
+        for index, encoding in enumerate(SUPPORTED_ENCODINGS)
+    ]
+    weight, _, encoding = max(candidates)
+    return encoding if weight > 0 else None
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """Whether a content type is worth compressing."""
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """ASGI middleware that compresses buffered responses above a size threshold.
+
+    Responses that already carry Content-Encoding (e.g. pre-compressed
+    snapshots) and streamed responses are passed through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(
+            headers.get(b"accept-encoding", b"").decode("latin-1")
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[dict] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            response_headers = _header_dict(start_message["headers"])
+            if (
+                message.get("more_body", False)
+                or b"content-encoding" in response_headers
+                or len(body) < settings.compression_minimum_size
+                or not is_compressible(
+                    response_headers.get(b"content-type", b"").decode("latin-1")
+                )
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            with timing.phase("compress"):
+                compressed = compress(body, encoding)
+            start_message["headers"] = _with_encoding_headers(
+                start_message["headers"], encoding, len(compressed)
+            )
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _header_dict(raw_headers: List[tuple]) -> Dict[bytes, bytes]:
+    return {key.lower(): value for key, value in raw_headers}
+
+
+def _with_encoding_headers(
+    raw_headers: List[tuple], encoding: str, length: int
+) -> List[tuple]:
+    """Replace Content-Length and add Content-Encoding/Vary for a compressed body."""
+    headers = [
+        (key, value)
+        for key, value in raw_headers
+        if key.lower() not in (b"content-length", b"vary")
+    ]
+    vary = [value for key, value in raw_headers if key.lower() == b"vary"]
+    vary_values = {
+        v.strip()
+        for value in vary
+        for v in value.decode("latin-1").split(",")
+        if v.strip()
+    }
+    vary_values.add("Accept-Encoding")
+    headers.append((b"content-encoding", encoding.encode("latin-1")))
+    headers.append((b"content-length", str(length).encode("latin-1")))
+    headers.append((b"vary", ", ".join(sorted(vary_values)).encode("latin-1")))
+    return headers
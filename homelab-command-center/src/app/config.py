@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 import os
 
 
@@ -15,19 +15,100 @@ class Settings(BaseSettings):
     # Kubernetes settings
     kube_config_path: Optional[str] = None
     kube_namespace: str = "default"
+    # Cluster name -> kubeconfig context ("in-cluster" for the service account,
+    # null to auto-detect). Empty means a single auto-detected default cluster.
+    kube_clusters: Dict[str, Optional[str]] = {}
+    default_cluster: str = "default"
+    cluster_fanout_timeout: float = 10.0  # seconds before cluster=* skips a cluster
+    kube_list_cache_ttl: float = 5.0  # seconds a list is reused, 0 disables
+    # Lists cached per kind, namespace and fields= projection, LRU evicted
+    kube_list_cache_size: int = 64
+    # Seconds an old list is still served while the apiserver is failing
+    kube_list_cache_max_stale: float = 300.0
+    # Client-side admission control for apiserver and metrics-server calls, per cluster.
+    # Calls queue by priority: interactive (API) > health > stats > sync.
+    kube_rate_limit: float = 20.0  # calls per second, 0 disables limiting
+    kube_rate_burst: int = 40
+    kube_interactive_reserve: int = 5  # tokens only interactive calls may take
+    kube_breaker_failures: int = 5  # consecutive failures that open a circuit
+    kube_breaker_reset: float = 30.0  # seconds a circuit stays open before a trial call
     
     # Monitoring settings
     health_check_interval: int = 30  # seconds
     cluster_stats_interval: int = 60  # seconds
+    # Periodic tasks run one at a time cluster-wide and back off when slow
+    schedule_jitter: float = 0.1  # runs start up to this fraction of the interval late
+    schedule_lock_ttl: int = 60  # seconds; renewed while a run is alive
+    schedule_backoff_factor: float = 2.0  # stretch the interval to this x cycle time
+    schedule_max_backoff: float = 10.0  # but to at most this x the base interval
+    # Health checks are split into shards run in parallel across workers.
+    # Keep health_max_shards at or above the total worker concurrency.
+    health_shard_size: int = 250  # checks per shard; smaller clusters run in one task
+    health_max_shards: int = 16
+    health_shard_timeout: int = 300  # seconds a shard may run before it is stopped
+    metrics_scrape_interval: int = 15  # seconds, metrics-server resolution
+    metrics_history_enabled: bool = True
+    metrics_history_samples: int = 240  # samples kept per series (1h at 15s)
+    metrics_history_sample_budget: int = 2_400_000  # total samples across all series
+    
+    # Kubernetes Events, watched by one API replica (elected through a Redis lock),
+    # merged in memory by involved object and reason and written in batches
+    events_enabled: bool = True
+    events_watch_timeout: int = 300  # seconds per watch request before it is renewed
+    events_flush_interval: float = 5.0  # seconds between batched writes
+    events_batch_size: int = 500  # rows per upsert; this many pending keys flush early
+    events_max_pending: int = 10000  # keys held between flushes; extra ones are dropped
+    events_max_tracked: int = 50000  # Event objects whose last count is remembered
+    events_leader_ttl: int = 30  # seconds the watcher lock outlives a dead replica
+
+    # Active probing of services and ingresses (runs with each health check)
+    probe_enabled: bool = True
+    probe_services: bool = True  # probe service ClusterIP ports
+    probe_ingresses: bool = True  # probe ingress hosts
+    probe_targets: List[str] = []  # extra http(s):// URLs or tcp://host:port
+    probe_concurrency: int = 50  # probes in flight at once
+    probe_timeout: float = 5.0  # seconds per probe
+    probe_jitter: float = 1.0  # max random delay before each probe, seconds
+    probe_verify_tls: bool = True
+    
+    # Data retention, enforced by the daily cleanup task
+    cluster_stats_retention_days: int = 7
+    health_check_retention_days: int = 3
+    events_retention_days: int = 7  # by last occurrence
+    cleanup_batch_size: int = 5000  # rows deleted per transaction
+    cleanup_batch_pause: float = 0.5  # seconds between batches
+    cleanup_max_runtime: int = 20 * 60  # seconds per run; a follow-up run continues
+    # Expired rows are first archived here as zstd-compressed NDJSON, one
+    # directory per table and day; unset deletes them outright
+    archive_dir: Optional[str] = None
+    archive_retention_days: int = 365  # 0 keeps archives forever
+    archive_zstd_level: int = 10
     
     # API settings
     api_title: str = "HomeLab Command Center"
     api_description: str = "Modern HomeLab monitoring and management platform"
     api_version: str = "1.0.0"
     
+    # Response compression (negotiated from Accept-Encoding: zstd, br, gzip)
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024  # bytes; smaller bodies are sent as-is
+    compression_gzip_level: int = 6
+    compression_brotli_level: int = 4
+    compression_zstd_level: int = 3
+    
+    # Request timing: Server-Timing headers and rolling per-route stats
+    timing_enabled: bool = False
+    timing_window: int = 1000  # recent requests kept per route
+
+    # Sampling profiler (/api/v1/debug/profile)
+    profile_max_seconds: float = 60.0
+    profile_interval_ms: float = 5.0  # default sampling interval
+
     # Security
     secret_key: str = "${SECRET_KEY}"
-    
+    # Bearer token for /api/v1/debug; unset disables it
+    admin_token: Optional[str] = None
+
     # Logging
     log_level: str = "INFO"
     
@@ -1,27 +1,73 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, String, Integer, Boolean, Float, DateTime, Text, JSON
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    BigInteger,
+    Boolean,
+    Float,
+    DateTime,
+    Text,
+    Index,
+    Identity,
+    Uuid,
+    JSON,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 import logging
+import uuid
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# JSONB on Postgres; plain JSON elsewhere so the schema also builds on SQLite
+# (benchmarks, local runs). SQLite only autoincrements INTEGER primary keys.
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+BigIntegerId = BigInteger().with_variant(Integer(), "sqlite")
+
 # Create base class
 Base = declarative_base()
 
-# Database engine and session
-from app.config import settings
+# Database engine and session, created on first use so importing the
+# models never builds an engine
+_engine = None
+_session_factory = None
+
 
-engine = create_async_engine(settings.database_url, echo=False)
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+def get_engine():
+    """Get the database engine, creating it on first use."""
+    global _engine, _session_factory
+    if _engine is None:
+        _engine = create_async_engine(settings.database_url, echo=False)
+        if settings.timing_enabled:
+            from app.timing import instrument_engine
+            instrument_engine(_engine)
+        _session_factory = sessionmaker(
+            _engine, class_=AsyncSession, expire_on_commit=False
+        )
+    return _engine
+
+
+def async_session() -> AsyncSession:
+    """Create a new database session."""
+    get_engine()
+    return _session_factory()
 
 
 # Database Models
 class Node(Base):
     __tablename__ = "nodes"
     
-    id = Column(String(255), primary_key=True)
+    id = Column(
+        Uuid,
+        primary_key=True,
+        default=uuid.uuid4,
+        server_default=text("gen_random_uuid()"),
+    )
     name = Column(String(255), unique=True, nullable=False)
     status = Column(String(50), nullable=False)
     role = Column(String(50), nullable=False)
@@ -33,17 +79,26 @@ class Node(Base):
     memory_capacity = Column(String(50))
     cpu_allocatable = Column(String(50))
     memory_allocatable = Column(String(50))
-    conditions = Column(JSON)
-    labels = Column(JSON)
-    annotations = Column(JSON)
+    conditions = Column(JSONType)
+    labels = Column(JSONType)
+    annotations = Column(JSONType)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("idx_nodes_labels", "labels", postgresql_using="gin"),
+    )
 
 
 class Pod(Base):
     __tablename__ = "pods"
     
-    id = Column(String(255), primary_key=True)
+    id = Column(
+        Uuid,
+        primary_key=True,
+        default=uuid.uuid4,
+        server_default=text("gen_random_uuid()"),
+    )
     name = Column(String(255), nullable=False)
     namespace = Column(String(255), nullable=False)
     node_name = Column(String(255))
@@ -51,34 +106,47 @@ class Pod(Base):
     phase = Column(String(50), nullable=False)
     restart_count = Column(Integer, default=0)
     ready = Column(Boolean, default=False)
-    containers = Column(JSON)
-    labels = Column(JSON)
-    annotations = Column(JSON)
+    containers = Column(JSONType)
+    labels = Column(JSONType)
+    annotations = Column(JSONType)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("idx_pods_labels", "labels", postgresql_using="gin"),
+    )
 
 
 class Service(Base):
     __tablename__ = "services"
     
-    id = Column(String(255), primary_key=True)
+    id = Column(
+        Uuid,
+        primary_key=True,
+        default=uuid.uuid4,
+        server_default=text("gen_random_uuid()"),
+    )
     name = Column(String(255), nullable=False)
     namespace = Column(String(255), nullable=False)
     type = Column(String(50), nullable=False)
     cluster_ip = Column(String(50))
-    external_ips = Column(JSON)
-    ports = Column(JSON)
-    selector = Column(JSON)
-    labels = Column(JSON)
-    annotations = Column(JSON)
+    external_ips = Column(JSONType)
+    ports = Column(JSONType)
+    selector = Column(JSONType)
+    labels = Column(JSONType)
+    annotations = Column(JSONType)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("idx_services_labels", "labels", postgresql_using="gin"),
+    )
 
 
 class ClusterStats(Base):
     __tablename__ = "cluster_stats"
     
-    id = Column(String(255), primary_key=True)
+    id = Column(BigIntegerId, Identity(), primary_key=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
     total_nodes = Column(Integer, default=0)
     ready_nodes = Column(Integer, default=0)
@@ -90,22 +158,97 @@ class ClusterStats(Base):
     cpu_usage_percent = Column(Float)
     memory_usage_percent = Column(Float)
     storage_usage_percent = Column(Float)
-    custom_metrics = Column(JSON)
+    custom_metrics = Column(JSONType)
 
 
 class HealthCheck(Base):
     __tablename__ = "health_checks"
     
-    id = Column(String(255), primary_key=True)
+    id = Column(BigIntegerId, Identity(), primary_key=True)
     resource_type = Column(String(50), nullable=False)
     resource_name = Column(String(255), nullable=False)
     namespace = Column(String(255))
     status = Column(String(50), nullable=False)
     message = Column(Text)
-    details = Column(JSON)
+    details = Column(JSONType)
     checked_at = Column(DateTime, default=datetime.utcnow)
 
 
+# History indexes (see migrations/sql/02_health_checks_history_indexes.sql)
+Index(
+    "idx_health_checks_resource_history",
+    HealthCheck.resource_type,
+    HealthCheck.namespace,
+    HealthCheck.resource_name,
+    HealthCheck.checked_at.desc(),
+    HealthCheck.id.desc()
+)
+Index(
+    "idx_health_checks_not_healthy",
+    HealthCheck.checked_at.desc(),
+    HealthCheck.id.desc(),
+    postgresql_where=HealthCheck.status != "healthy",
+    sqlite_where=HealthCheck.status != "healthy"
+)
+Index(
+    "idx_health_checks_not_healthy_namespace",
+    HealthCheck.namespace,
+    HealthCheck.checked_at.desc(),
+    HealthCheck.id.desc(),
+    postgresql_where=HealthCheck.status != "healthy",
+    sqlite_where=HealthCheck.status != "healthy"
+)
+
+
+class HealthStatus(Base):
+    __tablename__ = "health_status"
+    
+    resource_key = Column(String(600), primary_key=True)
+    resource_type = Column(String(50), nullable=False)
+    resource_name = Column(String(255), nullable=False)
+    namespace = Column(String(255))
+    status = Column(String(50), nullable=False)
+    message = Column(Text)
+    details = Column(JSONType)
+    checked_at = Column(DateTime, nullable=False)
+    status_since = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index(
+            "idx_health_status_not_healthy",
+            "namespace",
+            "resource_type",
+            postgresql_where=status != "healthy",
+            sqlite_where=status != "healthy"
+        ),
+    )
+
+
+class Event(Base):
+    __tablename__ = "events"
+    
+    id = Column(BigIntegerId, Identity(), primary_key=True)
+    # kind/namespace/name/reason
+    event_key = Column(String(700), unique=True, nullable=False)
+    namespace = Column(String(255))
+    kind = Column(String(100), nullable=False)  # of the involved object
+    name = Column(String(255), nullable=False)
+    reason = Column(String(255))
+    type = Column(String(50))  # Normal or Warning
+    message = Column(Text)  # from the latest occurrence
+    source = Column(String(255))
+    count = Column(BigInteger, nullable=False, default=1)
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index("idx_events_last_seen", last_seen.desc(), id.desc()),
+        Index(
+            "idx_events_namespace_last_seen", "namespace", last_seen.desc(), id.desc()
+        ),
+    )
+
+
 async def get_db() -> AsyncSession:
     """Get database session."""
     async with async_session() as session:
@@ -117,5 +260,15 @@ async def get_db() -> AsyncSession:
 
 async def init_db():
     """Initialize database tables."""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def dispose_engine():
+    """Close all pooled database connections."""
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _session_factory = None
+        logger.info("Database engine disposed")
\ No newline at end of file
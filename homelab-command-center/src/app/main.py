@@ -1,19 +1,51 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import JSONResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi import Request
+import asyncio
 import logging
 import os
 from pathlib import Path
 
 # Import routers
-from app.routers import monitoring
+from app.compression import CompressionMiddleware
+from app.config import settings
+from app.routers import debug, monitoring
+from app.services.clusters import cluster_registry
+from app.services.kubernetes import k8s_client
+from app.services.metrics_history import metrics_history_service
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage startup and shutdown of shared clients and background samplers."""
+    # Warm the Kubernetes client off the event loop so the first request
+    # doesn't pay for importing the kubernetes package and loading config
+    warmup = asyncio.create_task(asyncio.to_thread(k8s_client.initialize))
+    metrics_history_service.start()
+    if settings.events_enabled:
+        from app.services.events import events_service
+        events_service.start()
+    
+    yield
+    
+    if settings.events_enabled:
+        await events_service.stop()
+    await metrics_history_service.stop()
+    await warmup
+    cluster_registry.close()
+    
+    # Deferred imports: the API only loads these when a route has used them
+    from app.database import dispose_engine
+    from app.services.redis import close_redis
+    await dispose_engine()
+    await close_redis()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="HomeLab Command Center",
@@ -21,11 +53,19 @@ app = FastAPI(
     version="0.0.1",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    lifespan=lifespan
 )
 
+app.add_middleware(CompressionMiddleware)
+if settings.timing_enabled:
+    # Added last so it wraps compression and times it too
+    from app.timing import TimingMiddleware
+    app.add_middleware(TimingMiddleware)
+
 # Include routers
 app.include_router(monitoring.router, prefix="/api/v1", tags=["monitoring"])
+app.include_router(debug.router, prefix="/api/v1/debug", tags=["debug"])
 
 # Mount static files
 static_path = Path(__file__).parent / "frontend" / "static"
@@ -0,0 +1,104 @@
+from collections import Counter
+from typing import Dict, Tuple
+import os
+import sys
+import threading
+import time
+
+# Innermost frames of threads that are waiting rather than running:
+# the event loop's selector, idle thread-pool workers, lock waits
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+}
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another one is running."""
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of every thread in this process.
+
+    Nothing runs between profiles. While profiling, one thread snapshots
+    sys._current_frames() every `interval` seconds, so overhead is bounded
+    by the sampling rate rather than by how much code runs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Code object -> frame label, for the profile being taken
+        self._labels: Dict[object, str] = {}
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def sample(
+        self, seconds: float, interval: float, include_idle: bool = False
+    ) -> Tuple[Counter, int]:
+        """Sample for `seconds`; return (collapsed stack -> count, sampling rounds)."""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+        try:
+            return self._sample(seconds, interval, include_idle)
+        finally:
+            # Labels hold on to code objects; don't keep them between profiles
+            self._labels.clear()
+            self._lock.release()
+
+    def _sample(
+        self, seconds: float, interval: float, include_idle: bool
+    ) -> Tuple[Counter, int]:
+        stacks: Counter = Counter()
+        own_ident = threading.get_ident()
+        rounds = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            thread_names = {
+                thread.ident: thread.name for thread in threading.enumerate()
+            }
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                code = frame.f_code
+                location = (os.path.basename(code.co_filename), code.co_name)
+                if not include_idle and location in IDLE_FRAMES:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(thread_names.get(ident, f"thread-{ident}"))
+                stacks[";".join(reversed(labels))] += 1
+            rounds += 1
+            time.sleep(interval)
+        return stacks, rounds
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            location = f"{_short_path(code.co_filename)}:{code.co_firstlineno}"
+            label = self._labels[code] = f"{code.co_name} ({location})"
+        return label
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to the enclosing package root (site-packages or src/)."""
+    for marker in ("site-packages/", "/src/"):
+        index = filename.rfind(marker)
+        if index != -1:
+            return filename[index + len(marker):]
+    return os.path.basename(filename)
+
+
+def collapsed(stacks: Counter) -> str:
+    """Render stacks in the collapsed format (flamegraph.pl, speedscope, inferno)."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+# Global sampling profiler instance
+profiler = SamplingProfiler()
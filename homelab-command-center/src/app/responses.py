@@ -0,0 +1,152 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from fastapi.responses import JSONResponse, Response
+import msgpack
+import orjson
+
+from app import timing
+from app.compression import choose_encoding, compress
+from app.config import settings
+
+
+def _default(obj: Any) -> Any:
+    """Encode types orjson doesn't handle natively."""
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content to JSON bytes with orjson."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _msgpack_default(obj: Any) -> Any:
+    """Encode types msgpack doesn't handle natively."""
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return _default(obj)
+
+
+def packb(content: Any) -> bytes:
+    """Encode content to MessagePack bytes."""
+    return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+SERIALIZERS: Dict[str, Callable[[Any], bytes]] = {
+    JSON_MEDIA_TYPE: dumps,
+    MSGPACK_MEDIA_TYPE: packb,
+}
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """Pick MessagePack when the client asks for it, JSON otherwise."""
+    if accept and (
+        "application/x-msgpack" in accept or "application/msgpack" in accept
+    ):
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Return it directly from a route (rather than a dict) to also skip
+    FastAPI's jsonable_encoder walk over the payload.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with timing.phase("encode"):
+            return dumps(content)
+
+
+class MsgPackResponse(Response):
+    """MessagePack response for binary-friendly consumers."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        with timing.phase("encode"):
+            return packb(content)
+
+
+class SnapshotCache:
+    """Encoded response bodies reused while the underlying snapshot is unchanged.
+
+    A snapshot is the object a service hands out from its own cache (e.g. a
+    node list). As long as the same object comes back, the previously
+    encoded bytes - and any compressed variants of them - are served without
+    touching the payload again, so compression is paid once per change.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[Any, bytes, Dict[str, bytes]]]" = (
+            OrderedDict()
+        )
+
+    def get_or_encode(
+        self,
+        key: Hashable,
+        snapshot: Any,
+        build: Callable[[], Any],
+        encoding: Optional[str] = None,
+        media_type: str = JSON_MEDIA_TYPE
+    ) -> bytes:
+        """Return cached bytes for `key`, encoding `build()` when `snapshot` changed.
+
+        With `encoding`, the compressed variant is returned (and cached).
+        """
+        key = (key, media_type)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] is not snapshot:
+            # Holding the snapshot keeps its identity from being reused by a new object
+            with timing.phase("encode"):
+                entry = (snapshot, SERIALIZERS[media_type](build()), {})
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(key)
+
+        if encoding is None:
+            return entry[1]
+        variants = entry[2]
+        if encoding not in variants:
+            with timing.phase("compress"):
+                variants[encoding] = compress(entry[1], encoding)
+        return variants[encoding]
+
+    def clear(self):
+        """Drop all cached bodies."""
+        self._entries.clear()
+
+
+# Global encoded snapshot cache
+snapshot_cache = SnapshotCache()
+
+
+def snapshot_response(
+    key: Hashable,
+    snapshot: Any,
+    build: Callable[[], Any],
+    accept_encoding: Optional[str] = None,
+    media_type: str = JSON_MEDIA_TYPE
+) -> Response:
+    """Build a response whose body (and compressed variants) is cached per snapshot."""
+    body = snapshot_cache.get_or_encode(key, snapshot, build, media_type=media_type)
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None or len(body) < settings.compression_minimum_size:
+        return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
+
+    return Response(
+        content=snapshot_cache.get_or_encode(
+            key, snapshot, build, encoding, media_type
+        ),
+        media_type=media_type,
+        headers={"Content-Encoding": encoding, "Vary": "Accept, Accept-Encoding"},
+    )
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import asyncio
+import logging
+import secrets
+
+from app.config import settings
+from app.profiling import ProfilerBusyError, collapsed, profiler
+from app.timing import timing_stats
+
+logger = logging.getLogger(__name__)
+
+
+def require_admin(authorization: Optional[str] = Header(None)):
+    """Allow only requests bearing settings.admin_token.
+
+    Without one configured, the debug routes don't exist.
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    valid = secrets.compare_digest(token.encode(), settings.admin_token.encode())
+    if scheme.lower() != "bearer" or not valid:
+        raise HTTPException(
+            status_code=401,
+            detail="Admin token required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+# Create router
+router = APIRouter(tags=["debug"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/timings")
+async def get_timings():
+    """Rolling per-route request timings, broken down by phase."""
+    return {
+        "enabled": settings.timing_enabled,
+        "window": timing_stats.window,
+        "routes": timing_stats.snapshot(),
+    }
+
+
+@router.delete("/timings")
+async def reset_timings():
+    """Forget the collected request timings."""
+    timing_stats.clear()
+    return {"status": "cleared"}
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def get_profile(
+    seconds: float = Query(10.0, gt=0, description="How long to sample"),
+    interval_ms: Optional[float] = Query(
+        None, ge=1, le=1000, description="Sampling interval"
+    ),
+    idle: bool = Query(False, description="Include threads that are waiting"),
+):
+    """Sample every thread's Python stack for `seconds`.
+
+    Returns collapsed stacks ("thread;frame;frame count" per line), ready
+    for flamegraph.pl, speedscope or inferno.
+    """
+    if seconds > settings.profile_max_seconds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"seconds must be at most {settings.profile_max_seconds}",
+        )
+    if profiler.busy:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    interval = (interval_ms or settings.profile_interval_ms) / 1000
+    logger.info(f"Profiling for {seconds}s at {interval * 1000:.0f}ms intervals")
+    try:
+        stacks, rounds = await asyncio.to_thread(
+            profiler.sample, seconds, interval, idle
+        )
+    except ProfilerBusyError:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    return PlainTextResponse(
+        collapsed(stacks), headers={"X-Profile-Samples": str(rounds)}
+    )
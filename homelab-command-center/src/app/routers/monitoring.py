@@ -1,15 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
-from typing import List, Dict, Any, Optional
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    BackgroundTasks,
+    Request,
+    Response,
+)
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 import asyncio
 
-from app.services.kubernetes import k8s_client
+from app.config import settings
+from fastapi.responses import StreamingResponse
+from app.responses import (
+    FastJSONResponse,
+    MsgPackResponse,
+    MSGPACK_MEDIA_TYPE,
+    negotiate_media_type,
+    snapshot_response,
+)
+from app.services.clusters import cluster_registry, ALL_CLUSTERS
+from app.services.export import export_cluster_state, EXPORT_KINDS
+from app.services.kubernetes import (
+    KubernetesClient, k8s_client, NODE_FIELDS, POD_FIELDS, SERVICE_FIELDS
+)
+from app.services.label_index import label_index_service, INDEXED_KINDS
+from app.services.resource_usage import resource_usage_service, SORT_KEYS
+from app.services.metrics_history import metrics_history_service
+from app.services.prober import prober_service
 
 logger = logging.getLogger(__name__)
 
 # Create router
-router = APIRouter(tags=["monitoring"])
+router = APIRouter(tags=["monitoring"], default_response_class=FastJSONResponse)
 
 
 @router.get("/health")
@@ -18,26 +43,127 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
 
+def _get_cluster_client(cluster: Optional[str]) -> KubernetesClient:
+    """Resolve a cluster query parameter to its client."""
+    try:
+        return cluster_registry.get(cluster)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Cluster {cluster} not found")
+
+
+async def _fetch_from_clusters(
+    cluster: Optional[str],
+    fetch: Callable[[KubernetesClient], Awaitable[List[Dict[str, Any]]]]
+) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """Fetch a resource list from one cluster, or from all of them for cluster=*.
+    
+    Fan-out results are merged and each item is tagged with its cluster name.
+    Returns (items, errors by cluster).
+    """
+    if cluster == ALL_CLUSTERS:
+        results, errors = await cluster_registry.fan_out(fetch)
+        items = [
+            dict(item, cluster=name)
+            for name, cluster_items in results.items()
+            for item in cluster_items
+        ]
+        return items, errors
+    return await fetch(_get_cluster_client(cluster)), {}
+
+
+def _parse_fields(
+    fields: Optional[str], allowed: Dict[str, Any]
+) -> Optional[FrozenSet[str]]:
+    """Parse a comma-separated fields= projection, rejecting unknown field names."""
+    if not fields:
+        return None
+    requested = frozenset(field.strip() for field in fields.split(",") if field.strip())
+    unknown = requested - allowed.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Unknown fields: {', '.join(sorted(unknown))}. "
+                f"Allowed: {', '.join(allowed)}"
+            ),
+        )
+    return requested or None
+
+
+def _list_response(
+    request: Request,
+    cluster: Optional[str],
+    key: Tuple,
+    items: List[Dict[str, Any]],
+    build: Callable[[], Dict[str, Any]]
+) -> Response:
+    """Encode a list response as JSON or MessagePack (per Accept).
+    
+    Single-cluster snapshots reuse their encoded bytes while unchanged.
+    """
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    if cluster == ALL_CLUSTERS:
+        if media_type == MSGPACK_MEDIA_TYPE:
+            return MsgPackResponse(build())
+        return FastJSONResponse(build())
+    return snapshot_response(
+        key + (cluster,),
+        items,
+        build,
+        request.headers.get("accept-encoding"),
+        media_type,
+    )
+
+
+@router.get("/clusters")
+async def get_clusters():
+    """List configured clusters."""
+    return {"clusters": cluster_registry.names(), "default": settings.default_cluster}
+
+
+@router.get("/clusters/upstream")
+async def get_upstream_state():
+    """Apiserver rate limiter and circuit breaker state for each cluster."""
+    return {
+        "clusters": cluster_registry.upstream_state(),
+        "timestamp": datetime.utcnow(),
+    }
+
+
 @router.get("/nodes")
-async def get_nodes():
+async def get_nodes(
+    request: Request,
+    cluster: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return")
+):
     """Get all cluster nodes."""
+    projection = _parse_fields(fields, NODE_FIELDS)
     try:
-        nodes = await k8s_client.get_nodes()
-        return {"nodes": nodes, "count": len(nodes)}
+        nodes, errors = await _fetch_from_clusters(
+            cluster, lambda c: c.get_nodes(projection)
+        )
+        return _list_response(request, cluster, ("nodes", projection), nodes, lambda: {
+            "nodes": nodes,
+            "count": len(nodes),
+            "cluster": cluster,
+            "cluster_errors": errors,
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting nodes: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/nodes/{node_name}")
-async def get_node(node_name: str):
+async def get_node(node_name: str, cluster: Optional[str] = Query(None)):
     """Get specific node information."""
     try:
-        nodes = await k8s_client.get_nodes()
+        nodes, _ = await _fetch_from_clusters(cluster, lambda c: c.get_nodes())
         node = next((n for n in nodes if n["name"] == node_name), None)
         if not node:
             raise HTTPException(status_code=404, detail=f"Node {node_name} not found")
-        return node
+        return FastJSONResponse(node)
     except HTTPException:
         raise
     except Exception as e:
@@ -46,25 +172,46 @@ async def get_node(node_name: str):
 
 
 @router.get("/pods")
-async def get_pods(namespace: Optional[str] = Query(None)):
+async def get_pods(
+    request: Request,
+    namespace: Optional[str] = Query(None),
+    cluster: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return")
+):
     """Get pods from cluster."""
+    projection = _parse_fields(fields, POD_FIELDS)
     try:
-        pods = await k8s_client.get_pods(namespace)
-        return {"pods": pods, "count": len(pods), "namespace": namespace}
+        pods, errors = await _fetch_from_clusters(
+            cluster, lambda c: c.get_pods(namespace, projection)
+        )
+        key = ("pods", namespace, projection)
+        return _list_response(request, cluster, key, pods, lambda: {
+            "pods": pods,
+            "count": len(pods),
+            "namespace": namespace,
+            "cluster": cluster,
+            "cluster_errors": errors
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting pods: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/pods/{pod_name}")
-async def get_pod(pod_name: str, namespace: Optional[str] = Query(None)):
+async def get_pod(
+    pod_name: str,
+    namespace: Optional[str] = Query(None),
+    cluster: Optional[str] = Query(None)
+):
     """Get specific pod information."""
     try:
-        pods = await k8s_client.get_pods(namespace)
+        pods, _ = await _fetch_from_clusters(cluster, lambda c: c.get_pods(namespace))
         pod = next((p for p in pods if p["name"] == pod_name), None)
         if not pod:
             raise HTTPException(status_code=404, detail=f"Pod {pod_name} not found")
-        return pod
+        return FastJSONResponse(pod)
     except HTTPException:
         raise
     except Exception as e:
@@ -73,25 +220,48 @@ async def get_pod(pod_name: str, namespace: Optional[str] = Query(None)):
 
 
 @router.get("/services")
-async def get_services(namespace: Optional[str] = Query(None)):
+async def get_services(
+    request: Request,
+    namespace: Optional[str] = Query(None),
+    cluster: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return")
+):
     """Get services from cluster."""
+    projection = _parse_fields(fields, SERVICE_FIELDS)
     try:
-        services = await k8s_client.get_services(namespace)
-        return {"services": services, "count": len(services), "namespace": namespace}
+        services, errors = await _fetch_from_clusters(
+            cluster, lambda c: c.get_services(namespace, projection)
+        )
+        key = ("services", namespace, projection)
+        return _list_response(request, cluster, key, services, lambda: {
+            "services": services,
+            "count": len(services),
+            "namespace": namespace,
+            "cluster": cluster,
+            "cluster_errors": errors
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting services: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/services/{service_name}")
-async def get_service(service_name: str, namespace: Optional[str] = Query(None)):
+async def get_service(
+    service_name: str,
+    namespace: Optional[str] = Query(None),
+    cluster: Optional[str] = Query(None)
+):
     """Get specific service information."""
     try:
-        services = await k8s_client.get_services(namespace)
+        services, _ = await _fetch_from_clusters(
+            cluster, lambda c: c.get_services(namespace)
+        )
         service = next((s for s in services if s["name"] == service_name), None)
         if not service:
             raise HTTPException(status_code=404, detail=f"Service {service_name} not found")
-        return service
+        return FastJSONResponse(service)
     except HTTPException:
         raise
     except Exception as e:
@@ -99,28 +269,350 @@ async def get_service(service_name: str, namespace: Optional[str] = Query(None))
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/services/{service_name}/pods")
+async def get_service_pods(
+    service_name: str,
+    namespace: Optional[str] = Query(None),
+    cluster: Optional[str] = Query(None)
+):
+    """Get the pods a service's selector matches."""
+    client = _get_cluster_client(cluster)
+    try:
+        result = await label_index_service.get_service_pods(
+            client, service_name, namespace
+        )
+        if result is None:
+            raise HTTPException(
+                status_code=404, detail=f"Service {service_name} not found"
+            )
+        service = result["service"]
+        return FastJSONResponse({
+            "service": service["name"],
+            "namespace": service["namespace"],
+            "selector": service.get("selector") or {},
+            "pods": result["pods"],
+            "count": len(result["pods"]),
+            "cluster": cluster
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting pods for service {service_name}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/select/{kind}")
+async def select_resources(
+    kind: str,
+    selector: Optional[str] = Query(
+        None, description="Label selector, e.g. app=web,tier in (frontend),!canary"
+    ),
+    namespace: Optional[str] = Query(None),
+    cluster: Optional[str] = Query(None),
+):
+    """Get nodes, pods or services matching a label selector."""
+    if kind not in INDEXED_KINDS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown kind {kind}. Allowed: {', '.join(INDEXED_KINDS)}",
+        )
+    client = _get_cluster_client(cluster)
+    try:
+        items = await label_index_service.select(client, kind, selector, namespace)
+        return FastJSONResponse({
+            kind: items,
+            "count": len(items),
+            "selector": selector,
+            "namespace": namespace,
+            "cluster": cluster
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error selecting {kind}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/metrics/nodes")
-async def get_node_metrics():
+async def get_node_metrics(cluster: Optional[str] = Query(None)):
     """Get node metrics (if metrics server is available)."""
     try:
-        metrics = await k8s_client.get_node_metrics()
-        return {"metrics": metrics, "count": len(metrics)}
+        metrics, errors = await _fetch_from_clusters(
+            cluster, lambda c: c.get_node_metrics()
+        )
+        return FastJSONResponse({
+            "metrics": metrics,
+            "count": len(metrics),
+            "cluster": cluster,
+            "cluster_errors": errors,
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting node metrics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/metrics/pods")
-async def get_pod_metrics(namespace: Optional[str] = Query(None)):
+async def get_pod_metrics(
+    namespace: Optional[str] = Query(None), cluster: Optional[str] = Query(None)
+):
     """Get pod metrics (if metrics server is available)."""
     try:
-        metrics = await k8s_client.get_pod_metrics(namespace)
-        return {"metrics": metrics, "count": len(metrics), "namespace": namespace}
+        metrics, errors = await _fetch_from_clusters(
+            cluster, lambda c: c.get_pod_metrics(namespace)
+        )
+        return FastJSONResponse({
+            "metrics": metrics,
+            "count": len(metrics),
+            "namespace": namespace,
+            "cluster": cluster,
+            "cluster_errors": errors
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting pod metrics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/metrics/top")
+async def get_top_consumers(
+    k: int = Query(10, ge=1, le=100),
+    sort_by: str = Query("cpu"),
+    namespace: Optional[str] = Query(None),
+    cluster: Optional[str] = Query(None)
+):
+    """Get top-K pods by usage per namespace and per node."""
+    if sort_by not in SORT_KEYS:
+        raise HTTPException(
+            status_code=400, detail=f"sort_by must be one of {', '.join(SORT_KEYS)}"
+        )
+    if cluster != ALL_CLUSTERS:
+        _get_cluster_client(cluster)
+    try:
+        return FastJSONResponse(
+            await resource_usage_service.get_top_consumers(
+                k, sort_by, namespace, cluster
+            )
+        )
+    except Exception as e:
+        logger.error(f"Error getting top consumers: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/metrics/history")
+async def get_metrics_history(
+    kind: str = Query(..., pattern="^(node|pod)$"),
+    name: str = Query(..., description="Node name, or namespace/name for pods"),
+    metric: str = Query("cpu", pattern="^(cpu|memory)$"),
+    seconds: Optional[int] = Query(None, ge=1),
+    max_points: Optional[int] = Query(None, ge=1)
+):
+    """Get recent metrics samples for a node or pod from the in-memory history."""
+    samples = metrics_history_service.get_window(
+        kind, name, metric, seconds, max_points
+    )
+    if samples is None:
+        raise HTTPException(
+            status_code=404, detail=f"No {metric} history for {kind} {name}"
+        )
+    return FastJSONResponse({
+        "kind": kind,
+        "name": name,
+        "metric": metric,
+        "samples": [{"timestamp": ts, "value": value} for ts, value in samples],
+        "count": len(samples)
+    })
+
+
+@router.get("/metrics/history/series")
+async def list_metrics_history_series(kind: Optional[str] = Query(None)):
+    """List series held in the in-memory metrics history."""
+    series = metrics_history_service.list_series(kind)
+    return {"series": series, "count": len(series)}
+
+
+async def _get_db():
+    """Database session dependency, importing the database layer on first use."""
+    from app.database import get_db
+    async for session in get_db():
+        yield session
+
+
+@router.get("/health/history")
+async def get_health_history(
+    resource_type: Optional[str] = Query(None, pattern="^(node|pod|service|probe)$"),
+    resource_name: Optional[str] = Query(None),
+    namespace: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    not_healthy: bool = Query(False, description="Only warning/unhealthy checks"),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor from the previous page"
+    ),
+    archive: bool = Query(
+        False, description="Continue into archived checks past the retention window"
+    ),
+    db=Depends(_get_db),
+):
+    """Get stored health check results, newest first, with cursor pagination."""
+    from app.services.health_history import health_history_service
+    try:
+        return FastJSONResponse(await health_history_service.get_history(
+            db, resource_type, resource_name, namespace, status, not_healthy, since,
+            until, limit, cursor, archive
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting health history: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cluster/health")
+async def get_cluster_health(
+    namespace: Optional[str] = Query(None),
+    resource_type: Optional[str] = Query(None, pattern="^(node|pod|service|probe)$"),
+    db=Depends(_get_db)
+):
+    """Get the current health summary from the latest check of each resource."""
+    from app.services.health_status import health_status_service
+    try:
+        return FastJSONResponse(
+            await health_status_service.get_summary(db, namespace, resource_type)
+        )
+    except Exception as e:
+        logger.error(f"Error getting cluster health summary: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cluster/stats/history")
+async def get_cluster_stats_history(
+    hours: int = Query(24, ge=1, le=24 * 366),
+    limit: int = Query(100, ge=1, le=10000),
+    archive: bool = Query(
+        False, description="Include archived stats past the retention window"
+    ),
+    db=Depends(_get_db)
+):
+    """Get collected cluster statistics, newest first."""
+    from app.services.cluster_monitoring import cluster_monitoring_service
+    stats = await cluster_monitoring_service.get_cluster_stats_history(
+        db, hours, limit, archive
+    )
+    return FastJSONResponse({"items": stats, "count": len(stats)})
+
+
+@router.get("/events")
+async def get_events(
+    namespace: Optional[str] = Query(None),
+    kind: Optional[str] = Query(
+        None, description="Kind of the involved object, e.g. Pod"
+    ),
+    name: Optional[str] = Query(None, description="Name of the involved object"),
+    reason: Optional[str] = Query(None),
+    type: Optional[str] = Query(None, pattern="^(Normal|Warning)$"),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor from the previous page"
+    ),
+    db=Depends(_get_db),
+):
+    """Get Kubernetes events, one per involved object and reason, latest first.
+    
+    Results are keyset-paginated: pass next_cursor back as `cursor`.
+    """
+    from app.services.events import events_service
+    try:
+        return FastJSONResponse(await events_service.get_events(
+            db, namespace, kind, name, reason, type, since, until, limit, cursor
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting events: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/events/pipeline")
+async def get_events_pipeline():
+    """Get this process's event ingestion state; only the elected replica watches."""
+    from app.services.events import events_service
+    return FastJSONResponse(events_service.status())
+
+
+@router.get("/history/archive")
+async def get_history_archive():
+    """Describe the cold archive of expired stats, health checks and events."""
+    from app.services.archive import archive_service
+    try:
+        return {
+            "enabled": archive_service.enabled,
+            "retention_days": settings.archive_retention_days,
+            "tables": await asyncio.to_thread(archive_service.usage),
+        }
+    except Exception as e:
+        logger.error(f"Error getting archive usage: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/probes/run")
+async def run_probes(cluster: Optional[str] = Query(None)):
+    """Probe a cluster's services, ingresses and configured URLs now."""
+    client = _get_cluster_client(cluster)
+    try:
+        services, ingresses = await asyncio.gather(
+            client.get_services(), client.get_ingresses()
+        )
+        results = await prober_service.probe_all(
+            prober_service.build_targets(services, ingresses)
+        )
+        return FastJSONResponse({
+            "results": results,
+            "count": len(results),
+            "healthy": sum(1 for result in results if result["status"] == "healthy"),
+            "cluster": cluster,
+            "checked_at": datetime.utcnow()
+        })
+    except Exception as e:
+        logger.error(f"Error running probes: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/export")
+async def export_state(
+    cluster: Optional[str] = Query(None),
+    kinds: Optional[str] = Query(
+        None, description="Comma-separated kinds: nodes,pods,services"
+    ),
+    batch_size: int = Query(5000, ge=1, le=100000),
+):
+    """Stream the cluster state as columnar MessagePack frames for bulk consumers."""
+    requested = (
+        [kind.strip() for kind in kinds.split(",") if kind.strip()]
+        if kinds
+        else list(EXPORT_KINDS)
+    )
+    unknown = set(requested) - set(EXPORT_KINDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown kinds: {', '.join(sorted(unknown))}"
+        )
+    if cluster != ALL_CLUSTERS:
+        _get_cluster_client(cluster)
+    
+    return StreamingResponse(
+        export_cluster_state(cluster, requested, batch_size),
+        media_type=MSGPACK_MEDIA_TYPE,
+        headers={"Content-Disposition": "attachment; filename=cluster-state.msgpack"}
+    )
+
+
 # Data Collection Endpoints
 
 @router.post("/collect/nodes")
@@ -0,0 +1,219 @@
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Highest priority first. API requests are interactive unless a caller says otherwise.
+PRIORITIES = ("interactive", "health", "stats", "sync")
+PRIORITY_RANK = {name: rank for rank, name in enumerate(PRIORITIES)}
+
+_current_priority: ContextVar[str] = ContextVar("kube_priority", default="interactive")
+
+
+@contextlib.contextmanager
+def priority(name: str):
+    """Run the block's Kubernetes API calls at priority `name`."""
+    if name not in PRIORITY_RANK:
+        raise ValueError(
+            f"Unknown priority {name}, expected one of {', '.join(PRIORITIES)}"
+        )
+    token = _current_priority.set(name)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> str:
+    return _current_priority.get()
+
+
+class UpstreamUnavailableError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class PriorityTokenBucket:
+    """Token bucket whose waiters are served highest priority first.
+
+    Calls below interactive priority may not take the last `reserve`
+    tokens, so a health pass or sync burst always leaves headroom for the
+    dashboard. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: int, reserve: int = 0):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.reserve = min(reserve, self.burst - 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters: List[tuple] = []  # heap of (rank, seq, future)
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.granted = {name: 0 for name in PRIORITIES}
+        self.waited = {name: 0.0 for name in PRIORITIES}
+
+    async def acquire(self, priority_name: Optional[str] = None):
+        """Wait for a token at `priority_name` (default: the current priority)."""
+        if self.rate <= 0:
+            return
+        name = priority_name or current_priority()
+        rank = PRIORITY_RANK[name]
+        self._bind_loop()
+        self._refill()
+        first_in_line = not self._waiters or self._waiters[0][0] > rank
+        if first_in_line and self._tokens >= self._needed(rank):
+            self._tokens -= 1
+            self.granted[name] += 1
+            return
+
+        future = self._loop.create_future()
+        heapq.heappush(self._waiters, (rank, next(self._seq), future))
+        self._schedule()
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted as we were cancelled
+                self._tokens = min(self.burst, self._tokens + 1)
+            raise
+        self.granted[name] += 1
+        self.waited[name] += time.monotonic() - started
+
+    def _needed(self, rank: int) -> float:
+        return 1 + (self.reserve if rank > 0 else 0)
+
+    def _bind_loop(self):
+        """Start over on a new event loop (e.g. each Celery task's asyncio.run)."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._waiters = []
+            self._wakeup = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _dispatch(self):
+        self._wakeup = None
+        self._refill()
+        while self._waiters:
+            rank, _, future = self._waiters[0]
+            if future.cancelled():
+                heapq.heappop(self._waiters)
+                continue
+            if self._tokens < self._needed(rank):
+                break
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            future.set_result(None)
+        self._schedule()
+
+    def _schedule(self):
+        if self._waiters and self._wakeup is None:
+            needed = self._needed(self._waiters[0][0])
+            delay = max(0.0, (needed - self._tokens) / self.rate)
+            self._wakeup = self._loop.call_later(delay, self._dispatch)
+
+    def snapshot(self) -> Dict[str, Any]:
+        if self.rate > 0:
+            self._refill()
+        queued = {name: 0 for name in PRIORITIES}
+        for rank, _, future in self._waiters:
+            if not future.done():
+                queued[PRIORITIES[rank]] += 1
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "reserve": self.reserve,
+            "tokens": round(self._tokens, 2),
+            "queued": queued,
+            "granted": dict(self.granted),
+            "wait_seconds": {
+                name: round(seconds, 3) for name, seconds in self.waited.items()
+            },
+        }
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one upstream.
+
+    Opens after `failure_threshold` failures in a row. Once `reset_timeout`
+    has passed, one trial call is let through (half-open): success closes
+    the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._trial_started = 0.0
+
+    def allow(self) -> bool:
+        """Whether a call may go to the upstream now."""
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._trial_started = now
+            return True
+        if (
+            self.state == self.HALF_OPEN
+            and now - self._trial_started >= self.reset_timeout
+        ):
+            # The trial never reported back (e.g. its task was cancelled); allow another
+            self._trial_started = now
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit {self.name} closed")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or (
+            self.state == self.CLOSED and self.failures >= self.failure_threshold
+        ):
+            if self.state == self.CLOSED:
+                self.trips += 1
+            logger.warning(
+                f"Circuit {self.name} open after {self.failures} consecutive failures"
+            )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == self.OPEN:
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            retry_in = round(max(0.0, remaining), 1)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_in_seconds": retry_in,
+        }
@@ -0,0 +1,180 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+import io
+import logging
+import os
+import shutil
+import orjson
+import zstandard
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+FILE_SUFFIX = ".ndjson.zst"
+
+
+class ArchiveService:
+    """Service keeping expired history rows as zstd-compressed NDJSON files.
+
+    Files live under archive_dir as
+    <table>/<YYYY-MM-DD>/<first id>-<last id>.ndjson.zst, one directory per
+    day of row timestamps, so a time-range query only opens the days it
+    overlaps. A batch always maps to the same file names,
+    so re-archiving a batch whose delete didn't commit overwrites it rather
+    than duplicating rows.
+    """
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.archive_dir)
+
+    def write(
+        self, table: str, timestamp_field: str, rows: List[Dict[str, Any]]
+    ) -> int:
+        """Archive a batch of rows (in id order); returns the bytes written."""
+        if not rows:
+            return 0
+        first_id, last_id = rows[0]["id"], rows[-1]["id"]
+        by_day: Dict[date, List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_day.setdefault(row[timestamp_field].date(), []).append(row)
+
+        written = 0
+        compressor = zstandard.ZstdCompressor(level=settings.archive_zstd_level)
+        for day, day_rows in by_day.items():
+            directory = os.path.join(settings.archive_dir, table, day.isoformat())
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{first_id}-{last_id}{FILE_SUFFIX}")
+            body = compressor.compress(
+                b"".join(orjson.dumps(row) + b"\n" for row in day_rows)
+            )
+            # Write then rename, so readers never see a partial file
+            with open(path + ".tmp", "wb") as f:
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            written += len(body)
+        return written
+
+    def query(
+        self,
+        table: str,
+        timestamp_field: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        before: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Get archived rows newest first, by (timestamp, id).
+
+        Rows are limited to [since, until), to positions before `before` (a
+        keyset cursor) and to those `predicate` accepts. Only day directories
+        overlapping the range are read, newest first, stopping once `limit`
+        rows are found.
+        """
+        upper = min(
+            (t for t in (until, before[0] if before else None) if t is not None),
+            default=None,
+        )
+        found: List[Dict[str, Any]] = []
+        for day in sorted(self._days(table), reverse=True):
+            if since is not None and day < since.date():
+                break
+            if upper is not None and day > upper.date():
+                continue
+
+            rows = []
+            for row in self._read_day(table, day):
+                timestamp = datetime.fromisoformat(row[timestamp_field])
+                if since is not None and timestamp < since:
+                    continue
+                if until is not None and timestamp >= until:
+                    continue
+                if before is not None and (timestamp, row["id"]) >= before:
+                    continue
+                row[timestamp_field] = timestamp
+                if predicate is None or predicate(row):
+                    rows.append(row)
+            rows.sort(key=lambda row: (row[timestamp_field], row["id"]), reverse=True)
+            found.extend(rows[:limit - len(found)])
+            if len(found) >= limit:
+                break
+        return found
+
+    def prune(self) -> int:
+        """Delete day directories older than archive_retention_days; returns how many.
+
+        An archive_retention_days of 0 keeps everything.
+        """
+        if not self.enabled or settings.archive_retention_days <= 0:
+            return 0
+        cutoff = datetime.utcnow().date() - timedelta(
+            days=settings.archive_retention_days
+        )
+        removed = 0
+        for table in self._tables():
+            for day in self._days(table):
+                if day < cutoff:
+                    shutil.rmtree(
+                        os.path.join(settings.archive_dir, table, day.isoformat())
+                    )
+                    removed += 1
+        if removed:
+            logger.info(f"Removed {removed} archived days older than {cutoff}")
+        return removed
+
+    def usage(self) -> Dict[str, Dict[str, Any]]:
+        """Per table: days archived, the oldest day and bytes on disk."""
+        tables = {}
+        for table in self._tables():
+            days = sorted(self._days(table))
+            size = 0
+            for day in days:
+                directory = os.path.join(settings.archive_dir, table, day.isoformat())
+                size += sum(
+                    entry.stat().st_size
+                    for entry in os.scandir(directory)
+                    if entry.is_file()
+                )
+            tables[table] = {
+                "days": len(days),
+                "oldest": days[0] if days else None,
+                "bytes": size,
+            }
+        return tables
+
+    def _tables(self) -> List[str]:
+        if not self.enabled or not os.path.isdir(settings.archive_dir):
+            return []
+        return sorted(
+            entry.name for entry in os.scandir(settings.archive_dir) if entry.is_dir()
+        )
+
+    def _days(self, table: str) -> List[date]:
+        directory = os.path.join(settings.archive_dir or "", table)
+        if not self.enabled or not os.path.isdir(directory):
+            return []
+        days = []
+        for entry in os.scandir(directory):
+            try:
+                days.append(date.fromisoformat(entry.name))
+            except ValueError:
+                continue
+        return days
+
+    def _read_day(self, table: str, day: date) -> Iterator[Dict[str, Any]]:
+        directory = os.path.join(settings.archive_dir, table, day.isoformat())
+        decompressor = zstandard.ZstdDecompressor()
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(FILE_SUFFIX):
+                continue
+            with open(os.path.join(directory, name), "rb") as f:
+                with decompressor.stream_reader(f) as reader:
+                    for line in io.BufferedReader(reader):
+                        yield orjson.loads(line)
+
+
+# Global archive service instance
+archive_service = ArchiveService()
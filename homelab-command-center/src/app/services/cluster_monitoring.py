@@ -1,13 +1,23 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
+import asyncio
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc
 from app.database import Node, Pod, Service, ClusterStats
+from app.services.archive import archive_service
 from app.services.kubernetes import k8s_client
+from app.services.quantity import parse_quantity
 
 logger = logging.getLogger(__name__)
 
+# Columns returned by the cluster stats history
+STATS_HISTORY_FIELDS = (
+    "timestamp", "total_nodes", "ready_nodes", "total_pods", "running_pods",
+    "pending_pods", "failed_pods", "total_services", "cpu_usage_percent",
+    "memory_usage_percent", "storage_usage_percent", "custom_metrics"
+)
+
 
 class ClusterMonitoringService:
     """Service for monitoring cluster statistics and metrics."""
@@ -42,11 +52,14 @@ class ClusterMonitoringService:
             cpu_usage_percent = None
             memory_usage_percent = None
             storage_usage_percent = None
+            node_usage = {}
             
             try:
                 node_metrics = await self.k8s_client.get_node_metrics()
                 if node_metrics:
-                    cpu_usage_percent, memory_usage_percent = self._calculate_resource_usage(node_metrics)
+                    cpu_usage_percent, memory_usage_percent, node_usage = (
+                        self._calculate_resource_usage(node_metrics, nodes)
+                    )
             except Exception as e:
                 logger.warning(f"Could not get resource metrics: {e}")
             
@@ -65,7 +78,8 @@ class ClusterMonitoringService:
                 custom_metrics={
                     "node_roles": self._get_node_roles(nodes),
                     "pod_namespaces": self._get_pod_namespaces(pods),
-                    "service_types": self._get_service_types(services)
+                    "service_types": self._get_service_types(services),
+                    "node_usage": node_usage
                 }
             )
             
@@ -100,36 +114,43 @@ class ClusterMonitoringService:
         self, 
         db: AsyncSession, 
         hours: int = 24, 
-        limit: int = 100
+        limit: int = 100,
+        archive: bool = False
     ) -> List[Dict[str, Any]]:
-        """Get historical cluster statistics."""
+        """Get historical cluster statistics, newest first.
+        
+        With `archive`, stats older than the retention window are read from
+        the archive once the database runs out.
+        """
         try:
             since = datetime.utcnow() - timedelta(hours=hours)
             
             result = await db.execute(
                 select(ClusterStats)
                 .where(ClusterStats.timestamp >= since)
-                .order_by(desc(ClusterStats.timestamp))
+                .order_by(desc(ClusterStats.timestamp), desc(ClusterStats.id))
                 .limit(limit)
             )
             
-            stats_records = result.scalars().all()
-            
-            return [
+            stats_records = [
                 {
-                    "timestamp": record.timestamp,
-                    "total_nodes": record.total_nodes,
-                    "ready_nodes": record.ready_nodes,
-                    "total_pods": record.total_pods,
-                    "running_pods": record.running_pods,
-                    "pending_pods": record.pending_pods,
-                    "failed_pods": record.failed_pods,
-                    "total_services": record.total_services,
-                    "cpu_usage_percent": record.cpu_usage_percent,
-                    "memory_usage_percent": record.memory_usage_percent,
-                    "storage_usage_percent": record.storage_usage_percent,
-                    "custom_metrics": record.custom_metrics
+                    "id": record.id,
+                    **{field: getattr(record, field) for field in STATS_HISTORY_FIELDS},
                 }
+                for record in result.scalars().all()
+            ]
+            
+            if archive and len(stats_records) < limit and archive_service.enabled:
+                before = None
+                if stats_records:
+                    before = (stats_records[-1]["timestamp"], stats_records[-1]["id"])
+                stats_records.extend(await asyncio.to_thread(
+                    archive_service.query, "cluster_stats", "timestamp", since, None,
+                    None, before, limit - len(stats_records)
+                ))
+            
+            return [
+                {field: record.get(field) for field in STATS_HISTORY_FIELDS}
                 for record in stats_records
             ]
             
@@ -220,43 +241,71 @@ class ClusterMonitoringService:
             logger.error(f"Error getting current cluster state: {e}")
             return {"error": str(e)}
     
-    def _calculate_resource_usage(self, node_metrics: List[Dict[str, Any]]) -> tuple[Optional[float], Optional[float]]:
-        """Calculate CPU and memory usage percentages from metrics."""
+    def _calculate_resource_usage(
+        self,
+        node_metrics: List[Dict[str, Any]],
+        nodes: List[Dict[str, Any]]
+    ) -> tuple[Optional[float], Optional[float], Dict[str, Dict[str, Optional[float]]]]:
+        """Calculate cluster-wide and per-node CPU/memory usage against allocatable.
+        
+        Node metrics are joined to nodes by name in a single pass; nodes without
+        a metrics sample are excluded from both numerator and denominator.
+        """
         try:
-            total_cpu_usage = 0
-            total_memory_usage = 0
-            total_cpu_capacity = 0
-            total_memory_capacity = 0
+            allocatable = {
+                node["name"]: (
+                    parse_quantity(node.get("cpu_allocatable") or "0"),
+                    parse_quantity(node.get("memory_allocatable") or "0")
+                )
+                for node in nodes
+            }
+            
+            total_cpu_usage = 0.0
+            total_memory_usage = 0.0
+            total_cpu_capacity = 0.0
+            total_memory_capacity = 0.0
+            node_usage = {}
             
             for metric in node_metrics:
+                node_name = metric.get("metadata", {}).get("name")
+                if node_name not in allocatable:
+                    continue
+                
                 usage = metric.get("usage", {})
-                cpu_usage = self._parse_resource_quantity(usage.get("cpu", "0"))
-                memory_usage = self._parse_resource_quantity(usage.get("memory", "0"))
+                cpu_usage = parse_quantity(usage.get("cpu", "0"))
+                memory_usage = parse_quantity(usage.get("memory", "0"))
+                cpu_capacity, memory_capacity = allocatable[node_name]
                 
-                # Get node capacity (this would need to be fetched separately)
-                # For now, we'll use a simplified calculation
                 total_cpu_usage += cpu_usage
                 total_memory_usage += memory_usage
+                total_cpu_capacity += cpu_capacity
+                total_memory_capacity += memory_capacity
+                
+                node_usage[node_name] = {
+                    "cpu_usage_cores": cpu_usage,
+                    "memory_usage_bytes": memory_usage,
+                    "cpu_usage_percent": self._percent(cpu_usage, cpu_capacity),
+                    "memory_usage_percent": self._percent(memory_usage, memory_capacity)
+                }
             
-            # This is a simplified calculation - in reality, you'd need to get
-            # the actual node capacities and calculate percentages properly
-            cpu_percent = (total_cpu_usage / max(total_cpu_capacity, 1)) * 100 if total_cpu_capacity > 0 else None
-            memory_percent = (total_memory_usage / max(total_memory_capacity, 1)) * 100 if total_memory_capacity > 0 else None
+            cpu_percent = self._percent(total_cpu_usage, total_cpu_capacity)
+            memory_percent = self._percent(total_memory_usage, total_memory_capacity)
             
-            return cpu_percent, memory_percent
+            return cpu_percent, memory_percent, node_usage
             
         except Exception as e:
             logger.warning(f"Error calculating resource usage: {e}")
-            return None, None
+            return None, None, {}
+    
+    def _percent(self, used: float, capacity: float) -> Optional[float]:
+        """Return used/capacity as a rounded percentage, or None without capacity."""
+        if capacity <= 0:
+            return None
+        return round(used / capacity * 100, 2)
     
     def _parse_resource_quantity(self, quantity: str) -> float:
         """Parse Kubernetes resource quantity string to float."""
-        try:
-            # Remove common suffixes and convert to float
-            quantity = quantity.replace("m", "").replace("Mi", "").replace("Gi", "").replace("Ki", "")
-            return float(quantity)
-        except (ValueError, AttributeError):
-            return 0.0
+        return parse_quantity(quantity)
     
     def _get_node_roles(self, nodes: List[Dict[str, Any]]) -> Dict[str, int]:
         """Get count of nodes by role."""
@@ -0,0 +1,79 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+from app.config import settings
+from app.services.kubernetes import KubernetesClient, k8s_client
+
+logger = logging.getLogger(__name__)
+
+# Cluster query value that fans out to every configured cluster
+ALL_CLUSTERS = "*"
+
+
+class ClusterRegistry:
+    """Registry of per-cluster Kubernetes clients configured in Settings."""
+
+    def __init__(self):
+        clusters = settings.kube_clusters or {settings.default_cluster: None}
+        self._clients: Dict[str, KubernetesClient] = {}
+        for name, context in clusters.items():
+            if name == settings.default_cluster:
+                self._clients[name] = k8s_client
+            else:
+                self._clients[name] = KubernetesClient(context)
+        if settings.default_cluster not in self._clients:
+            self._clients[settings.default_cluster] = k8s_client
+
+    def names(self) -> List[str]:
+        """Get configured cluster names."""
+        return list(self._clients)
+
+    def get(self, name: Optional[str] = None) -> KubernetesClient:
+        """Get the client for a cluster, or the default cluster when name is None."""
+        return self._clients[name or settings.default_cluster]
+
+    async def fan_out(
+        self,
+        fetch: Callable[[KubernetesClient], Awaitable[Any]],
+        timeout: Optional[float] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Run `fetch` against every cluster concurrently.
+        
+        Returns (results by cluster, errors by cluster). Clusters that haven't
+        answered by the deadline are reported as timed out instead of delaying
+        the others.
+        """
+        timeout = settings.cluster_fanout_timeout if timeout is None else timeout
+        tasks = {
+            name: asyncio.create_task(fetch(client))
+            for name, client in self._clients.items()
+        }
+        await asyncio.wait(tasks.values(), timeout=timeout)
+
+        results: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        for name, task in tasks.items():
+            if not task.done():
+                task.cancel()
+                errors[name] = f"timed out after {timeout}s"
+            elif task.exception() is not None:
+                errors[name] = str(task.exception())
+            else:
+                results[name] = task.result()
+
+        for name, error in errors.items():
+            logger.warning(f"Cluster {name} fan-out failed: {error}")
+        return results, errors
+
+    def upstream_state(self) -> Dict[str, Dict[str, Any]]:
+        """Rate limiter and circuit breaker state by cluster."""
+        return {name: client.upstream_state() for name, client in self._clients.items()}
+
+    def close(self):
+        """Close every cluster client."""
+        for client in self._clients.values():
+            client.close()
+
+
+# Global cluster registry instance
+cluster_registry = ClusterRegistry()
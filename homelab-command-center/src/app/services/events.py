@@ -0,0 +1,411 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import asyncio
+import logging
+import threading
+from redis.exceptions import LockError, RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, case, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from app.config import settings
+from app.database import Event, async_session
+from app.services.health_history import MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from app.services.kubernetes import k8s_client
+
+logger = logging.getLogger(__name__)
+
+LEADER_KEY = "events:watcher"
+ROW_FIELDS = (
+    "namespace",
+    "kind",
+    "name",
+    "reason",
+    "type",
+    "message",
+    "source",
+    "count",
+    "first_seen",
+    "last_seen",
+)
+
+
+def event_key(
+    kind: str, namespace: Optional[str], name: str, reason: Optional[str]
+) -> str:
+    """Unique key of an events row: one per involved object and reason."""
+    return f"{kind}/{namespace or ''}/{name}/{reason or ''}"
+
+
+class EventsService:
+    """Service ingesting Kubernetes Events into the events table.
+
+    Events from KubernetesClient.watch_events are merged in memory by
+    involved object and reason and upserted in batches every
+    events_flush_interval, so a storm of repeats costs one row write per key
+    per flush. Live events add the occurrences since the Event object was
+    last seen (its count delta, tracked for the events_max_tracked most
+    recent objects); events from a relist that aren't tracked may already be
+    stored, so they only raise a row's count, never add to it.
+
+    Memory is bounded: at most events_max_pending keys wait for a flush.
+    When the buffer is full the watch blocks for up to one flush interval,
+    then new keys are dropped (and counted) while repeats of buffered keys
+    still merge. Counts assume one writer, so only the replica holding the
+    watcher lock in Redis watches.
+    """
+
+    def __init__(self):
+        self.k8s_client = k8s_client
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._live: Dict[str, Dict[str, Any]] = {}
+        self._replayed: Dict[str, Dict[str, Any]] = {}
+        # Event uid -> last count seen
+        self._counts: "OrderedDict[str, int]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_requested: Optional[asyncio.Event] = None
+        self.leader = False
+        self.stats = {
+            "received": 0,
+            "merged": 0,
+            "dropped": 0,
+            "written": 0,
+            "flushes": 0,
+            "last_flush": None,
+            "last_error": None,
+        }
+
+    @property
+    def pending(self) -> int:
+        return len(self._live) + len(self._replayed)
+
+    def add(self, change: str, event: Dict[str, Any]):
+        """Merge one watched event into the pending batch, from the watch thread."""
+        uid = event["uid"]
+        with self._lock:
+            self.stats["received"] += 1
+            previous = self._counts.pop(uid, None)
+            if change == "DELETED":
+                # Expired from the apiserver. A tracked event's count is already
+                # merged; an untracked one's final count is merged like a relist.
+                if previous is None:
+                    replayed = {**event, "key": self._key(event)}
+                    self._merge(self._replayed, replayed, replay=True)
+                return
+
+            self._counts[uid] = max(event["count"], previous or 0)
+            while len(self._counts) > settings.events_max_tracked:
+                self._counts.popitem(last=False)
+
+            if previous is not None:
+                occurrences = event["count"] - previous
+                if occurrences <= 0:
+                    return  # relisted or updated without a new occurrence
+            elif change == "LISTED":
+                replayed = {**event, "key": self._key(event)}
+                self._merge(self._replayed, replayed, replay=True)
+                return
+            else:
+                occurrences = event["count"] if change == "ADDED" else 1
+            live = {**event, "key": self._key(event), "count": occurrences}
+            self._merge(self._live, live, replay=False)
+
+    def _key(self, event: Dict[str, Any]) -> str:
+        return event_key(
+            event["kind"], event["namespace"], event["name"], event["reason"]
+        )
+
+    def _merge(
+        self,
+        pending: Dict[str, Dict[str, Any]],
+        event: Dict[str, Any],
+        replay: bool,
+        wait: bool = True,
+    ) -> bool:
+        """Fold an event into `pending` under the lock; returns False if dropped."""
+        row = pending.get(event["key"])
+        if row is None:
+            while self.pending >= settings.events_max_pending:
+                if not wait:
+                    self.stats["dropped"] += 1
+                    return False
+                self._request_flush()
+                wait = False
+                self._not_full.wait(settings.events_flush_interval)
+            pending[event["key"]] = {
+                "event_key": event["key"],
+                **{field: event[field] for field in ROW_FIELDS},
+            }
+            if self.pending >= settings.events_batch_size:
+                self._request_flush()
+            return True
+
+        self.stats["merged"] += 1
+        if replay:
+            row["count"] = max(row["count"], event["count"])
+        else:
+            row["count"] += event["count"]
+        if event["first_seen"] < row["first_seen"]:
+            row["first_seen"] = event["first_seen"]
+        if event["last_seen"] >= row["last_seen"]:
+            row.update(
+                last_seen=event["last_seen"],
+                message=event["message"],
+                type=event["type"],
+                source=event["source"],
+            )
+        return True
+
+    def _request_flush(self):
+        if self._loop is not None and self._flush_requested is not None:
+            self._loop.call_soon_threadsafe(self._flush_requested.set)
+
+    async def flush(self) -> int:
+        """Write the pending batch; returns the rows upserted.
+
+        If the write fails, the batch is merged back into the buffer (as far as
+        it fits) for the next flush.
+        """
+        with self._lock:
+            live, replayed = self._live, self._replayed
+            self._live, self._replayed = {}, {}
+            self._not_full.notify_all()
+        if not live and not replayed:
+            return 0
+
+        try:
+            async with async_session() as db:
+                # Replayed counts are absolute as of the list; live ones came
+                # after it
+                await self.store(db, list(replayed.values()), replay=True)
+                await self.store(db, list(live.values()), replay=False)
+                await db.commit()
+        except Exception as e:
+            logger.error(
+                f"Failed to write {len(live) + len(replayed)} events, "
+                f"retrying next flush: {e}"
+            )
+            with self._lock:
+                self.stats["last_error"] = str(e)
+                batches = ((self._live, live, False), (self._replayed, replayed, True))
+                for pending, rows, replay in batches:
+                    for key, row in rows.items():
+                        self._merge(pending, {**row, "key": key}, replay, wait=False)
+            return 0
+
+        written = len(live) + len(replayed)
+        with self._lock:
+            self.stats["written"] += written
+            self.stats["flushes"] += 1
+            self.stats["last_flush"] = datetime.utcnow()
+        return written
+
+    async def store(
+        self, db: AsyncSession, rows: List[Dict[str, Any]], replay: bool = False
+    ):
+        """Upsert merged events in chunks of events_batch_size (the caller commits).
+
+        Live rows add their count; replayed rows only raise it, and only
+        touch a row when they carry a newer occurrence.
+        """
+        dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+        for start in range(0, len(rows), settings.events_batch_size):
+            batch = rows[start:start + settings.events_batch_size]
+            statement = dialect.insert(Event).values(batch)
+            excluded = statement.excluded
+            newer = excluded.last_seen >= Event.last_seen
+            earlier = excluded.first_seen < Event.first_seen
+            count = (
+                case((excluded.count > Event.count, excluded.count), else_=Event.count)
+                if replay else Event.count + excluded.count
+            )
+            await db.execute(statement.on_conflict_do_update(
+                index_elements=[Event.event_key],
+                set_={
+                    "count": count,
+                    "first_seen": case(
+                        (earlier, excluded.first_seen), else_=Event.first_seen
+                    ),
+                    "last_seen": case(
+                        (newer, excluded.last_seen), else_=Event.last_seen
+                    ),
+                    "message": case((newer, excluded.message), else_=Event.message),
+                    "type": case((newer, excluded.type), else_=Event.type),
+                    "source": case((newer, excluded.source), else_=Event.source),
+                },
+                where=(excluded.last_seen > Event.last_seen) if replay else None
+            ))
+
+    async def run_flusher(self):
+        """Flush every events_flush_interval, or sooner once a full batch is pending."""
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(), settings.events_flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    async def run(self):
+        """Watch events while this process holds the watcher lock, until cancelled."""
+        from app.services.redis import get_redis
+
+        await asyncio.to_thread(self.k8s_client.initialize)
+        if not self.k8s_client.v1:
+            logger.warning("Kubernetes client not available, not ingesting events")
+            return
+        self._loop = asyncio.get_running_loop()
+        self._flush_requested = asyncio.Event()
+        ttl = settings.events_leader_ttl
+        while True:
+            try:
+                client = await get_redis()
+                lock = client.lock(
+                    LEADER_KEY, timeout=ttl, blocking=False, thread_local=False
+                )
+                if await lock.acquire():
+                    await self._lead(lock)
+            except (LockError, RedisError) as e:
+                logger.warning(f"Event watcher lock unavailable: {e}")
+            except Exception as e:
+                logger.error(f"Event watcher failed: {e}")
+            await asyncio.sleep(ttl / 2)
+
+    async def _lead(self, lock):
+        """Run the watch thread and flusher while renewing the watcher lock."""
+        logger.info("Watching Kubernetes events")
+        self.leader = True
+        stopped = threading.Event()
+        # A daemon thread rather than to_thread: a watch blocked on a quiet
+        # stream must not hold up shutdown
+        watcher = threading.Thread(
+            target=self.k8s_client.watch_events,
+            args=(self.add, stopped, self._loop),
+            name="event-watch",
+            daemon=True
+        )
+        watcher.start()
+        flusher = asyncio.create_task(self.run_flusher())
+        try:
+            while watcher.is_alive():
+                await asyncio.sleep(settings.events_leader_ttl / 3)
+                await lock.reacquire()
+        finally:
+            stopped.set()
+            flusher.cancel()
+            try:
+                await flusher
+            except asyncio.CancelledError:
+                pass
+            await self.flush()
+            self.leader = False
+            with self._lock:
+                # The next leader's relist must not count as new occurrences
+                self._counts.clear()
+            try:
+                await lock.release()
+            except (LockError, RedisError):
+                pass
+
+    def start(self):
+        """Start the watcher on the running event loop."""
+        if settings.events_enabled and self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop watching, writing what is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        """Pipeline state, for monitoring."""
+        with self._lock:
+            return {
+                "enabled": settings.events_enabled,
+                "leader": self.leader,
+                "pending": self.pending,
+                "tracked": len(self._counts),
+                **self.stats,
+            }
+
+    async def get_events(
+        self,
+        db: AsyncSession,
+        namespace: Optional[str] = None,
+        kind: Optional[str] = None,
+        name: Optional[str] = None,
+        reason: Optional[str] = None,
+        event_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get events by most recent occurrence, keyset-paginated on (last_seen, id)."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = select(Event)
+
+        if namespace:
+            query = query.where(Event.namespace == namespace)
+        if kind:
+            query = query.where(Event.kind == kind)
+        if name:
+            query = query.where(Event.name == name)
+        if reason:
+            query = query.where(Event.reason == reason)
+        if event_type:
+            query = query.where(Event.type == event_type)
+        if since:
+            query = query.where(Event.last_seen >= since)
+        if until:
+            query = query.where(Event.last_seen < until)
+        if cursor:
+            last_seen, event_id = decode_cursor(cursor)
+            query = query.where(
+                tuple_(Event.last_seen, Event.id) < tuple_(last_seen, event_id)
+            )
+
+        query = query.order_by(Event.last_seen.desc(), Event.id.desc()).limit(limit + 1)
+        rows = (await db.execute(query)).scalars().all()
+        items = [self._serialize(row) for row in rows]
+
+        page = items[:limit]
+        next_cursor = None
+        if len(items) > limit:
+            next_cursor = encode_cursor(page[-1]["last_seen"], page[-1]["id"])
+
+        return {
+            "items": page,
+            "count": len(page),
+            "limit": limit,
+            "next_cursor": next_cursor,
+        }
+
+    def _serialize(self, event: Event) -> Dict[str, Any]:
+        """Convert an Event row to a response dict."""
+        return {
+            "id": event.id,
+            "namespace": event.namespace,
+            "kind": event.kind,
+            "name": event.name,
+            "reason": event.reason,
+            "type": event.type,
+            "message": event.message,
+            "source": event.source,
+            "count": event.count,
+            "first_seen": event.first_seen,
+            "last_seen": event.last_seen,
+        }
+
+
+# Global events service instance
+events_service = EventsService()
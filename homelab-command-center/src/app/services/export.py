@@ -0,0 +1,103 @@
+from typing import (
+    Any,
+    AsyncIterator,
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
+from datetime import datetime
+import asyncio
+import logging
+import msgpack
+from app.config import settings
+from app.responses import packb
+from app.services.clusters import cluster_registry, ALL_CLUSTERS
+from app.services.kubernetes import KubernetesClient
+
+logger = logging.getLogger(__name__)
+
+EXPORT_KINDS = ("nodes", "pods", "services")
+EXPORT_FORMAT = "homelab-snapshot"
+EXPORT_VERSION = 1
+
+
+def to_columns(items: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Pivot a list of resource dicts into column arrays (missing keys become None)."""
+    fields: Dict[str, None] = {}
+    for item in items:
+        for field in item:
+            fields.setdefault(field, None)
+    return {field: [item.get(field) for item in items] for field in fields}
+
+
+async def _fetch_kind(k8s_client: KubernetesClient, kind: str) -> List[Dict[str, Any]]:
+    if kind == "nodes":
+        return await k8s_client.get_nodes()
+    if kind == "pods":
+        return await k8s_client.get_pods()
+    return await k8s_client.get_services()
+
+
+async def export_cluster_state(
+    cluster: Optional[str] = None,
+    kinds: Sequence[str] = EXPORT_KINDS,
+    batch_size: int = 5000
+) -> AsyncIterator[bytes]:
+    """Stream cluster state as a sequence of MessagePack frames.
+    
+    The stream is a header frame, then one columnar batch frame per
+    `batch_size` resources of each kind, then a trailer with counts:
+    
+        {"format": "homelab-snapshot", "version": 1, "generated_at": ...,
+         "kinds": [...]}
+        {"cluster": ..., "kind": "pods", "offset": 0, "count": n,
+         "columns": {"name": [...], ...}}
+        {"end": true, "counts": {"<cluster>/pods": n, ...}, "errors": {...}}
+    """
+    names = cluster_registry.names() if cluster == ALL_CLUSTERS else [cluster or None]
+    yield packb({
+        "format": EXPORT_FORMAT,
+        "version": EXPORT_VERSION,
+        "generated_at": datetime.utcnow().isoformat(),
+        "kinds": list(kinds),
+    })
+
+    counts: Dict[str, int] = {}
+    errors: Dict[str, str] = {}
+    for name in names:
+        k8s_client = cluster_registry.get(name)
+        cluster_name = name or settings.default_cluster
+        try:
+            results = await asyncio.gather(
+                *(_fetch_kind(k8s_client, kind) for kind in kinds)
+            )
+        except Exception as e:
+            logger.error(f"Export failed for cluster {cluster_name}: {e}")
+            errors[cluster_name] = str(e)
+            continue
+
+        for kind, items in zip(kinds, results):
+            counts[f"{cluster_name}/{kind}"] = len(items)
+            for offset in range(0, len(items), batch_size):
+                batch = items[offset:offset + batch_size]
+                yield packb({
+                    "cluster": cluster_name,
+                    "kind": kind,
+                    "offset": offset,
+                    "count": len(batch),
+                    "columns": to_columns(batch),
+                })
+
+    yield packb({"end": True, "counts": counts, "errors": errors})
+
+
+def iter_export_frames(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Read the frames of an export stream.
+
+    Batch frames load directly with pandas.DataFrame(frame["columns"]).
+    """
+    for frame in msgpack.Unpacker(stream, raw=False):
+        yield frame
@@ -1,13 +1,114 @@
-from typing import List, Dict, Any, Optional
+from collections import Counter
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from datetime import datetime
+import heapq
 import logging
+import math
+import zlib
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
+from app.config import settings
 from app.database import Node, Pod, Service, HealthCheck
+from app.services.health_status import STATUSES, health_status_service
 from app.services.kubernetes import k8s_client
+from app.services.label_index import label_index_service
+from app.services.prober import ProbeTarget, prober_service
 
 logger = logging.getLogger(__name__)
 
+# Shard key for cluster-scoped checks: nodes and configured probe targets
+CLUSTER_SCOPE = ""
+
+# Keys of a pass's check lists -> their resource_type
+CHECK_TYPES = {"nodes": "node", "pods": "pod", "services": "service", "probes": "probe"}
+
+# Fields the checks read, per resource list; shards carry only these
+SHARD_FIELDS = {
+    "nodes": ("name", "conditions"),
+    "pods": ("name", "namespace", "node_name", "phase", "ready", "restart_count"),
+    "services": ("name", "namespace", "type", "cluster_ip", "ports", "selector"),
+}
+
+
+def shard_bucket(name: str, buckets: int) -> int:
+    """Stable hash bucket of a resource name, the same in every worker process."""
+    return zlib.crc32(name.encode()) % buckets
+
+
+def plan_shards(
+    weights: Dict[str, int], shard_size: int, max_shards: int
+) -> List[Dict[str, List]]:
+    """Split a health check pass into shards of roughly equal work.
+    
+    `weights` counts checks per namespace (CLUSTER_SCOPE for cluster-scoped
+    ones). There are total / shard_size shards, up to max_shards. Namespaces
+    heavier than a shard's share are split into hash buckets of resource
+    names, then the pieces are packed heaviest first onto the lightest shard.
+    A shard maps namespace -> [buckets, [bucket, ...]].
+    """
+    total = sum(weights.values())
+    count = max(1, min(max_shards, math.ceil(total / max(1, shard_size))))
+    share = max(1.0, total / count)
+    pieces = []
+    for namespace, weight in weights.items():
+        buckets = math.ceil(weight / share)
+        pieces.extend(
+            (weight / buckets, namespace, bucket, buckets) for bucket in range(buckets)
+        )
+    
+    shards = [{} for _ in range(count)]
+    loads = [(0.0, index) for index in range(count)]
+    pieces.sort(key=lambda piece: (-piece[0], piece[1], piece[2]))
+    for weight, namespace, bucket, buckets in pieces:
+        load, index = heapq.heappop(loads)
+        shards[index].setdefault(namespace, [buckets, []])[1].append(bucket)
+        heapq.heappush(loads, (load + weight, index))
+    return [shard for shard in shards if shard]
+
+
+def _shard_filter(shard: Dict[str, List]) -> Callable[[Optional[str], str], bool]:
+    """Predicate telling whether a (namespace, name) belongs to a shard."""
+    parts = {
+        namespace: (buckets, set(selected))
+        for namespace, (buckets, selected) in shard.items()
+    }
+    
+    def selected(namespace: Optional[str], name: str) -> bool:
+        part = parts.get(namespace or CLUSTER_SCOPE)
+        return part is not None and (
+            part[0] == 1 or shard_bucket(name, part[0]) in part[1]
+        )
+    return selected
+
+
+def _shard_slice(
+    resources: List[Dict[str, Any]],
+    selected: Callable[[Optional[str], str], bool],
+    fields: Tuple[str, ...]
+) -> List[Dict[str, Any]]:
+    """The resources a shard selects, projected to `fields`."""
+    return [
+        {field: resource[field] for field in fields if field in resource}
+        for resource in resources
+        if selected(resource.get("namespace"), resource["name"])
+    ]
+
+
+def _status_counts(checks: List[Dict[str, Any]]) -> Dict[str, int]:
+    counts = {status: 0 for status in STATUSES}
+    for check in checks:
+        if check["status"] in counts:
+            counts[check["status"]] += 1
+    return counts
+
+
+def _overall_status(counts: Dict[str, int]) -> str:
+    if counts["unhealthy"] > 0:
+        return "unhealthy"
+    if counts["warning"] > 0:
+        return "warning"
+    return "healthy"
+
 
 class HealthCheckService:
     """Service for performing health checks on Kubernetes resources."""
@@ -154,8 +255,17 @@ class HealthCheckService:
                 "checked_at": datetime.utcnow()
             }
     
-    async def check_service_health(self, db: AsyncSession, service_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Check health of a Kubernetes service."""
+    async def check_service_health(
+        self,
+        db: AsyncSession,
+        service_data: Dict[str, Any],
+        endpoints: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """Check health of a Kubernetes service.
+        
+        With `endpoints` ({"ready": n, "not_ready": m} for the pods its
+        selector matches), a service without ready backends is reported too.
+        """
         service_name = service_data["name"]
         namespace = service_data["namespace"]
         status = "healthy"
@@ -179,6 +289,26 @@ class HealthCheckService:
                 message = f"Service {service_name} has no ports defined"
                 details["ports"] = ports
             
+            # Check backing pods for services with a selector
+            if endpoints is not None and service_data.get("selector"):
+                ready, not_ready = endpoints["ready"], endpoints["not_ready"]
+                details["endpoints"] = endpoints
+                if ready == 0 and not_ready > 0:
+                    status = "unhealthy"
+                    message = (
+                        f"Service {service_name} has no ready endpoints "
+                        f"({not_ready} not ready)"
+                    )
+                elif ready == 0:
+                    status = "warning" if status == "healthy" else status
+                    message = f"Service {service_name} selects no pods"
+                elif not_ready > 0:
+                    status = "warning" if status == "healthy" else status
+                    message = (
+                        f"Service {service_name} has {not_ready} of "
+                        f"{ready + not_ready} endpoints not ready"
+                    )
+            
             # Store health check result
             await self._store_health_check(
                 db, "service", service_name, namespace, status, message, details
@@ -213,61 +343,172 @@ class HealthCheckService:
                 "checked_at": datetime.utcnow()
             }
     
+    async def check_probe_health(
+        self, db: AsyncSession, probe_result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Record an active probe result (see ProberService) as a health check."""
+        url = probe_result["url"]
+        status = probe_result["status"]
+        if probe_result["error"]:
+            message = f"Probe of {url} failed: {probe_result['error']}"
+        elif probe_result["status_code"] is not None:
+            message = (
+                f"{url} responded {probe_result['status_code']} "
+                f"in {probe_result['latency_ms']:.0f}ms"
+            )
+        else:
+            message = (
+                f"{url} accepted a connection in {probe_result['latency_ms']:.0f}ms"
+            )
+        details = {
+            key: probe_result.get(key)
+            for key in ("kind", "name", "status_code", "latency_ms", "error", "latency")
+        }
+        
+        await self._store_health_check(
+            db, "probe", url, probe_result["namespace"], status, message, details
+        )
+        
+        return {
+            "resource_type": "probe",
+            "resource_name": url,
+            "namespace": probe_result["namespace"],
+            "status": status,
+            "message": message,
+            "details": details,
+            "checked_at": datetime.utcnow()
+        }
+    
+    async def _list_resources(
+        self,
+    ) -> Tuple[
+        List[Dict[str, Any]],
+        List[Dict[str, Any]],
+        List[Dict[str, Any]],
+        List[ProbeTarget],
+    ]:
+        """Get all nodes, pods and services, and the probe targets they give."""
+        nodes = await self.k8s_client.get_nodes()
+        pods = await self.k8s_client.get_pods()
+        services = await self.k8s_client.get_services()
+        targets = []
+        if settings.probe_enabled:
+            ingresses = []
+            if settings.probe_ingresses:
+                ingresses = await self.k8s_client.get_ingresses()
+            targets = prober_service.build_targets(services, ingresses)
+        return nodes, pods, services, targets
+    
+    def _service_endpoints(
+        self,
+        pods: List[Dict[str, Any]],
+        services: List[Dict[str, Any]]
+    ) -> Dict[Tuple[str, str], Dict[str, int]]:
+        """Count ready and not ready backing pods of each service.
+
+        Pods are joined to services through the pod label index.
+        """
+        pod_index, pods_by_id = label_index_service.sync(self.k8s_client, "pods", pods)
+        endpoints = {}
+        matches = label_index_service.match_services(pod_index, pods_by_id, services)
+        for key, backends in matches.items():
+            ready = sum(
+                1
+                for pod in backends
+                if pod.get("ready") and pod.get("phase") == "Running"
+            )
+            endpoints[key] = {"ready": ready, "not_ready": len(backends) - ready}
+        return endpoints
+    
+    async def _check_resources(
+        self,
+        db: AsyncSession,
+        nodes: List[Dict[str, Any]],
+        pods: List[Dict[str, Any]],
+        services: List[Dict[str, Any]],
+        targets: List[ProbeTarget],
+        endpoints: Dict[Tuple[str, str], Dict[str, int]],
+        prune_probes: bool = True
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Check the listed resources, with `endpoints` from _service_endpoints."""
+        # Perform health checks
+        node_health = []
+        pod_health = []
+        service_health = []
+        
+        # Check nodes
+        for node_data in nodes:
+            health_result = await self.check_node_health(db, node_data)
+            node_health.append(health_result)
+        
+        # Check pods
+        for pod_data in pods:
+            health_result = await self.check_pod_health(db, pod_data)
+            pod_health.append(health_result)
+        
+        # Check services
+        for service_data in services:
+            health_result = await self.check_service_health(
+                db,
+                service_data,
+                endpoints[(service_data["namespace"], service_data["name"])],
+            )
+            service_health.append(health_result)
+        
+        # Actively probe services, ingresses and configured URLs. A shard only
+        # sees some targets, so it keeps the latency history of the others.
+        probe_health = []
+        for probe_result in await prober_service.probe_all(targets, prune=prune_probes):
+            probe_health.append(await self.check_probe_health(db, probe_result))
+        
+        return {
+            "nodes": node_health,
+            "pods": pod_health,
+            "services": service_health,
+            "probes": probe_health,
+        }
+    
     async def perform_cluster_health_check(self, db: AsyncSession) -> Dict[str, Any]:
         """Perform comprehensive health check on the entire cluster."""
         logger.info("Starting cluster health check")
+        started_at = datetime.utcnow()
         
         try:
             # Get all resources from Kubernetes
-            nodes = await self.k8s_client.get_nodes()
-            pods = await self.k8s_client.get_pods()
-            services = await self.k8s_client.get_services()
-            
-            # Perform health checks
-            node_health = []
-            pod_health = []
-            service_health = []
-            
-            # Check nodes
-            for node_data in nodes:
-                health_result = await self.check_node_health(db, node_data)
-                node_health.append(health_result)
-            
-            # Check pods
-            for pod_data in pods:
-                health_result = await self.check_pod_health(db, pod_data)
-                pod_health.append(health_result)
+            nodes, pods, services, targets = await self._list_resources()
+            endpoints = self._service_endpoints(pods, services)
+            checks = await self._check_resources(
+                db, nodes, pods, services, targets, endpoints
+            )
             
-            # Check services
-            for service_data in services:
-                health_result = await self.check_service_health(db, service_data)
-                service_health.append(health_result)
+            # Forget resources this pass didn't see. An empty list usually means
+            # the API call failed, so it never prunes a whole resource type.
+            for resource_type, resources in (
+                ("node", nodes),
+                ("pod", pods),
+                ("service", services),
+                ("probe", checks["probes"]),
+            ):
+                if resources:
+                    await health_status_service.prune(db, resource_type, started_at)
             
             # Calculate overall cluster health
-            all_checks = node_health + pod_health + service_health
-            unhealthy_count = sum(1 for check in all_checks if check["status"] == "unhealthy")
-            warning_count = sum(1 for check in all_checks if check["status"] == "warning")
-            healthy_count = sum(1 for check in all_checks if check["status"] == "healthy")
-            
-            overall_status = "healthy"
-            if unhealthy_count > 0:
-                overall_status = "unhealthy"
-            elif warning_count > 0:
-                overall_status = "warning"
+            all_checks = (
+                checks["nodes"] + checks["pods"] + checks["services"] + checks["probes"]
+            )
+            counts = _status_counts(all_checks)
             
             cluster_health = {
-                "overall_status": overall_status,
+                "overall_status": _overall_status(counts),
                 "total_checks": len(all_checks),
-                "healthy": healthy_count,
-                "warning": warning_count,
-                "unhealthy": unhealthy_count,
-                "nodes": node_health,
-                "pods": pod_health,
-                "services": service_health,
+                **counts,
+                **checks,
                 "checked_at": datetime.utcnow()
             }
             
-            logger.info(f"Cluster health check completed: {overall_status}")
+            logger.info(
+                f"Cluster health check completed: {cluster_health['overall_status']}"
+            )
             return cluster_health
             
         except Exception as e:
@@ -278,6 +519,126 @@ class HealthCheckService:
                 "checked_at": datetime.utcnow()
             }
     
+    async def plan_cluster_shards(self) -> List[Dict[str, Any]]:
+        """Split the next health check pass into shards of the current resource lists.
+        
+        The cluster is listed and service endpoints resolved once, here; each
+        shard carries its own nodes, pods, services (with their endpoint
+        counts) and probe targets, so checking it makes no API calls. Shards
+        travel through the broker as task arguments, so resources are cut down
+        to the SHARD_FIELDS the checks read.
+        """
+        nodes, pods, services, targets = await self._list_resources()
+        endpoints = self._service_endpoints(pods, services)
+        weights = Counter()
+        weights[CLUSTER_SCOPE] += len(nodes)
+        for resource in pods + services:
+            weights[resource["namespace"]] += 1
+        for target in targets:
+            weights[target.namespace or CLUSTER_SCOPE] += 1
+        
+        shards = []
+        plans = plan_shards(
+            weights, settings.health_shard_size, settings.health_max_shards
+        )
+        for plan in plans:
+            selected = _shard_filter(plan)
+            shard_services = _shard_slice(services, selected, SHARD_FIELDS["services"])
+            shards.append({
+                "namespaces": sorted(plan),
+                "nodes": _shard_slice(nodes, selected, SHARD_FIELDS["nodes"]),
+                "pods": _shard_slice(pods, selected, SHARD_FIELDS["pods"]),
+                "services": shard_services,
+                # Aligned with services: task arguments can't have tuple keys
+                "endpoints": [
+                    endpoints[(service["namespace"], service["name"])]
+                    for service in shard_services
+                ],
+                "targets": [
+                    list(target)
+                    for target in targets
+                    if selected(target.namespace, target.url)
+                ],
+            })
+        return shards
+    
+    async def check_shard(
+        self, db: AsyncSession, shard: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Check one shard (see plan_cluster_shards) and return its status counts."""
+        try:
+            services = shard["services"]
+            endpoints = {
+                (service["namespace"], service["name"]): service_endpoints
+                for service, service_endpoints in zip(services, shard["endpoints"])
+            }
+            targets = [ProbeTarget(*target) for target in shard["targets"]]
+            checks = await self._check_resources(
+                db,
+                shard["nodes"],
+                shard["pods"],
+                services,
+                targets,
+                endpoints,
+                prune_probes=False,
+            )
+            all_checks = (
+                checks["nodes"] + checks["pods"] + checks["services"] + checks["probes"]
+            )
+            return {
+                "checked": {
+                    resource_type: len(checks[key])
+                    for key, resource_type in CHECK_TYPES.items()
+                },
+                **_status_counts(all_checks),
+            }
+        except Exception as e:
+            logger.error(f"Error checking health shard {shard['namespaces']}: {e}")
+            return {"error": str(e)}
+    
+    async def combine_shards(
+        self,
+        db: AsyncSession,
+        summaries: List[Dict[str, Any]],
+        started_at: datetime
+    ) -> Dict[str, Any]:
+        """Combine the shard results (see check_shard) of a pass into cluster health.
+
+        `started_at` is when the pass was planned.
+        """
+        failed = [summary["error"] for summary in summaries if summary.get("error")]
+        checked = Counter()
+        counts = Counter()
+        for summary in summaries:
+            checked.update(summary.get("checked", {}))
+            counts.update({status: summary.get(status, 0) for status in STATUSES})
+        
+        # A failed shard didn't see its resources, so nothing can be pruned safely
+        if not failed:
+            for resource_type, count in checked.items():
+                if count:
+                    await health_status_service.prune(db, resource_type, started_at)
+        
+        cluster_health = {
+            "overall_status": "unhealthy" if failed else _overall_status(counts),
+            "total_checks": sum(checked.values()),
+            **{status: counts[status] for status in STATUSES},
+            "checked": dict(checked),
+            "shards": len(summaries),
+            "checked_at": datetime.utcnow()
+        }
+        if failed:
+            cluster_health["error"] = (
+                f"{len(failed)} of {len(summaries)} shards failed: {failed[0]}"
+            )
+        
+        elapsed = (datetime.utcnow() - started_at).total_seconds()
+        logger.info(
+            f"Cluster health check completed: {cluster_health['overall_status']} "
+            f"({len(summaries)} shards, {elapsed:.1f}s)"
+        )
+        return cluster_health
+    
     async def _store_health_check(
         self, 
         db: AsyncSession, 
@@ -288,17 +649,29 @@ class HealthCheckService:
         message: str, 
         details: Dict[str, Any]
     ):
-        """Store health check result in database."""
+        """Store a health check result and update the resource's current status."""
         try:
+            checked_at = datetime.utcnow()
             health_check = HealthCheck(
                 resource_type=resource_type,
                 resource_name=resource_name,
                 namespace=namespace,
                 status=status,
                 message=message,
-                details=details
+                details=details,
+                checked_at=checked_at
             )
             db.add(health_check)
+            await health_status_service.upsert(
+                db,
+                resource_type,
+                resource_name,
+                namespace,
+                status,
+                message,
+                details,
+                checked_at,
+            )
             await db.commit()
         except Exception as e:
             logger.error(f"Error storing health check: {e}")
@@ -0,0 +1,137 @@
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime
+import asyncio
+import base64
+import json
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import literal_column, select, tuple_
+from app.database import HealthCheck
+from app.services.archive import archive_service
+
+logger = logging.getLogger(__name__)
+
+HEALTHY = "healthy"
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(checked_at: datetime, check_id: int) -> str:
+    """Encode the (checked_at, id) position of the last row on a page."""
+    raw = json.dumps([checked_at.isoformat(), check_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor from encode_cursor, raising ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        checked_at, check_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(checked_at), int(check_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class HealthHistoryService:
+    """Service for paging through stored health check results."""
+
+    async def get_history(
+        self,
+        db: AsyncSession,
+        resource_type: Optional[str] = None,
+        resource_name: Optional[str] = None,
+        namespace: Optional[str] = None,
+        status: Optional[str] = None,
+        not_healthy: bool = False,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        archive: bool = False
+    ) -> Dict[str, Any]:
+        """Get health checks newest first, one page at a time.
+
+        Pages are keyset-paginated on (checked_at, id): the cursor marks the
+        last row returned, so each page is an index range scan whose cost
+        doesn't grow with how far back the client has paged. With `archive`,
+        paging continues past the retention window into archived checks.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = select(HealthCheck)
+
+        if resource_type:
+            query = query.where(HealthCheck.resource_type == resource_type)
+        if namespace:
+            query = query.where(HealthCheck.namespace == namespace)
+        if resource_name:
+            query = query.where(HealthCheck.resource_name == resource_name)
+        if status:
+            query = query.where(HealthCheck.status == status)
+        if not_healthy:
+            # Matches the partial indexes' predicate so the planner can use them.
+            # Inlined as a literal: a bound parameter (prepared/generic plans)
+            # can't be proven to match
+            query = query.where(HealthCheck.status != literal_column(f"'{HEALTHY}'"))
+        if since:
+            query = query.where(HealthCheck.checked_at >= since)
+        if until:
+            query = query.where(HealthCheck.checked_at < until)
+        position = decode_cursor(cursor) if cursor else None
+        if position:
+            checked_at, check_id = position
+            query = query.where(
+                tuple_(HealthCheck.checked_at, HealthCheck.id)
+                < tuple_(checked_at, check_id)
+            )
+
+        query = query.order_by(HealthCheck.checked_at.desc(), HealthCheck.id.desc())
+        query = query.limit(limit + 1)
+        rows = (await db.execute(query)).scalars().all()
+        items = [self._serialize(row) for row in rows]
+
+        if archive and len(items) <= limit and archive_service.enabled:
+            if items:
+                position = (items[-1]["checked_at"], items[-1]["id"])
+
+            def matches(row: Dict[str, Any]) -> bool:
+                return (
+                    (not resource_type or row["resource_type"] == resource_type)
+                    and (not namespace or row["namespace"] == namespace)
+                    and (not resource_name or row["resource_name"] == resource_name)
+                    and (not status or row["status"] == status)
+                    and (not not_healthy or row["status"] != HEALTHY)
+                )
+
+            items.extend(await asyncio.to_thread(
+                archive_service.query, "health_checks", "checked_at", since, until,
+                matches, position, limit + 1 - len(items)
+            ))
+
+        page = items[:limit]
+        next_cursor = None
+        if len(items) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor(last["checked_at"], last["id"])
+
+        return {
+            "items": page,
+            "count": len(page),
+            "limit": limit,
+            "next_cursor": next_cursor,
+        }
+
+    def _serialize(self, check: HealthCheck) -> Dict[str, Any]:
+        """Convert a HealthCheck row to a response dict."""
+        return {
+            "id": check.id,
+            "resource_type": check.resource_type,
+            "resource_name": check.resource_name,
+            "namespace": check.namespace,
+            "status": check.status,
+            "message": check.message,
+            "details": check.details,
+            "checked_at": check.checked_at,
+        }
+
+
+# Global health history service instance
+health_history_service = HealthHistoryService()
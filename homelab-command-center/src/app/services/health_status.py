@@ -0,0 +1,164 @@
+from typing import Dict, Any, Optional
+from datetime import datetime
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, case, literal_column
+from sqlalchemy.dialects import postgresql, sqlite
+from app.database import HealthStatus
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("healthy", "warning", "unhealthy")
+
+
+def resource_key(
+    resource_type: str, resource_name: str, namespace: Optional[str]
+) -> str:
+    """Primary key of a resource in the health_status table."""
+    return f"{resource_type}/{namespace or ''}/{resource_name}"
+
+
+class HealthStatusService:
+    """Service for the current health of each resource, next to the check history."""
+
+    async def upsert(
+        self,
+        db: AsyncSession,
+        resource_type: str,
+        resource_name: str,
+        namespace: Optional[str],
+        status: str,
+        message: str,
+        details: Dict[str, Any],
+        checked_at: datetime
+    ):
+        """Record a resource's latest check (the caller commits)."""
+        dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+        statement = dialect.insert(HealthStatus).values(
+            resource_key=resource_key(resource_type, resource_name, namespace),
+            resource_type=resource_type,
+            resource_name=resource_name,
+            namespace=namespace,
+            status=status,
+            message=message,
+            details=details,
+            checked_at=checked_at,
+            status_since=checked_at
+        )
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[HealthStatus.resource_key],
+            set_={
+                "status": statement.excluded.status,
+                "message": statement.excluded.message,
+                "details": statement.excluded.details,
+                "checked_at": statement.excluded.checked_at,
+                # Keep the transition time while the status is unchanged
+                "status_since": case(
+                    (
+                        HealthStatus.status == statement.excluded.status,
+                        HealthStatus.status_since,
+                    ),
+                    else_=statement.excluded.status_since
+                ),
+            }
+        ))
+
+    async def prune(
+        self, db: AsyncSession, resource_type: str, checked_before: datetime
+    ) -> int:
+        """Drop resources of a type that a full check pass didn't see (deleted ones)."""
+        result = await db.execute(
+            delete(HealthStatus)
+            .where(HealthStatus.resource_type == resource_type)
+            .where(HealthStatus.checked_at < checked_before)
+        )
+        await db.commit()
+        return result.rowcount
+
+    async def get_summary(
+        self,
+        db: AsyncSession,
+        namespace: Optional[str] = None,
+        resource_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get status counts and the non-healthy resources from the current-state table.
+
+        Counts come from one GROUP BY over a row per resource; the non-healthy
+        list is read through the partial index, so neither touches the history.
+        """
+        filters = []
+        if namespace:
+            filters.append(HealthStatus.namespace == namespace)
+        if resource_type:
+            filters.append(HealthStatus.resource_type == resource_type)
+
+        counts = await db.execute(
+            select(
+                HealthStatus.resource_type,
+                HealthStatus.namespace,
+                HealthStatus.status,
+                func.count(),
+                func.max(HealthStatus.checked_at)
+            )
+            .where(*filters)
+            .group_by(
+                HealthStatus.resource_type, HealthStatus.namespace, HealthStatus.status
+            )
+        )
+
+        by_status = {status: 0 for status in STATUSES}
+        by_namespace: Dict[str, Dict[str, int]] = {}
+        by_resource_type: Dict[str, Dict[str, int]] = {}
+        updated_at = None
+        for row_type, row_namespace, status, count, last_checked in counts:
+            by_status[status] = by_status.get(status, 0) + count
+            namespace_counts = by_namespace.setdefault(row_namespace or "", {})
+            namespace_counts[status] = namespace_counts.get(status, 0) + count
+            type_counts = by_resource_type.setdefault(row_type, {})
+            type_counts[status] = type_counts.get(status, 0) + count
+            if updated_at is None or last_checked > updated_at:
+                updated_at = last_checked
+
+        not_healthy = (await db.execute(
+            select(HealthStatus)
+            # A literal, not a parameter, so it matches the predicate of
+            # idx_health_status_not_healthy
+            .where(HealthStatus.status != literal_column("'healthy'"), *filters)
+            .order_by(HealthStatus.status_since)
+        )).scalars().all()
+
+        overall_status = "healthy"
+        if by_status.get("unhealthy"):
+            overall_status = "unhealthy"
+        elif by_status.get("warning"):
+            overall_status = "warning"
+
+        return {
+            "overall_status": overall_status,
+            "total_checks": sum(by_status.values()),
+            "healthy": by_status.get("healthy", 0),
+            "warning": by_status.get("warning", 0),
+            "unhealthy": by_status.get("unhealthy", 0),
+            "by_status": by_status,
+            "by_namespace": by_namespace,
+            "by_resource_type": by_resource_type,
+            "not_healthy": [self._serialize(row) for row in not_healthy],
+            "checked_at": updated_at,
+        }
+
+    def _serialize(self, row: HealthStatus) -> Dict[str, Any]:
+        """Convert a HealthStatus row to a response dict."""
+        return {
+            "resource_type": row.resource_type,
+            "resource_name": row.resource_name,
+            "namespace": row.namespace,
+            "status": row.status,
+            "message": row.message,
+            "details": row.details,
+            "checked_at": row.checked_at,
+            "status_since": row.status_since,
+        }
+
+
+# Global health status service instance
+health_status_service = HealthStatusService()
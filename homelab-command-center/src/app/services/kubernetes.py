@@ -1,250 +1,808 @@
-from kubernetes import client, config
-from kubernetes.client.rest import ApiException
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from typing import List, Dict, Any, Callable, FrozenSet, Optional
+from datetime import datetime, timezone
+import asyncio
 import logging
+import threading
+import time
+from app import timing
 from app.config import settings
+from app.services.admission import (
+    CircuitBreaker,
+    PriorityTokenBucket,
+    UpstreamUnavailableError,
+)
 
 logger = logging.getLogger(__name__)
 
+# Cluster context value that forces in-cluster service account config
+IN_CLUSTER = "in-cluster"
+
+# Upstreams with their own circuit breaker
+CORE_API = "core"
+METRICS_API = "metrics.k8s.io"
+
+# Events listed per page when (re)listing before a watch
+EVENT_LIST_PAGE_SIZE = 500
+WATCH_CHANGES = ("ADDED", "MODIFIED", "DELETED")
+
+
+def _project(
+    obj, extractors: Dict[str, Callable[[Any], Any]], fields: Optional[FrozenSet[str]]
+) -> Dict[str, Any]:
+    """Build a dict from `extractors`, running only those in `fields` (all if None)."""
+    if not fields:
+        return {field: extract(obj) for field, extract in extractors.items()}
+    return {
+        field: extract(obj) for field, extract in extractors.items() if field in fields
+    }
+
+
+def _node_conditions(node) -> Dict[str, Any]:
+    """Extract node conditions keyed by type."""
+    conditions = {}
+    for condition in node.status.conditions or []:
+        conditions[condition.type] = {
+            "status": condition.status,
+            "reason": condition.reason,
+            "message": condition.message,
+            "last_transition_time": (
+                condition.last_transition_time.isoformat()
+                if condition.last_transition_time
+                else None
+            ),
+        }
+    return conditions
+
+
+def _node_info(node, attribute: str) -> Optional[str]:
+    """Read an attribute from node.status.node_info, if reported."""
+    node_info = node.status.node_info
+    return getattr(node_info, attribute) if node_info else None
+
+
+def _pod_restart_count(pod) -> int:
+    """Sum restarts across all container statuses."""
+    return sum(
+        container_status.restart_count
+        for container_status in pod.status.container_statuses or []
+    )
+
+
+def _pod_ready(pod) -> bool:
+    """Whether the pod's Ready condition is True."""
+    return any(
+        c.type == "Ready" and c.status == "True" for c in pod.status.conditions or []
+    )
+
+
+def _pod_containers(pod) -> List[Dict[str, Any]]:
+    """Serialize container information."""
+    containers = []
+    for container in pod.spec.containers:
+        container_info = {
+            "name": container.name,
+            "image": container.image,
+            "ports": [
+                {"port": p.container_port, "protocol": p.protocol}
+                for p in container.ports or []
+            ],
+            "resources": {
+                "requests": (
+                    dict(container.resources.requests)
+                    if container.resources and container.resources.requests
+                    else {}
+                ),
+                "limits": (
+                    dict(container.resources.limits)
+                    if container.resources and container.resources.limits
+                    else {}
+                ),
+            },
+        }
+        containers.append(container_info)
+    return containers
+
+
+def _service_ports(service) -> List[Dict[str, Any]]:
+    """Serialize service ports."""
+    ports = []
+    for port in service.spec.ports or []:
+        port_info = {
+            "name": port.name,
+            "port": port.port,
+            "target_port": port.target_port,
+            "protocol": port.protocol
+        }
+        if port.node_port:
+            port_info["node_port"] = port.node_port
+        ports.append(port_info)
+    return ports
+
+
+def _ingress_rules(ingress) -> List[Dict[str, Any]]:
+    """Serialize ingress rules as host plus backend paths."""
+    rules = []
+    for rule in ingress.spec.rules or []:
+        paths = []
+        for path in (rule.http.paths if rule.http else None) or []:
+            service = path.backend.service if path.backend else None
+            port = None
+            if service and service.port:
+                port = service.port.number or service.port.name
+            paths.append({
+                "path": path.path or "/",
+                "service": service.name if service else None,
+                "port": port
+            })
+        rules.append({"host": rule.host, "paths": paths})
+    return rules
+
+
+# Field name -> extractor for each serialized resource. Projections (fields=)
+# only run the extractors they name, so unrequested fields are never built.
+NODE_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    "name": lambda node: node.metadata.name,
+    "status": lambda node: (
+        "Ready"
+        if any(
+            c.type == "Ready" and c.status == "True"
+            for c in node.status.conditions or []
+        )
+        else "NotReady"
+    ),
+    "role": lambda node: (
+        "master"
+        if "node-role.kubernetes.io/master" in (node.metadata.labels or {})
+        else "worker"
+    ),
+    "version": lambda node: _node_info(node, "kubelet_version"),
+    "os_image": lambda node: _node_info(node, "os_image"),
+    "kernel_version": lambda node: _node_info(node, "kernel_version"),
+    "container_runtime": lambda node: _node_info(node, "container_runtime_version"),
+    "cpu_capacity": lambda node: (node.status.capacity or {}).get("cpu"),
+    "memory_capacity": lambda node: (node.status.capacity or {}).get("memory"),
+    "cpu_allocatable": lambda node: (node.status.allocatable or {}).get("cpu"),
+    "memory_allocatable": lambda node: (node.status.allocatable or {}).get("memory"),
+    "conditions": _node_conditions,
+    "labels": lambda node: dict(node.metadata.labels or {}),
+    "annotations": lambda node: dict(node.metadata.annotations or {}),
+}
+
+POD_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    "name": lambda pod: pod.metadata.name,
+    "namespace": lambda pod: pod.metadata.namespace,
+    "node_name": lambda pod: pod.spec.node_name,
+    "status": lambda pod: pod.status.phase,
+    "phase": lambda pod: pod.status.phase,
+    "restart_count": _pod_restart_count,
+    "ready": _pod_ready,
+    "containers": _pod_containers,
+    "labels": lambda pod: dict(pod.metadata.labels or {}),
+    "annotations": lambda pod: dict(pod.metadata.annotations or {}),
+}
+
+SERVICE_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    "name": lambda service: service.metadata.name,
+    "namespace": lambda service: service.metadata.namespace,
+    "type": lambda service: service.spec.type,
+    "cluster_ip": lambda service: service.spec.cluster_ip,
+    "external_ips": lambda service: service.spec.external_i_ps or [],
+    "ports": _service_ports,
+    "selector": lambda service: dict(service.spec.selector or {}),
+    "labels": lambda service: dict(service.metadata.labels or {}),
+    "annotations": lambda service: dict(service.metadata.annotations or {}),
+}
+
+
+INGRESS_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    "name": lambda ingress: ingress.metadata.name,
+    "namespace": lambda ingress: ingress.metadata.namespace,
+    "class_name": lambda ingress: ingress.spec.ingress_class_name,
+    "hosts": lambda ingress: [
+        rule.host for rule in ingress.spec.rules or [] if rule.host
+    ],
+    "tls_hosts": lambda ingress: [
+        host for tls in ingress.spec.tls or [] for host in tls.hosts or []
+    ],
+    "rules": _ingress_rules,
+    "labels": lambda ingress: dict(ingress.metadata.labels or {}),
+    "annotations": lambda ingress: dict(ingress.metadata.annotations or {}),
+}
+
+
+def _utc(timestamp: Optional[datetime]) -> Optional[datetime]:
+    """Convert an API timestamp to naive UTC, as stored in the database."""
+    if timestamp is not None and timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def _event_count(event) -> int:
+    """Occurrences so far, from the event series if the event has one."""
+    if event.series is not None and event.series.count:
+        return event.series.count
+    return event.count or 1
+
+
+def _event_first_seen(event) -> Optional[datetime]:
+    return _utc(
+        event.first_timestamp or event.event_time or event.metadata.creation_timestamp
+    )
+
+
+def _event_last_seen(event) -> Optional[datetime]:
+    series_last = event.series.last_observed_time if event.series is not None else None
+    return _utc(
+        series_last
+        or event.last_timestamp
+        or event.event_time
+        or event.metadata.creation_timestamp
+    )
+
+
+EVENT_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    "uid": lambda event: event.metadata.uid,
+    "namespace": lambda event: (
+        event.involved_object.namespace or event.metadata.namespace
+    ),
+    "kind": lambda event: event.involved_object.kind,
+    "name": lambda event: event.involved_object.name,
+    "reason": lambda event: event.reason,
+    "type": lambda event: event.type,
+    "message": lambda event: event.message,
+    "source": lambda event: (
+        (event.source.component if event.source else None)
+        or event.reporting_component
+    ),
+    "count": _event_count,
+    "first_seen": _event_first_seen,
+    "last_seen": _event_last_seen,
+}
+
+
+def _remember(cache: "OrderedDict[tuple, Any]", key: tuple, value: Any):
+    """Store `value` as the most recent entry, evicting past kube_list_cache_size."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > settings.kube_list_cache_size:
+        cache.popitem(last=False)
+
 
 class KubernetesClient:
-    """Kubernetes API client wrapper."""
+    """Kubernetes API client wrapper.
+    
+    The kubernetes package is imported and the API clients are built on first
+    use, so importing this module (API, Celery workers, tooling) stays cheap.
+    """
+    
+    def __init__(self, context: Optional[str] = None):
+        self.context = context
+        self.v1 = None
+        self.apps_v1 = None
+        self.networking_v1 = None
+        self.metrics_v1 = None
+        self._api_exception = Exception
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        # Short-lived list snapshots: (kind, namespace, fields) -> (fetched_at, items),
+        # least recently used first. Kept past their TTL (up to
+        # kube_list_cache_max_stale) to be served while the apiserver is failing.
+        self._list_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # Last good metrics.k8s.io lists: (kind, namespace) -> items,
+        # least recently used first
+        self._metrics_cache: "OrderedDict[tuple, List[Dict[str, Any]]]" = OrderedDict()
+        # Client-side admission control: one token bucket per cluster, one breaker
+        # per upstream
+        self.limiter = PriorityTokenBucket(
+            settings.kube_rate_limit,
+            settings.kube_rate_burst,
+            settings.kube_interactive_reserve,
+        )
+        self.breakers = {
+            upstream: CircuitBreaker(
+                f"{context or 'default'}/{upstream}",
+                settings.kube_breaker_failures,
+                settings.kube_breaker_reset,
+            )
+            for upstream in (CORE_API, METRICS_API)
+        }
+    
+    def initialize(self):
+        """Load Kubernetes config and build API clients if not done yet."""
+        if self._initialized:
+            return
+        with self._init_lock:
+            if not self._initialized:
+                self._initialize_clients()
+                self._initialized = True
+    
+    async def _ensure_initialized(self):
+        """Initialize off the event loop so a cold client never blocks requests."""
+        if not self._initialized:
+            await asyncio.to_thread(self.initialize)
     
-    def __init__(self):
+    def close(self):
+        """Close the underlying API client connection pool."""
+        if self.v1 is not None:
+            self.v1.api_client.close()
         self.v1 = None
         self.apps_v1 = None
+        self.networking_v1 = None
         self.metrics_v1 = None
-        self._initialize_clients()
+        self._list_cache.clear()
+        self._metrics_cache.clear()
+        self._initialized = False
     
     def _initialize_clients(self):
         """Initialize Kubernetes API clients."""
+        from kubernetes import client
+        from kubernetes.client.rest import ApiException
+        
+        self._api_exception = ApiException
         try:
-            # Try to load in-cluster config first (when running in Kubernetes)
-            config.load_incluster_config()
-            logger.info("Loaded in-cluster Kubernetes config")
-        except Exception:
-            try:
-                # Fall back to kubeconfig file
-                config.load_kube_config()
-                logger.info("Loaded Kubernetes config from file")
-            except Exception as e:
-                logger.warning(f"Failed to load Kubernetes config: {e}")
-                logger.warning("Running in mock mode - Kubernetes API calls will return empty data")
-                self.v1 = None
-                self.apps_v1 = None
-                self.metrics_v1 = None
-                return
+            api_client = self._load_api_client()
+        except Exception as e:
+            logger.warning(f"Failed to load Kubernetes config: {e}")
+            logger.warning(
+                "Running in mock mode - Kubernetes API calls will return empty data"
+            )
+            self.v1 = None
+            self.apps_v1 = None
+            self.networking_v1 = None
+            self.metrics_v1 = None
+            return
         
-        self.v1 = client.CoreV1Api()
-        self.apps_v1 = client.AppsV1Api()
+        # Each client gets its own ApiClient, and so its own connection pool
+        self.v1 = client.CoreV1Api(api_client)
+        self.apps_v1 = client.AppsV1Api(api_client)
+        self.networking_v1 = client.NetworkingV1Api(api_client)
         
         # Try to initialize metrics client (may not be available)
         try:
-            self.metrics_v1 = client.CustomObjectsApi()
+            self.metrics_v1 = client.CustomObjectsApi(api_client)
         except Exception as e:
             logger.warning(f"Metrics API not available: {e}")
             self.metrics_v1 = None
     
-    async def get_nodes(self) -> List[Dict[str, Any]]:
-        """Get all cluster nodes."""
+    def _load_api_client(self):
+        """Build an ApiClient for this client's kubeconfig context."""
+        from kubernetes import client, config
+        
+        if self.context == IN_CLUSTER:
+            configuration = client.Configuration()
+            config.load_incluster_config(client_configuration=configuration)
+            logger.info("Loaded in-cluster Kubernetes config")
+            return client.ApiClient(configuration)
+        
+        if self.context:
+            api_client = config.new_client_from_config(context=self.context)
+            logger.info(f"Loaded Kubernetes config for context {self.context}")
+            return api_client
+        
+        try:
+            # Try to load in-cluster config first (when running in Kubernetes)
+            config.load_incluster_config()
+            logger.info("Loaded in-cluster Kubernetes config")
+        except Exception:
+            # Fall back to kubeconfig file
+            config.load_kube_config()
+            logger.info("Loaded Kubernetes config from file")
+        return client.ApiClient()
+    
+    async def _cached_list(self, key: tuple, fetch) -> List[Dict[str, Any]]:
+        """Return a list snapshot, refetching once it is older than kube_list_cache_ttl.
+        
+        Callers get the same list object while the snapshot is fresh, so it
+        must be treated as read-only; this lets encoded responses be reused.
+        If the refetch fails, the last snapshot is served if it is at most
+        kube_list_cache_max_stale old; without one, API errors give an empty
+        list and anything else raises. At most kube_list_cache_size snapshots
+        are kept, evicting the least recently used, since every namespace and
+        fields= projection is cached separately.
+        """
+        cached = self._list_cache.get(key)
+        age = time.monotonic() - cached[0] if cached else None
+        if cached and age > settings.kube_list_cache_max_stale:
+            del self._list_cache[key]
+            cached = None
+        if cached and age < settings.kube_list_cache_ttl:
+            self._list_cache.move_to_end(key)
+            return cached[1]
+        try:
+            items = await fetch()
+        except Exception as e:
+            if cached:
+                # A circuit is logged once, when it opens
+                if not isinstance(e, UpstreamUnavailableError):
+                    logger.warning(
+                        f"Failed to get {key[0]}, serving {age:.0f}s old data: {e}"
+                    )
+                return cached[1]
+            if isinstance(e, self._api_exception):
+                logger.error(f"Failed to get {key[0]}: {e}")
+                return []
+            raise
+        now = time.monotonic()
+        expired = [
+            cached_key
+            for cached_key, (fetched_at, _) in self._list_cache.items()
+            if now - fetched_at > settings.kube_list_cache_max_stale
+        ]
+        for cached_key in expired:
+            del self._list_cache[cached_key]
+        _remember(self._list_cache, key, (now, items))
+        return items
+    
+    async def get_nodes(
+        self, fields: Optional[FrozenSet[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get all cluster nodes, optionally projected to `fields`."""
+        return await self._cached_list(
+            ("nodes", None, fields), lambda: self._list_nodes(fields)
+        )
+    
+    async def get_pods(
+        self,
+        namespace: Optional[str] = None,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get pods from cluster, optionally projected to `fields`."""
+        return await self._cached_list(
+            ("pods", namespace, fields), lambda: self._list_pods(namespace, fields)
+        )
+    
+    async def get_services(
+        self,
+        namespace: Optional[str] = None,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get services from cluster, optionally projected to `fields`."""
+        return await self._cached_list(
+            ("services", namespace, fields),
+            lambda: self._list_services(namespace, fields),
+        )
+    
+    async def get_ingresses(
+        self,
+        namespace: Optional[str] = None,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get ingresses from cluster, optionally projected to `fields`."""
+        return await self._cached_list(
+            ("ingresses", namespace, fields),
+            lambda: self._list_ingresses(namespace, fields),
+        )
+    
+    async def _list_nodes(
+        self, fields: Optional[FrozenSet[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """List and serialize all cluster nodes."""
+        await self._ensure_initialized()
         if not self.v1:
             logger.warning("Kubernetes client not available, returning mock data")
-            return self._get_mock_nodes()
+            return self._project_mock(self._get_mock_nodes(), fields)
         
-        try:
-            nodes = self.v1.list_node()
-            return [self._serialize_node(node) for node in nodes.items]
-        except ApiException as e:
-            logger.error(f"Failed to get nodes: {e}")
-            return []
+        nodes = await self._call(CORE_API, self.v1.list_node)
+        with timing.phase("serialize"):
+            return [self._serialize_node(node, fields) for node in nodes.items]
     
-    async def get_pods(self, namespace: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get pods from cluster."""
+    async def _list_pods(
+        self,
+        namespace: Optional[str] = None,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """List and serialize pods."""
+        await self._ensure_initialized()
         if not self.v1:
             logger.warning("Kubernetes client not available, returning mock data")
-            return self._get_mock_pods()
+            return self._project_mock(self._get_mock_pods(), fields)
         
-        try:
-            if namespace:
-                pods = self.v1.list_namespaced_pod(namespace=namespace)
-            else:
-                pods = self.v1.list_pod_for_all_namespaces()
-            return [self._serialize_pod(pod) for pod in pods.items]
-        except ApiException as e:
-            logger.error(f"Failed to get pods: {e}")
-            return []
+        if namespace:
+            pods = await self._call(
+                CORE_API, self.v1.list_namespaced_pod, namespace=namespace
+            )
+        else:
+            pods = await self._call(CORE_API, self.v1.list_pod_for_all_namespaces)
+        with timing.phase("serialize"):
+            return [self._serialize_pod(pod, fields) for pod in pods.items]
     
-    async def get_services(self, namespace: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get services from cluster."""
+    async def _list_services(
+        self,
+        namespace: Optional[str] = None,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """List and serialize services."""
+        await self._ensure_initialized()
         if not self.v1:
             logger.warning("Kubernetes client not available, returning mock data")
-            return self._get_mock_services()
+            return self._project_mock(self._get_mock_services(), fields)
         
-        try:
-            if namespace:
-                services = self.v1.list_namespaced_service(namespace=namespace)
-            else:
-                services = self.v1.list_service_for_all_namespaces()
-            return [self._serialize_service(service) for service in services.items]
-        except ApiException as e:
-            logger.error(f"Failed to get services: {e}")
+        if namespace:
+            services = await self._call(
+                CORE_API, self.v1.list_namespaced_service, namespace=namespace
+            )
+        else:
+            services = await self._call(
+                CORE_API, self.v1.list_service_for_all_namespaces
+            )
+        with timing.phase("serialize"):
+            return [
+                self._serialize_service(service, fields) for service in services.items
+            ]
+    
+    async def _list_ingresses(
+        self,
+        namespace: Optional[str] = None,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """List and serialize ingresses."""
+        await self._ensure_initialized()
+        if not self.networking_v1:
+            # No mock ingresses: their hosts would only exist in someone's homelab
             return []
+        
+        if namespace:
+            ingresses = await self._call(
+                CORE_API,
+                self.networking_v1.list_namespaced_ingress,
+                namespace=namespace,
+            )
+        else:
+            ingresses = await self._call(
+                CORE_API, self.networking_v1.list_ingress_for_all_namespaces
+            )
+        with timing.phase("serialize"):
+            return [
+                _project(ingress, INGRESS_FIELDS, fields) for ingress in ingresses.items
+            ]
     
     async def get_node_metrics(self) -> List[Dict[str, Any]]:
         """Get node metrics (if metrics server is available)."""
+        await self._ensure_initialized()
         if not self.metrics_v1:
             return []
         
-        try:
-            metrics = self.metrics_v1.list_cluster_custom_object(
-                group="metrics.k8s.io",
-                version="v1beta1",
-                plural="nodes"
-            )
-            return metrics.get("items", [])
-        except Exception as e:
-            logger.warning(f"Failed to get node metrics: {e}")
-            return []
+        return await self._list_metrics(
+            ("nodes", None), self.metrics_v1.list_cluster_custom_object, plural="nodes"
+        )
     
     async def get_pod_metrics(self, namespace: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get pod metrics (if metrics server is available)."""
+        await self._ensure_initialized()
         if not self.metrics_v1:
             return []
         
+        if namespace:
+            return await self._list_metrics(
+                ("pods", namespace),
+                self.metrics_v1.list_namespaced_custom_object,
+                namespace=namespace,
+                plural="pods",
+            )
+        return await self._list_metrics(
+            ("pods", None), self.metrics_v1.list_cluster_custom_object, plural="pods"
+        )
+    
+    async def _list_metrics(
+        self, key: tuple, list_objects, **kwargs
+    ) -> List[Dict[str, Any]]:
+        """List metrics.k8s.io objects, or the last good result while the API fails."""
         try:
-            if namespace:
-                metrics = self.metrics_v1.list_namespaced_custom_object(
-                    group="metrics.k8s.io",
-                    version="v1beta1",
-                    namespace=namespace,
-                    plural="pods"
-                )
-            else:
-                metrics = self.metrics_v1.list_cluster_custom_object(
-                    group="metrics.k8s.io",
-                    version="v1beta1",
-                    plural="pods"
-                )
-            return metrics.get("items", [])
+            metrics = await self._call(
+                METRICS_API,
+                list_objects,
+                group="metrics.k8s.io",
+                version="v1beta1",
+                **kwargs,
+            )
+        except UpstreamUnavailableError:
+            return self._metrics_cache.get(key, [])
         except Exception as e:
-            logger.warning(f"Failed to get pod metrics: {e}")
-            return []
+            logger.warning(f"Failed to get {key[0]} metrics: {e}")
+            return self._metrics_cache.get(key, [])
+        items = metrics.get("items", [])
+        _remember(self._metrics_cache, key, items)
+        return items
     
-    def _serialize_node(self, node) -> Dict[str, Any]:
-        """Serialize node object to dictionary."""
-        status = node.status
-        spec = node.spec
-        
-        # Extract node conditions
-        conditions = {}
-        for condition in status.conditions or []:
-            conditions[condition.type] = {
-                "status": condition.status,
-                "reason": condition.reason,
-                "message": condition.message,
-                "last_transition_time": condition.last_transition_time.isoformat() if condition.last_transition_time else None
-            }
+    async def _call(self, upstream: str, method, *args, **kwargs):
+        """Call a blocking API method off the event loop, through admission control.
         
-        # Extract capacity and allocatable resources
-        capacity = {}
-        allocatable = {}
-        
-        if status.capacity:
-            capacity = dict(status.capacity)
-        if status.allocatable:
-            allocatable = dict(status.allocatable)
+        Waits for the rate limiter, and raises UpstreamUnavailableError without
+        calling while `upstream`'s circuit is open.
+        """
+        await self._admit(upstream)
+        try:
+            with timing.phase("k8s"):
+                result = await asyncio.to_thread(method, *args, **kwargs)
+        except Exception as e:
+            self._record(upstream, e)
+            raise
+        self._record(upstream)
+        return result
+    
+    async def _admit(self, upstream: str, priority_name: Optional[str] = None):
+        """Wait for a limiter token; an open circuit raises UpstreamUnavailableError."""
+        if not self.breakers[upstream].allow():
+            raise UpstreamUnavailableError(
+                f"{upstream} API circuit is open after repeated failures"
+            )
+        await self.limiter.acquire(priority_name)
+    
+    def _record(self, upstream: str, error: Optional[Exception] = None):
+        """Report the outcome of a call to `upstream` to its circuit breaker."""
+        if error is not None and self._is_upstream_failure(error, upstream):
+            self.breakers[upstream].record_failure()
+        else:
+            self.breakers[upstream].record_success()
+    
+    def _admit_from_thread(self, loop: asyncio.AbstractEventLoop):
+        """_admit for a core API call at sync priority, from a thread outside `loop`.
         
-        return {
-            "name": node.metadata.name,
-            "status": "Ready" if any(c.type == "Ready" and c.status == "True" for c in status.conditions or []) else "NotReady",
-            "role": "master" if "node-role.kubernetes.io/master" in (node.metadata.labels or {}) else "worker",
-            "version": status.node_info.kubelet_version if status.node_info else None,
-            "os_image": status.node_info.os_image if status.node_info else None,
-            "kernel_version": status.node_info.kernel_version if status.node_info else None,
-            "container_runtime": status.node_info.container_runtime_version if status.node_info else None,
-            "cpu_capacity": capacity.get("cpu"),
-            "memory_capacity": capacity.get("memory"),
-            "cpu_allocatable": allocatable.get("cpu"),
-            "memory_allocatable": allocatable.get("memory"),
-            "conditions": conditions,
-            "labels": dict(node.metadata.labels or {}),
-            "annotations": dict(node.metadata.annotations or {}),
-        }
+        The limiter and breakers belong to `loop`, so that is where they are used.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._admit(CORE_API, "sync"), loop)
+        future.result()
     
-    def _serialize_pod(self, pod) -> Dict[str, Any]:
-        """Serialize pod object to dictionary."""
-        status = pod.status
-        spec = pod.spec
+    def _record_from_thread(
+        self, loop: asyncio.AbstractEventLoop, error: Optional[Exception] = None
+    ):
+        """_record for a core API call, from a thread outside `loop`."""
+        loop.call_soon_threadsafe(self._record, CORE_API, error)
+    
+    def watch_events(
+        self,
+        handle: Callable[[str, Dict[str, Any]], None],
+        stopped: threading.Event,
+        loop: asyncio.AbstractEventLoop
+    ):
+        """List, then watch, core/v1 Events in all namespaces until `stopped` is set.
         
-        # Calculate restart count
-        restart_count = 0
-        for container_status in status.container_statuses or []:
-            restart_count += container_status.restart_count
+        Blocking; run it in a thread. `handle(change, event)` gets each event
+        serialized with EVENT_FIELDS, change being "LISTED" for events from a
+        (re)list and ADDED/MODIFIED/DELETED from the watch. Each watch request
+        lasts events_watch_timeout seconds and is renewed from the last
+        resourceVersion seen; once that has expired (410 Gone) events are
+        listed again. Other errors are retried with exponential backoff.
         
-        # Determine if pod is ready
-        ready = False
-        if status.conditions:
-            for condition in status.conditions:
-                if condition.type == "Ready" and condition.status == "True":
-                    ready = True
-                    break
+        Every list page and watch request goes through the rate limiter (at
+        sync priority) and the core API circuit breaker, which live on `loop`.
+        """
+        from kubernetes import watch
         
-        # Serialize container information
-        containers = []
-        for container in spec.containers:
-            container_info = {
-                "name": container.name,
-                "image": container.image,
-                "ports": [{"port": p.container_port, "protocol": p.protocol} for p in container.ports or []],
-                "resources": {
-                    "requests": dict(container.resources.requests) if container.resources and container.resources.requests else {},
-                    "limits": dict(container.resources.limits) if container.resources and container.resources.limits else {}
-                }
-            }
-            containers.append(container_info)
+        self.initialize()
+        if not self.v1:
+            logger.warning("Kubernetes client not available, not watching events")
+            return
         
-        return {
-            "name": pod.metadata.name,
-            "namespace": pod.metadata.namespace,
-            "node_name": spec.node_name,
-            "status": status.phase,
-            "phase": status.phase,
-            "restart_count": restart_count,
-            "ready": ready,
-            "containers": containers,
-            "labels": dict(pod.metadata.labels or {}),
-            "annotations": dict(pod.metadata.annotations or {}),
-        }
+        resource_version = None
+        backoff = 1.0
+        while not stopped.is_set():
+            try:
+                if resource_version is None:
+                    resource_version = self._list_events(handle, loop)
+                self._admit_from_thread(loop)
+                stream = watch.Watch()
+                started = time.monotonic()
+                answered = False
+                try:
+                    for change in stream.stream(
+                        self.v1.list_event_for_all_namespaces,
+                        resource_version=resource_version,
+                        timeout_seconds=settings.events_watch_timeout
+                    ):
+                        if not answered:
+                            self._record_from_thread(loop)
+                            answered = True
+                        if change["type"] in WATCH_CHANGES:
+                            event = change["object"]
+                            resource_version = event.metadata.resource_version
+                            serialized = _project(event, EVENT_FIELDS, None)
+                            handle(change["type"], serialized)
+                        if stopped.is_set():
+                            stream.stop()
+                except Exception as e:
+                    self._record_from_thread(loop, e)
+                    raise
+                if not answered:
+                    self._record_from_thread(loop)
+                if time.monotonic() - started < 1.0 and not stopped.is_set():
+                    # Closed straight away (e.g. by a proxy): back off, don't spin
+                    stopped.wait(backoff)
+                    backoff = min(backoff * 2, 60.0)
+                else:
+                    backoff = 1.0
+            except Exception as e:
+                if isinstance(e, self._api_exception) and e.status == 410:
+                    logger.info("Event watch expired, listing events again")
+                    resource_version = None
+                    continue
+                logger.warning(f"Event watch failed, retrying in {backoff:.0f}s: {e}")
+                stopped.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
     
-    def _serialize_service(self, service) -> Dict[str, Any]:
-        """Serialize service object to dictionary."""
-        spec = service.spec
-        
-        # Serialize ports
-        ports = []
-        for port in spec.ports or []:
-            port_info = {
-                "name": port.name,
-                "port": port.port,
-                "target_port": port.target_port,
-                "protocol": port.protocol
-            }
-            if port.node_port:
-                port_info["node_port"] = port.node_port
-            ports.append(port_info)
+    def _list_events(
+        self,
+        handle: Callable[[str, Dict[str, Any]], None],
+        loop: asyncio.AbstractEventLoop
+    ) -> str:
+        """Pass every event to `handle` as LISTED; returns the list's resourceVersion.
         
+        That is the first page's: continued pages come from its snapshot, and
+        watching from any later version would skip changes made while paging.
+        """
+        page_token = None
+        resource_version = None
+        while True:
+            self._admit_from_thread(loop)
+            try:
+                page = self.v1.list_event_for_all_namespaces(
+                    limit=EVENT_LIST_PAGE_SIZE, _continue=page_token
+                )
+            except Exception as e:
+                self._record_from_thread(loop, e)
+                raise
+            self._record_from_thread(loop)
+            resource_version = resource_version or page.metadata.resource_version
+            for event in page.items:
+                handle("LISTED", _project(event, EVENT_FIELDS, None))
+            page_token = page.metadata._continue
+            if not page_token:
+                return resource_version
+    
+    def _is_upstream_failure(self, error: Exception, upstream: str) -> bool:
+        """Whether `error` means the upstream is unhealthy, not this request refused."""
+        status = getattr(error, "status", None)
+        if (
+            isinstance(error, self._api_exception)
+            and status
+            and 400 <= status < 500
+            and status != 429
+        ):
+            # metrics.k8s.io answering 404/403 is missing or forbidden; retrying
+            # every call won't fix that
+            return upstream == METRICS_API
+        return True
+    
+    def upstream_state(self) -> Dict[str, Any]:
+        """Rate limiter and circuit breaker state, for monitoring."""
         return {
-            "name": service.metadata.name,
-            "namespace": service.metadata.namespace,
-            "type": spec.type,
-            "cluster_ip": spec.cluster_ip,
-            "external_ips": spec.external_i_ps or [],
-            "ports": ports,
-            "selector": dict(spec.selector or {}),
-            "labels": dict(service.metadata.labels or {}),
-            "annotations": dict(service.metadata.annotations or {}),
+            "limiter": self.limiter.snapshot(),
+            "breakers": {
+                name: breaker.snapshot() for name, breaker in self.breakers.items()
+            },
         }
-
+    
+    def _serialize_node(
+        self, node, fields: Optional[FrozenSet[str]] = None
+    ) -> Dict[str, Any]:
+        """Serialize node object to dictionary."""
+        return _project(node, NODE_FIELDS, fields)
+    
+    def _serialize_pod(
+        self, pod, fields: Optional[FrozenSet[str]] = None
+    ) -> Dict[str, Any]:
+        """Serialize pod object to dictionary."""
+        return _project(pod, POD_FIELDS, fields)
+    
+    def _serialize_service(
+        self, service, fields: Optional[FrozenSet[str]] = None
+    ) -> Dict[str, Any]:
+        """Serialize service object to dictionary."""
+        return _project(service, SERVICE_FIELDS, fields)
+    
+    def _project_mock(
+        self,
+        items: List[Dict[str, Any]],
+        fields: Optional[FrozenSet[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Apply a field projection to already-serialized mock data."""
+        if not fields:
+            return items
+        return [
+            {key: value for key, value in item.items() if key in fields}
+            for item in items
+        ]
 
     def _get_mock_nodes(self) -> List[Dict[str, Any]]:
         """Return mock node data for local development."""
@@ -362,5 +920,5 @@ class KubernetesClient:
         ]
 
 
-# Global Kubernetes client instance
-k8s_client = KubernetesClient()
+# Global Kubernetes client for the default cluster (API clients are built lazily)
+k8s_client = KubernetesClient(settings.kube_clusters.get(settings.default_cluster))
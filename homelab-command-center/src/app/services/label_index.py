@@ -0,0 +1,392 @@
+from typing import (
+    List,
+    Dict,
+    Any,
+    FrozenSet,
+    Hashable,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+import logging
+import re
+from app.services.kubernetes import KubernetesClient
+
+logger = logging.getLogger(__name__)
+
+INDEXED_KINDS = ("nodes", "pods", "services")
+
+_KEY = r"[A-Za-z0-9](?:[-A-Za-z0-9_./]*[A-Za-z0-9])?"
+_VALUE = r"(?:[A-Za-z0-9](?:[-A-Za-z0-9_.]*[A-Za-z0-9])?)?"
+_NOT_EXISTS = re.compile(rf"^!\s*({_KEY})$")
+_SET = re.compile(rf"^({_KEY})\s+(in|notin)\s*\(([^)]*)\)$")
+_EQUALITY = re.compile(rf"^({_KEY})\s*(==|=|!=)\s*({_VALUE})$")
+_EXISTS = re.compile(rf"^({_KEY})$")
+
+
+class Requirement(NamedTuple):
+    """One clause of a label selector: key, operator and values.
+
+    The operator is one of "in", "notin", "exists" and "!".
+    """
+    key: str
+    operator: str
+    values: FrozenSet[str] = frozenset()
+
+
+def _split_selector(selector: str) -> List[str]:
+    """Split a selector on commas that aren't inside an in/notin value list."""
+    parts, depth, current = [], 0, []
+    for char in selector:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def parse_selector(selector: Optional[str]) -> List[Requirement]:
+    """Parse Kubernetes label selector syntax, raising ValueError on bad input.
+
+    Supports key=value, key==value, key!=value, key in (a,b), key notin (a,b),
+    key and !key. An empty selector has no requirements and matches everything.
+    """
+    requirements = []
+    for part in _split_selector(selector or ""):
+        match = _NOT_EXISTS.match(part)
+        if match:
+            requirements.append(Requirement(match.group(1), "!"))
+            continue
+        match = _SET.match(part)
+        if match:
+            values = frozenset(
+                value.strip() for value in match.group(3).split(",") if value.strip()
+            )
+            if not values:
+                # Kubernetes rejects an empty set rather than matching nothing
+                # (or everything)
+                raise ValueError(
+                    f"Invalid label selector requirement: {part} (empty value set)"
+                )
+            requirements.append(Requirement(match.group(1), match.group(2), values))
+            continue
+        match = _EQUALITY.match(part)
+        if match:
+            operator = "notin" if match.group(2) == "!=" else "in"
+            requirements.append(
+                Requirement(match.group(1), operator, frozenset([match.group(3)]))
+            )
+            continue
+        match = _EXISTS.match(part)
+        if match:
+            requirements.append(Requirement(match.group(1), "exists"))
+            continue
+        raise ValueError(f"Invalid label selector requirement: {part}")
+    return requirements
+
+
+def match_labels_requirements(match_labels: Dict[str, str]) -> List[Requirement]:
+    """Requirements for an equality-only selector such as a Service's spec.selector."""
+    return [
+        Requirement(key, "in", frozenset([value]))
+        for key, value in match_labels.items()
+    ]
+
+
+class LabelIndex:
+    """Inverted index from labels to resource ids.
+
+    Postings are kept per key=value pair, per key and per namespace. A
+    selector starts from the smallest postings among its positive
+    requirements and narrows that candidate set with the rest, so the cost
+    follows the number of candidates rather than the number of resources.
+    """
+
+    def __init__(self):
+        self._labels: Dict[Hashable, Dict[str, str]] = {}
+        self._namespaces: Dict[Hashable, Optional[str]] = {}
+        self._postings: Dict[Tuple[str, str], Set[Hashable]] = {}
+        self._key_postings: Dict[str, Set[Hashable]] = {}
+        self._namespace_postings: Dict[Optional[str], Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def add(
+        self,
+        resource_id: Hashable,
+        labels: Dict[str, str],
+        namespace: Optional[str] = None,
+    ):
+        """Index a resource, replacing any previous labels for it."""
+        if resource_id in self._labels:
+            self.remove(resource_id)
+        labels = dict(labels or {})
+        self._labels[resource_id] = labels
+        self._namespaces[resource_id] = namespace
+        self._namespace_postings.setdefault(namespace, set()).add(resource_id)
+        for key, value in labels.items():
+            self._postings.setdefault((key, value), set()).add(resource_id)
+            self._key_postings.setdefault(key, set()).add(resource_id)
+
+    def remove(self, resource_id: Hashable):
+        """Drop a resource from the index."""
+        labels = self._labels.pop(resource_id, None)
+        if labels is None:
+            return
+        namespace = self._namespaces.pop(resource_id)
+        self._discard(self._namespace_postings, namespace, resource_id)
+        for key, value in labels.items():
+            self._discard(self._postings, (key, value), resource_id)
+            self._discard(self._key_postings, key, resource_id)
+
+    def sync(
+        self, resources: Dict[Hashable, Tuple[Optional[str], Dict[str, str]]]
+    ) -> int:
+        """Bring the index in line with a full listing of (namespace, labels) by id.
+
+        Only resources that appeared, disappeared or changed labels touch the
+        postings. Returns the number of changed resources.
+        """
+        changed = 0
+        for resource_id in [rid for rid in self._labels if rid not in resources]:
+            self.remove(resource_id)
+            changed += 1
+        for resource_id, (namespace, labels) in resources.items():
+            labels = labels or {}
+            if (
+                self._labels.get(resource_id) != labels
+                or self._namespaces.get(resource_id) != namespace
+            ):
+                self.add(resource_id, labels, namespace)
+                changed += 1
+        return changed
+
+    def select(
+        self, requirements: List[Requirement], namespace: Optional[str] = None
+    ) -> Set[Hashable]:
+        """Get the ids of resources matching every requirement (and namespace)."""
+        requirements = list(requirements)
+        if namespace is not None:
+            requirements.append(Requirement("", "namespace", frozenset([namespace])))
+        positive = [
+            r for r in requirements if r.operator in ("in", "exists", "namespace")
+        ]
+
+        # Seed from the most selective positive requirement...
+        if positive:
+            seed = min(positive, key=self._estimate)
+            matches = set(self._postings_for(seed))
+            remaining = [r for r in requirements if r is not seed]
+        else:
+            matches = set(self._labels)
+            remaining = requirements
+
+        # ...then narrow it. Single postings are intersected directly (the set
+        # op walks the smaller side); multi-value in-lists and large negative
+        # postings are checked per candidate instead of materialized.
+        for requirement in remaining:
+            if not matches:
+                break
+            if requirement.operator in ("exists", "namespace") or (
+                requirement.operator == "in" and len(requirement.values) == 1
+            ):
+                matches &= self._postings_for(requirement)
+            elif (
+                requirement.operator in ("notin", "!")
+                and self._estimate(requirement) < len(matches)
+            ):
+                matches -= self._postings_for(requirement)
+            else:
+                matches = {rid for rid in matches if self._satisfies(rid, requirement)}
+        return matches
+
+    def _estimate(self, requirement: Requirement) -> int:
+        """Number of ids in a requirement's postings, without building them."""
+        if requirement.operator == "namespace":
+            namespace, = requirement.values
+            return len(self._namespace_postings.get(namespace, ()))
+        if requirement.operator in ("exists", "!"):
+            return len(self._key_postings.get(requirement.key, ()))
+        return sum(
+            len(self._postings.get((requirement.key, value), ()))
+            for value in requirement.values
+        )
+
+    def _postings_for(self, requirement: Requirement) -> Set[Hashable]:
+        """Ids having the key (exists/!), a key=value (in/notin) or the namespace."""
+        if requirement.operator == "namespace":
+            namespace, = requirement.values
+            return self._namespace_postings.get(namespace, set())
+        if requirement.operator in ("exists", "!"):
+            return self._key_postings.get(requirement.key, set())
+        if len(requirement.values) == 1:
+            value, = requirement.values
+            return self._postings.get((requirement.key, value), set())
+        postings: Set[Hashable] = set()
+        for value in requirement.values:
+            postings |= self._postings.get((requirement.key, value), set())
+        return postings
+
+    def _satisfies(self, resource_id: Hashable, requirement: Requirement) -> bool:
+        """Check one requirement against a resource's own labels."""
+        if requirement.operator == "namespace":
+            return self._namespaces[resource_id] in requirement.values
+        labels = self._labels[resource_id]
+        if requirement.operator == "exists":
+            return requirement.key in labels
+        if requirement.operator == "!":
+            return requirement.key not in labels
+        if requirement.operator == "in":
+            return labels.get(requirement.key) in requirement.values
+        # notin also matches resources without the key, as in Kubernetes
+        return labels.get(requirement.key) not in requirement.values
+
+    def _discard(
+        self, postings: Dict[Any, Set[Hashable]], key: Any, resource_id: Hashable
+    ):
+        """Remove an id from a posting list, dropping the list once empty."""
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(resource_id)
+            if not ids:
+                del postings[key]
+
+
+class LabelIndexService:
+    """Service keeping label indexes over each cluster's node, pod and service lists.
+
+    Indexes follow the Kubernetes client's cached list snapshots: when a
+    refreshed list comes back the index is synced incrementally, otherwise
+    the existing postings are reused as-is.
+    """
+
+    def __init__(self):
+        # (client, kind) -> (indexed snapshot, index, items by id)
+        self._indexes: Dict[
+            Tuple[KubernetesClient, str],
+            Tuple[Any, LabelIndex, Dict[Hashable, Dict[str, Any]]],
+        ] = {}
+
+    async def get_index(
+        self,
+        k8s_client: KubernetesClient,
+        kind: str
+    ) -> Tuple[LabelIndex, Dict[Hashable, Dict[str, Any]]]:
+        """Get a kind's label index and items by id, synced to the current list."""
+        snapshot = await getattr(k8s_client, f"get_{kind}")()
+        entry = self._indexes.get((k8s_client, kind))
+        if entry is not None and entry[0] is snapshot:
+            return entry[1], entry[2]
+        return self.sync(k8s_client, kind, snapshot)
+
+    def sync(
+        self,
+        k8s_client: KubernetesClient,
+        kind: str,
+        items: List[Dict[str, Any]]
+    ) -> Tuple[LabelIndex, Dict[Hashable, Dict[str, Any]]]:
+        """Sync the index for a kind with a full resource listing."""
+        entry = self._indexes.get((k8s_client, kind))
+        index = entry[1] if entry else LabelIndex()
+        items_by_id = {(item.get("namespace"), item["name"]): item for item in items}
+        changed = index.sync({
+            resource_id: (item.get("namespace"), item.get("labels"))
+            for resource_id, item in items_by_id.items()
+        })
+        if changed:
+            logger.debug(
+                f"Label index for {kind}: {changed} of {len(items_by_id)} "
+                f"resources changed"
+            )
+        self._indexes[(k8s_client, kind)] = (items, index, items_by_id)
+        return index, items_by_id
+
+    async def select(
+        self,
+        k8s_client: KubernetesClient,
+        kind: str,
+        selector: Optional[str] = None,
+        namespace: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get resources of a kind matching a label selector string."""
+        requirements = parse_selector(selector)
+        index, items_by_id = await self.get_index(k8s_client, kind)
+        return [
+            items_by_id[resource_id]
+            for resource_id in sorted(index.select(requirements, namespace), key=str)
+        ]
+
+    async def get_service_pods(
+        self,
+        k8s_client: KubernetesClient,
+        service_name: str,
+        namespace: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get a service and the pods its selector matches, or None if not found."""
+        _, services = await self.get_index(k8s_client, "services")
+        service = next(
+            (
+                s
+                for (ns, name), s in services.items()
+                if name == service_name and namespace in (None, ns)
+            ),
+            None,
+        )
+        if service is None:
+            return None
+        members = await self.get_service_members(k8s_client, [service])
+        return {
+            "service": service,
+            "pods": members[(service["namespace"], service["name"])],
+        }
+
+    async def get_service_members(
+        self,
+        k8s_client: KubernetesClient,
+        services: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+        """Resolve the pods each service selects, keyed by (namespace, name).
+
+        Covers all services if none are given.
+        """
+        if services is None:
+            _, services_by_id = await self.get_index(k8s_client, "services")
+            services = list(services_by_id.values())
+        pod_index, pods = await self.get_index(k8s_client, "pods")
+        return self.match_services(pod_index, pods, services)
+
+    def match_services(
+        self,
+        pod_index: LabelIndex,
+        pods: Dict[Hashable, Dict[str, Any]],
+        services: List[Dict[str, Any]]
+    ) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+        """Join services to pods through the pod label index.
+
+        Each service costs one postings intersection, so the whole mapping is
+        O(total matches) instead of a services x pods scan. Services without a
+        selector select no pods, as in Kubernetes.
+        """
+        members = {}
+        for service in services:
+            selector = service.get("selector") or {}
+            matched = set()
+            if selector:
+                requirements = match_labels_requirements(selector)
+                matched = pod_index.select(requirements, service["namespace"])
+            members[(service["namespace"], service["name"])] = [
+                pods[pod_id] for pod_id in matched
+            ]
+        return members
+
+
+# Global label index service instance
+label_index_service = LabelIndexService()
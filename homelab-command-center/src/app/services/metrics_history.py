@@ -0,0 +1,198 @@
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import logging
+import time
+from app.config import settings
+from app.services.admission import priority as kube_priority
+from app.services.kubernetes import k8s_client
+from app.services.quantity import parse_quantity
+
+logger = logging.getLogger(__name__)
+
+SeriesKey = Tuple[str, str, str]  # (kind, name, metric)
+
+
+class RingBuffer:
+    """Fixed-capacity, array-backed buffer of (timestamp, value) samples."""
+
+    __slots__ = ("capacity", "_timestamps", "_values", "_start", "_size")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._timestamps = array("d", [0.0]) * capacity
+        self._values = array("d", [0.0]) * capacity
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, value: float):
+        """Append a sample, overwriting the oldest one when full."""
+        index = (self._start + self._size) % self.capacity
+        self._timestamps[index] = timestamp
+        self._values[index] = value
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def window(self, since: Optional[float] = None) -> List[Tuple[float, float]]:
+        """Return samples at or after `since`, oldest first."""
+        first = self._bisect(since) if since is not None else 0
+        samples = []
+        for offset in range(first, self._size):
+            index = (self._start + offset) % self.capacity
+            samples.append((self._timestamps[index], self._values[index]))
+        return samples
+
+    def _bisect(self, timestamp: float) -> int:
+        """Find the first logical offset whose timestamp is >= `timestamp`."""
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            if self._timestamps[(self._start + middle) % self.capacity] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+def downsample(
+    samples: List[Tuple[float, float]], max_points: int
+) -> List[Tuple[float, float]]:
+    """Average consecutive samples into at most `max_points` buckets."""
+    if max_points <= 0 or len(samples) <= max_points:
+        return samples
+
+    bucket_size = -(-len(samples) // max_points)
+    result = []
+    for start in range(0, len(samples), bucket_size):
+        bucket = samples[start:start + bucket_size]
+        result.append((
+            bucket[-1][0],
+            sum(value for _, value in bucket) / len(bucket)
+        ))
+    return result
+
+
+class MetricsHistoryService:
+    """In-memory short-range history of node and pod metrics-server samples."""
+
+    def __init__(self):
+        self.k8s_client = k8s_client
+        self._series: "OrderedDict[SeriesKey, RingBuffer]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def max_series(self) -> int:
+        """Number of series that fit in the configured sample budget."""
+        return max(
+            1,
+            settings.metrics_history_sample_budget // settings.metrics_history_samples,
+        )
+
+    def record(
+        self,
+        kind: str,
+        name: str,
+        metric: str,
+        value: float,
+        timestamp: Optional[float] = None,
+    ):
+        """Record one sample, evicting the stalest series when over budget."""
+        key = (kind, name, metric)
+        buffer = self._series.get(key)
+        if buffer is None:
+            while len(self._series) >= self.max_series:
+                self._series.popitem(last=False)
+            buffer = RingBuffer(settings.metrics_history_samples)
+            self._series[key] = buffer
+        else:
+            self._series.move_to_end(key)
+        buffer.append(timestamp if timestamp is not None else time.time(), value)
+
+    def get_window(
+        self,
+        kind: str,
+        name: str,
+        metric: str,
+        seconds: Optional[int] = None,
+        max_points: Optional[int] = None
+    ) -> Optional[List[Tuple[float, float]]]:
+        """Read a window of samples for one series, optionally downsampled."""
+        buffer = self._series.get((kind, name, metric))
+        if buffer is None:
+            return None
+        since = time.time() - seconds if seconds else None
+        samples = buffer.window(since)
+        return downsample(samples, max_points) if max_points else samples
+
+    def list_series(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List the series currently held in memory."""
+        return [
+            {"kind": key[0], "name": key[1], "metric": key[2], "samples": len(buffer)}
+            for key, buffer in self._series.items()
+            if kind is None or key[0] == kind
+        ]
+
+    async def sample_once(self):
+        """Fetch node and pod metrics once and record them."""
+        now = time.time()
+        node_metrics, pod_metrics = await asyncio.gather(
+            self.k8s_client.get_node_metrics(),
+            self.k8s_client.get_pod_metrics()
+        )
+
+        for metric in node_metrics:
+            name = metric.get("metadata", {}).get("name")
+            usage = metric.get("usage", {})
+            self.record("node", name, "cpu", parse_quantity(usage.get("cpu", "0")), now)
+            self.record(
+                "node", name, "memory", parse_quantity(usage.get("memory", "0")), now
+            )
+
+        for metric in pod_metrics:
+            metadata = metric.get("metadata", {})
+            name = f"{metadata.get('namespace')}/{metadata.get('name')}"
+            cpu = 0.0
+            memory = 0.0
+            for container in metric.get("containers", []):
+                usage = container.get("usage", {})
+                cpu += parse_quantity(usage.get("cpu", "0"))
+                memory += parse_quantity(usage.get("memory", "0"))
+            self.record("pod", name, "cpu", cpu, now)
+            self.record("pod", name, "memory", memory, now)
+
+    async def run_sampler(self):
+        """Sample metrics every scrape interval until cancelled."""
+        logger.info("Starting metrics history sampler")
+        await asyncio.to_thread(self.k8s_client.initialize)
+        while True:
+            try:
+                with kube_priority("stats"):
+                    await self.sample_once()
+            except Exception as e:
+                logger.warning(f"Metrics history sample failed: {e}")
+            await asyncio.sleep(settings.metrics_scrape_interval)
+
+    def start(self):
+        """Start the background sampler on the running event loop."""
+        if settings.metrics_history_enabled and self._task is None:
+            self._task = asyncio.create_task(self.run_sampler())
+
+    async def stop(self):
+        """Stop the background sampler."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global metrics history service instance
+metrics_history_service = MetricsHistoryService()
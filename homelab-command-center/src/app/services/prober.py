@@ -0,0 +1,266 @@
+from typing import List, Dict, Any, NamedTuple, Optional
+from urllib.parse import urlsplit
+import asyncio
+import bisect
+import logging
+import random
+import ssl
+import time
+import httpx
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Service ports probed over HTTP(S); anything else gets a TCP connect
+HTTP_PORTS = {80, 3000, 5000, 8000, 8080, 8081, 8096, 9000}
+HTTPS_PORTS = {443, 8443}
+
+# Idle connections kept for reuse within a sweep. Targets are deduplicated by
+# URL, so reuse only helps origins probed on several paths, while every idle
+# connection is rescanned by httpcore's pool on each request.
+PROBE_KEEPALIVE_CONNECTIONS = 10
+
+
+class ProbeTarget(NamedTuple):
+    """Something to probe: http(s)://... URLs get a GET, tcp://host:port a connect."""
+    kind: str  # "service", "ingress" or "static"
+    name: str
+    namespace: Optional[str]
+    url: str
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (cumulative on export, Prometheus style)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, latency_ms: float):
+        """Record one latency."""
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.count += 1
+        self.sum_ms += latency_ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile.
+
+        None when there are no samples or the quantile is past the last bucket.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cumulative bucket counts plus count, sum and p50/p95 estimates."""
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {
+            "buckets": buckets,
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+        }
+
+
+def _service_targets(services: List[Dict[str, Any]]) -> List[ProbeTarget]:
+    """One target per service port, addressed by ClusterIP."""
+    targets = []
+    for service in services:
+        cluster_ip = service.get("cluster_ip")
+        if not cluster_ip or cluster_ip == "None":
+            continue  # headless or ExternalName
+        # IPv6 ClusterIPs (dual-stack clusters) are bracketed in URLs
+        host = f"[{cluster_ip}]" if ":" in cluster_ip else cluster_ip
+        for port in service.get("ports") or []:
+            if (port.get("protocol") or "TCP") != "TCP":
+                continue
+            number, name = port["port"], (port.get("name") or "").lower()
+            if number in HTTPS_PORTS or name.startswith("https"):
+                url = f"https://{host}:{number}/"
+            elif number in HTTP_PORTS or name.startswith(("http", "web")):
+                url = f"http://{host}:{number}/"
+            else:
+                url = f"tcp://{host}:{number}"
+            targets.append(
+                ProbeTarget("service", service["name"], service.get("namespace"), url)
+            )
+    return targets
+
+
+def _ingress_targets(ingresses: List[Dict[str, Any]]) -> List[ProbeTarget]:
+    """One target per ingress host, over HTTPS when the host has TLS."""
+    targets = []
+    for ingress in ingresses:
+        tls_hosts = set(ingress.get("tls_hosts") or [])
+        for host in ingress.get("hosts") or []:
+            if host.startswith("*."):
+                continue
+            scheme = "https" if host in tls_hosts else "http"
+            targets.append(
+                ProbeTarget(
+                    "ingress",
+                    ingress["name"],
+                    ingress.get("namespace"),
+                    f"{scheme}://{host}/",
+                )
+            )
+    return targets
+
+
+class ProberService:
+    """Service for actively probing services, ingresses and configured URLs.
+
+    A sweep runs every probe concurrently on the event loop, bounded by
+    probe_concurrency, over one pooled httpx client. Each probe waits a
+    random jitter first so a sweep doesn't hit every backend at once.
+    """
+
+    def __init__(self):
+        # url -> latency histogram, for targets seen in the last sweep
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        # probe_verify_tls -> SSL context, built on first use
+        self._ssl_contexts: Dict[bool, ssl.SSLContext] = {}
+
+    def build_targets(
+        self,
+        services: Optional[List[Dict[str, Any]]] = None,
+        ingresses: Optional[List[Dict[str, Any]]] = None
+    ) -> List[ProbeTarget]:
+        """Derive probe targets from services and ingresses, plus probe_targets."""
+        targets = [
+            ProbeTarget("static", url, None, url) for url in settings.probe_targets
+        ]
+        if settings.probe_services and services:
+            targets.extend(_service_targets(services))
+        if settings.probe_ingresses and ingresses:
+            targets.extend(_ingress_targets(ingresses))
+
+        # The same URL can back several objects; probe it once
+        unique = {}
+        for target in targets:
+            unique.setdefault(target.url, target)
+        return list(unique.values())
+
+    async def probe_all(
+        self, targets: List[ProbeTarget], prune: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Probe every target once and return one result per target.
+        
+        Latency histograms of targets not in this sweep are dropped unless
+        `prune` is False (a sweep over part of the targets).
+        """
+        if not targets:
+            return []
+
+        verify = settings.probe_verify_tls
+        if verify not in self._ssl_contexts:
+            # Loading the CA bundle takes tens of milliseconds; do it once, off the loop
+            self._ssl_contexts[verify] = await asyncio.to_thread(
+                httpx.create_ssl_context, verify=verify
+            )
+        semaphore = asyncio.Semaphore(settings.probe_concurrency)
+        limits = httpx.Limits(
+            max_connections=settings.probe_concurrency,
+            max_keepalive_connections=min(
+                PROBE_KEEPALIVE_CONNECTIONS, settings.probe_concurrency
+            ),
+        )
+        async with httpx.AsyncClient(
+            timeout=settings.probe_timeout,
+            limits=limits,
+            verify=self._ssl_contexts[verify],
+            follow_redirects=False
+        ) as client:
+            results = await asyncio.gather(
+                *(self._probe(client, semaphore, target) for target in targets)
+            )
+
+        if prune:
+            self._histograms = {
+                target.url: self._histograms.get(target.url, LatencyHistogram())
+                for target in targets
+            }
+        else:
+            for target in targets:
+                self._histograms.setdefault(target.url, LatencyHistogram())
+        for result in results:
+            if result["latency_ms"] is not None:
+                self._histograms[result["url"]].observe(result["latency_ms"])
+                result["latency"] = self._histograms[result["url"]].snapshot()
+        return results
+
+    def histograms(self) -> Dict[str, Dict[str, Any]]:
+        """Latency histogram snapshots by URL."""
+        return {
+            url: histogram.snapshot() for url, histogram in self._histograms.items()
+        }
+
+    async def _probe(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        target: ProbeTarget
+    ) -> Dict[str, Any]:
+        """Probe one target after a random jitter, within the concurrency limit."""
+        if settings.probe_jitter > 0:
+            await asyncio.sleep(random.uniform(0, settings.probe_jitter))
+
+        async with semaphore:
+            result = {
+                "kind": target.kind,
+                "name": target.name,
+                "namespace": target.namespace,
+                "url": target.url,
+                "status": "healthy",
+                "status_code": None,
+                "latency_ms": None,
+                "error": None,
+            }
+            start = time.perf_counter()
+            try:
+                if target.url.startswith("tcp://"):
+                    await self._probe_tcp(target.url)
+                else:
+                    response = await client.get(target.url)
+                    result["status_code"] = response.status_code
+                    if response.status_code >= 500:
+                        result["status"] = "unhealthy"
+                    elif response.status_code >= 400:
+                        result["status"] = "warning"
+                result["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            except Exception as e:
+                result["status"] = "unhealthy"
+                result["error"] = (
+                    f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                )
+            return result
+
+    async def _probe_tcp(self, url: str):
+        """Open and close a TCP connection to tcp://host:port."""
+        parts = urlsplit(url)
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(parts.hostname, parts.port),
+            timeout=settings.probe_timeout
+        )
+        writer.close()
+        await writer.wait_closed()
+
+
+# Global prober service instance
+prober_service = ProberService()
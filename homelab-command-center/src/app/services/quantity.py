@@ -0,0 +1,63 @@
+from functools import lru_cache
+import math
+import re
+
+# Kubernetes resource.Quantity suffixes and their multipliers
+BINARY_SUFFIXES = {
+    "Ki": 2 ** 10,
+    "Mi": 2 ** 20,
+    "Gi": 2 ** 30,
+    "Ti": 2 ** 40,
+    "Pi": 2 ** 50,
+    "Ei": 2 ** 60,
+}
+
+DECIMAL_SUFFIXES = {
+    "n": 1e-9,
+    "u": 1e-6,
+    "m": 1e-3,
+    "": 1.0,
+    "k": 1e3,
+    "M": 1e6,
+    "G": 1e9,
+    "T": 1e12,
+    "P": 1e15,
+    "E": 1e18,
+}
+
+# <signed-number><suffix>, where suffix is binary, decimal or a decimal exponent
+_QUANTITY_RE = re.compile(
+    r"^(?P<number>[+-]?(?:\d+\.?\d*|\.\d+))"
+    r"(?:(?P<exponent>[eE][+-]?\d+)|(?P<suffix>Ki|Mi|Gi|Ti|Pi|Ei|[numkMGTPE])?)$"
+)
+
+
+@lru_cache(maxsize=65536)
+def parse_quantity(quantity: str) -> float:
+    """Parse a Kubernetes resource quantity ("250m", "1.5Gi", "12e6") to a float.
+
+    CPU quantities come back in cores and memory quantities in bytes. Invalid
+    input returns 0.0 so a single bad metric never breaks a collection cycle.
+    """
+    if not isinstance(quantity, str):
+        try:
+            return float(quantity)
+        except (TypeError, ValueError):
+            return 0.0
+
+    match = _QUANTITY_RE.match(quantity.strip())
+    if not match:
+        return 0.0
+
+    exponent = match.group("exponent")
+    if exponent:
+        # Parsed as one float: an integer power of ten can overflow ("1e400")
+        value = float(match.group("number") + exponent)
+        return value if math.isfinite(value) else 0.0
+
+    number = float(match.group("number"))
+
+    suffix = match.group("suffix") or ""
+    if suffix in BINARY_SUFFIXES:
+        return number * BINARY_SUFFIXES[suffix]
+    return number * DECIMAL_SUFFIXES[suffix]
@@ -0,0 +1,201 @@
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import heapq
+import logging
+import time
+from app.config import settings
+from app.services.clusters import cluster_registry, ALL_CLUSTERS
+from app.services.kubernetes import KubernetesClient
+from app.services.quantity import parse_quantity
+
+logger = logging.getLogger(__name__)
+
+SORT_KEYS = ("cpu", "memory", "cpu_request_ratio", "memory_request_ratio")
+
+
+class ResourceUsageService:
+    """Service for aggregating metrics.k8s.io pod usage against requests and limits."""
+
+    def __init__(self):
+        # Cached usage and refresh locks, per cluster client
+        self._usage_cache: Dict[KubernetesClient, Tuple[float, List[Dict]]] = {}
+        self._locks: Dict[KubernetesClient, asyncio.Lock] = {}
+
+    async def get_pod_usage(self, k8s_client: KubernetesClient) -> List[Dict[str, Any]]:
+        """Get aggregated per-pod usage, cached for one metrics scrape interval."""
+        async with self._locks.setdefault(k8s_client, asyncio.Lock()):
+            cached = self._usage_cache.get(k8s_client)
+            interval = settings.metrics_scrape_interval
+            if cached and time.monotonic() - cached[0] < interval:
+                return cached[1]
+
+            pods, pod_metrics = await asyncio.gather(
+                k8s_client.get_pods(),
+                k8s_client.get_pod_metrics()
+            )
+            usage = self.aggregate_pod_usage(pods, pod_metrics)
+            self._usage_cache[k8s_client] = (time.monotonic(), usage)
+            return usage
+
+    def aggregate_pod_usage(
+        self,
+        pods: List[Dict[str, Any]],
+        pod_metrics: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Join pod metrics with pod requests/limits by (namespace, name)."""
+        pods_by_key = {(pod["namespace"], pod["name"]): pod for pod in pods}
+        usage = []
+
+        for metric in pod_metrics:
+            metadata = metric.get("metadata", {})
+            key = (metadata.get("namespace"), metadata.get("name"))
+            pod = pods_by_key.get(key)
+
+            cpu_usage = 0.0
+            memory_usage = 0.0
+            for container in metric.get("containers", []):
+                container_usage = container.get("usage", {})
+                cpu_usage += parse_quantity(container_usage.get("cpu", "0"))
+                memory_usage += parse_quantity(container_usage.get("memory", "0"))
+
+            totals = self._sum_container_resources(pod["containers"] if pod else [])
+
+            usage.append({
+                "name": key[1],
+                "namespace": key[0],
+                "node_name": pod.get("node_name") if pod else None,
+                "cpu_usage_cores": cpu_usage,
+                "memory_usage_bytes": memory_usage,
+                "cpu_request_cores": totals["cpu_request"],
+                "memory_request_bytes": totals["memory_request"],
+                "cpu_limit_cores": totals["cpu_limit"],
+                "memory_limit_bytes": totals["memory_limit"],
+                "cpu_request_ratio": self._ratio(cpu_usage, totals["cpu_request"]),
+                "memory_request_ratio": self._ratio(
+                    memory_usage, totals["memory_request"]
+                ),
+                "cpu_limit_ratio": self._ratio(cpu_usage, totals["cpu_limit"]),
+                "memory_limit_ratio": self._ratio(memory_usage, totals["memory_limit"]),
+            })
+
+        return usage
+
+    def top_pods(
+        self,
+        usage: List[Dict[str, Any]],
+        group_by: str,
+        sort_by: str = "cpu",
+        k: int = 10
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Select the top-K pods per group ("namespace" or "node_name") with a heap."""
+        sort_field = self._sort_field(sort_by)
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for pod in usage:
+            if pod[sort_field] is None:
+                continue
+            groups.setdefault(self._group_key(pod, group_by), []).append(pod)
+
+        return {
+            group: heapq.nlargest(k, pods, key=lambda pod: pod[sort_field])
+            for group, pods in groups.items()
+        }
+
+    def namespace_totals(
+        self, usage: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, float]]:
+        """Sum usage and requests per namespace."""
+        totals: Dict[str, Dict[str, float]] = {}
+        for pod in usage:
+            namespace_total = totals.setdefault(self._group_key(pod, "namespace"), {
+                "pods": 0,
+                "cpu_usage_cores": 0.0,
+                "memory_usage_bytes": 0.0,
+                "cpu_request_cores": 0.0,
+                "memory_request_bytes": 0.0,
+            })
+            namespace_total["pods"] += 1
+            namespace_total["cpu_usage_cores"] += pod["cpu_usage_cores"]
+            namespace_total["memory_usage_bytes"] += pod["memory_usage_bytes"]
+            namespace_total["cpu_request_cores"] += pod["cpu_request_cores"]
+            namespace_total["memory_request_bytes"] += pod["memory_request_bytes"]
+        return totals
+
+    async def get_top_consumers(
+        self,
+        k: int = 10,
+        sort_by: str = "cpu",
+        namespace: Optional[str] = None,
+        cluster: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get top-K pods per namespace and per node plus namespace totals.
+        
+        With cluster="*" every cluster is queried concurrently and groups are
+        keyed as "<cluster>/<namespace or node>".
+        """
+        errors: Dict[str, str] = {}
+        if cluster == ALL_CLUSTERS:
+            results, errors = await cluster_registry.fan_out(self.get_pod_usage)
+            usage = [
+                dict(pod, cluster=name)
+                for name, cluster_usage in results.items()
+                for pod in cluster_usage
+            ]
+        else:
+            usage = await self.get_pod_usage(cluster_registry.get(cluster))
+        if namespace:
+            usage = [pod for pod in usage if pod["namespace"] == namespace]
+
+        return {
+            "sort_by": sort_by,
+            "k": k,
+            "by_namespace": self.top_pods(usage, "namespace", sort_by, k),
+            "by_node": self.top_pods(usage, "node_name", sort_by, k),
+            "namespace_totals": self.namespace_totals(usage),
+            "pod_count": len(usage),
+            "cluster": cluster or settings.default_cluster,
+            "cluster_errors": errors,
+        }
+
+    def _sum_container_resources(
+        self, containers: List[Dict[str, Any]]
+    ) -> Dict[str, float]:
+        """Sum container requests and limits for a pod."""
+        totals = {
+            "cpu_request": 0.0,
+            "memory_request": 0.0,
+            "cpu_limit": 0.0,
+            "memory_limit": 0.0,
+        }
+        for container in containers:
+            resources = container.get("resources", {})
+            requests = resources.get("requests", {})
+            limits = resources.get("limits", {})
+            totals["cpu_request"] += parse_quantity(requests.get("cpu", "0"))
+            totals["memory_request"] += parse_quantity(requests.get("memory", "0"))
+            totals["cpu_limit"] += parse_quantity(limits.get("cpu", "0"))
+            totals["memory_limit"] += parse_quantity(limits.get("memory", "0"))
+        return totals
+
+    def _group_key(self, pod: Dict[str, Any], group_by: str) -> str:
+        """Group key for a pod, prefixed with its cluster in fan-out results."""
+        key = pod[group_by] or "unknown"
+        return f"{pod['cluster']}/{key}" if "cluster" in pod else key
+
+    def _ratio(self, used: float, reserved: float) -> Optional[float]:
+        """Return used/reserved, or None when nothing is reserved."""
+        if reserved <= 0:
+            return None
+        return round(used / reserved, 4)
+
+    def _sort_field(self, sort_by: str) -> str:
+        """Map a sort key to the usage field it ranks on."""
+        return {
+            "cpu": "cpu_usage_cores",
+            "memory": "memory_usage_bytes",
+            "cpu_request_ratio": "cpu_request_ratio",
+            "memory_request_ratio": "memory_request_ratio",
+        }[sort_by]
+
+
+# Global resource usage service instance
+resource_usage_service = ResourceUsageService()
@@ -0,0 +1,136 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete
+from app.config import settings
+from app.database import ClusterStats, Event, HealthCheck
+from app.services.archive import archive_service
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPolicy(NamedTuple):
+    """Rows of `model` older than `days` (by `timestamp_column`) are deleted."""
+    table: str
+    model: Any
+    timestamp_column: Any
+    days: float
+
+
+class RetentionService:
+    """Service deleting history rows past their retention window.
+
+    Rows go in batches over primary key ranges, each its own short
+    transaction, with a pause in between so locks, WAL and vacuum stay
+    small and other writers keep up. Ids grow with time, so a batch is the
+    next cleanup_batch_size expired ids after a keyset cursor; the cursor is
+    handed to the caller after every batch to resume an interrupted run.
+    With an archive directory configured, each batch is archived (see
+    ArchiveService) before it is deleted.
+    """
+
+    def policies(self) -> List[RetentionPolicy]:
+        """Retention windows from settings, one per history table."""
+        return [
+            RetentionPolicy(
+                "cluster_stats",
+                ClusterStats,
+                ClusterStats.timestamp,
+                settings.cluster_stats_retention_days,
+            ),
+            RetentionPolicy(
+                "health_checks",
+                HealthCheck,
+                HealthCheck.checked_at,
+                settings.health_check_retention_days,
+            ),
+            RetentionPolicy(
+                "events", Event, Event.last_seen, settings.events_retention_days
+            ),
+        ]
+
+    async def purge(
+        self,
+        db: AsyncSession,
+        policy: RetentionPolicy,
+        after_id: int = 0,
+        deadline: Optional[float] = None,
+        on_batch: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """Delete a table's expired rows with ids above `after_id`.
+
+        Stops early once time.monotonic() passes `deadline`. `on_batch` is
+        called with (last id, rows deleted so far) after each committed batch.
+        Returns rows deleted, batches, bytes archived, the last id handled
+        and whether the table is done.
+        """
+        model = policy.model
+        cutoff = datetime.utcnow() - timedelta(days=policy.days)
+        deleted = 0
+        batches = 0
+        archived_bytes = 0
+        complete = False
+
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            result = await db.execute(
+                select(model.id)
+                .where(model.id > after_id, policy.timestamp_column < cutoff)
+                .order_by(model.id)
+                .limit(settings.cleanup_batch_size)
+            )
+            ids = result.scalars().all()
+            if not ids:
+                complete = True
+                break
+
+            # Newer rows inside the id range stay: the cutoff is checked again
+            in_batch = (
+                model.id >= ids[0],
+                model.id <= ids[-1],
+                policy.timestamp_column < cutoff,
+            )
+            if archive_service.enabled:
+                result = await db.execute(
+                    select(model.__table__).where(*in_batch).order_by(model.id)
+                )
+                rows = [dict(row._mapping) for row in result]
+                archived_bytes += await asyncio.to_thread(
+                    archive_service.write,
+                    policy.table,
+                    policy.timestamp_column.key,
+                    rows,
+                )
+            result = await db.execute(delete(model).where(*in_batch))
+            await db.commit()
+            deleted += result.rowcount
+            batches += 1
+            after_id = ids[-1]
+            if on_batch is not None:
+                on_batch(after_id, deleted)
+
+            if len(ids) < settings.cleanup_batch_size:
+                complete = True
+                break
+            await asyncio.sleep(settings.cleanup_batch_pause)
+
+        logger.info(
+            f"Retention for {policy.table}: {deleted} rows older than "
+            f"{policy.days} days deleted "
+            f"in {batches} batches{'' if complete else f', stopped at id {after_id}'}"
+        )
+        return {
+            "deleted": deleted,
+            "batches": batches,
+            "archived_bytes": archived_bytes,
+            "last_id": after_id,
+            "complete": complete
+        }
+
+
+# Global retention service instance
+retention_service = RetentionService()
@@ -0,0 +1,213 @@
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import contextlib
+import time
+
+from app.config import settings
+
+# Phases in Server-Timing order; anything else recorded is appended after them
+PHASES = ("k8s", "serialize", "db", "encode", "compress")
+
+
+class RequestTimer:
+    """Seconds spent per phase during one request.
+
+    Work running concurrently within a request (e.g. a cluster fan-out) adds
+    up, so a phase can exceed the request's total time.
+    """
+
+    __slots__ = ("phases",)
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def server_timing(self, total: float) -> bytes:
+        """Server-Timing header value, durations in milliseconds."""
+        names = [name for name in PHASES if name in self.phases]
+        names.extend(name for name in self.phases if name not in PHASES)
+        parts = [f"{name};dur={self.phases[name] * 1000:.2f}" for name in names]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts).encode("latin-1")
+
+
+# Timer of the request being handled; None outside a timed request
+_current_timer: ContextVar[Optional[RequestTimer]] = ContextVar(
+    "request_timer", default=None
+)
+
+
+class _Phase:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer: RequestTimer, name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+
+
+_NOT_TIMED = contextlib.nullcontext()
+
+
+def phase(name: str):
+    """Time a block into the current request's `name` phase.
+
+    Outside a timed request (timing disabled, background tasks) this returns
+    a shared no-op context manager.
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        return _NOT_TIMED
+    return _Phase(timer, name)
+
+
+def record(name: str, seconds: float):
+    """Add `seconds` to the current request's `name` phase, if it is timed."""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+class TimingStats:
+    """Rolling request timings: the last `window` requests of each route."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._routes: Dict[str, Deque[Tuple[float, Dict[str, float]]]] = {}
+
+    def observe(self, route: str, total: float, phases: Dict[str, float]):
+        samples = self._routes.get(route)
+        if samples is None:
+            samples = self._routes[route] = deque(maxlen=self.window)
+        samples.append((total, phases))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per route: request count in the window, latency percentiles and phase stats.
+
+        Phases report their mean and p95.
+        """
+        routes = {}
+        for route, samples in sorted(self._routes.items()):
+            totals = sorted(total for total, _ in samples)
+            mean_total = sum(totals) / len(totals)
+            names = {name for _, phases in samples for name in phases}
+            phase_stats = {}
+            ordered = [n for n in PHASES if n in names]
+            for name in ordered + sorted(names.difference(PHASES)):
+                values = sorted(phases.get(name, 0.0) for _, phases in samples)
+                mean = sum(values) / len(values)
+                phase_stats[name] = {
+                    "mean_ms": round(mean * 1000, 3),
+                    "p95_ms": round(_percentile(values, 0.95) * 1000, 3),
+                    "share": round(mean / mean_total, 3) if mean_total else None,
+                }
+            routes[route] = {
+                "count": len(totals),
+                "p50_ms": round(_percentile(totals, 0.50) * 1000, 3),
+                "p95_ms": round(_percentile(totals, 0.95) * 1000, 3),
+                "p99_ms": round(_percentile(totals, 0.99) * 1000, 3),
+                "max_ms": round(totals[-1] * 1000, 3),
+                "phases": phase_stats,
+            }
+        return routes
+
+    def clear(self):
+        self._routes.clear()
+
+
+# Global rolling timing stats instance
+timing_stats = TimingStats(settings.timing_window)
+
+
+class TimingMiddleware:
+    """ASGI middleware that times each request by phase.
+
+    Adds a Server-Timing header and feeds timing_stats, keyed by method and
+    route template. Only installed when settings.timing_enabled is set; add
+    it last so compression is included.
+    """
+
+    def __init__(self, app, stats: TimingStats = timing_stats):
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = RequestTimer()
+        token = _current_timer.set(timer)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers") or [])
+                elapsed = time.perf_counter() - start
+                headers.append((b"server-timing", timer.server_timing(elapsed)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_timer.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                self.stats.observe(
+                    _route_key(scope, route.path),
+                    time.perf_counter() - start,
+                    timer.phases,
+                )
+
+
+def _route_key(scope, template: str) -> str:
+    """Method and full route template, e.g. "GET /api/v1/pods/{pod_name}".
+
+    Depending on the FastAPI version, routes from an included router report
+    their template without the router prefix; it is taken from the path.
+    """
+    missing = scope["path"].rstrip("/").count("/") - template.rstrip("/").count("/")
+    if missing > 0:
+        template = "/".join(scope["path"].split("/")[:missing + 1]) + template
+    return f"{scope['method']} {template}"
+
+
+def instrument_engine(engine):
+    """Record time spent executing statements on `engine` as the "db" phase."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("timing_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        record("db", time.perf_counter() - conn.info["timing_started"].pop())
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _handle_error(context):
+        started = (
+            context.connection.info.get("timing_started")
+            if context.connection is not None
+            else None
+        )
+        if started:
+            record("db", time.perf_counter() - started.pop())
@@ -1,7 +1,13 @@
 from celery import Celery
 from celery.schedules import crontab
+from kombu import Queue
+from kombu.serialization import registry
 from app.config import settings
+from app.responses import packb
+from app.workers.scheduling import JitteredSchedule
+import functools
 import logging
+import msgpack
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +19,22 @@ celery_app = Celery(
     include=["app.workers.tasks"]
 )
 
+# Task messages and results go as MessagePack, which is smaller and cheaper
+# to encode than JSON. Datetimes are sent as ISO strings, as in API responses.
+registry.register(
+    "msgpack",
+    packb,
+    functools.partial(msgpack.unpackb, raw=False),
+    content_type="application/x-msgpack",
+    content_encoding="binary"
+)
+
 # Celery configuration
 celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    task_serializer="msgpack",
+    accept_content=["msgpack", "json"],  # json: messages queued before the switch
+    result_serializer="msgpack",
+    result_expires=3600,  # results are only kept for inspection
     timezone="UTC",
     enable_utc=True,
     task_track_started=True,
@@ -27,19 +44,49 @@ celery_app.conf.update(
     worker_max_tasks_per_child=1000,
 )
 
-# Periodic tasks schedule
+# Each kind of work has its own queue, so workers can be sized per queue and a
+# long cleanup never holds up health checks:
+#   interactive - on-demand tasks (the default queue)
+#   periodic    - monitoring cycles, including health check shards
+#   maintenance - data cleanup
+celery_app.conf.task_queues = (
+    Queue("interactive"),
+    Queue("periodic"),
+    Queue("maintenance"),
+)
+celery_app.conf.task_default_queue = "interactive"
+celery_app.conf.task_routes = {
+    "app.workers.tasks.collect_cluster_stats": {"queue": "periodic"},
+    "app.workers.tasks.perform_health_checks": {"queue": "periodic"},
+    "app.workers.tasks.check_health_shard": {"queue": "periodic"},
+    "app.workers.tasks.finish_health_checks": {"queue": "periodic"},
+    "app.workers.tasks.cleanup_old_data": {"queue": "maintenance"},
+}
+
+# Periodic tasks schedule. Runs are jittered so tasks don't start in lockstep,
+# and expire after one period: a run still queued by then is dropped instead
+# of running back-to-back with the next one.
 celery_app.conf.beat_schedule = {
     "collect-cluster-stats": {
         "task": "app.workers.tasks.collect_cluster_stats",
-        "schedule": settings.cluster_stats_interval,  # seconds
+        "schedule": JitteredSchedule(
+            settings.cluster_stats_interval,
+            settings.cluster_stats_interval * settings.schedule_jitter,
+        ),
+        "options": {"expires": settings.cluster_stats_interval},
     },
     "perform-health-checks": {
         "task": "app.workers.tasks.perform_health_checks",
-        "schedule": settings.health_check_interval,  # seconds
+        "schedule": JitteredSchedule(
+            settings.health_check_interval,
+            settings.health_check_interval * settings.schedule_jitter,
+        ),
+        "options": {"expires": settings.health_check_interval},
     },
     "cleanup-old-data": {
         "task": "app.workers.tasks.cleanup_old_data",
         "schedule": crontab(hour=2, minute=0),  # Daily at 2 AM
+        "options": {"expires": 3600},
     },
 }
 
@@ -0,0 +1,251 @@
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+import functools
+import logging
+import random
+import threading
+import time
+
+from celery.schedules import schedule
+import redis
+from redis.exceptions import LockError, RedisError
+from redis.lock import Lock
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "periodic"
+
+_redis_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Synchronous Redis client for worker-side coordination."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.redis_url, socket_timeout=5)
+    return _redis_client
+
+
+class JitteredSchedule(schedule):
+    """Fixed-interval beat schedule, each run delayed by a random 0..jitter seconds.
+
+    The delay is derived from the previous run time, so it stays the same
+    however often beat re-checks the entry, and differs from run to run.
+    """
+
+    def __init__(
+        self,
+        run_every,
+        jitter: float = 0.0,
+        relative: bool = False,
+        nowfun=None,
+        app=None,
+    ):
+        super().__init__(run_every, relative=relative, nowfun=nowfun, app=app)
+        self.jitter = jitter
+
+    def remaining_estimate(self, last_run_at) -> timedelta:
+        offset = 0.0
+        if self.jitter > 0:
+            offset = random.Random(last_run_at.timestamp()).uniform(0, self.jitter)
+        return super().remaining_estimate(last_run_at) + timedelta(seconds=offset)
+
+    def __reduce__(self):
+        return self.__class__, (self.run_every, self.jitter, self.relative, self.nowfun)
+
+    def __repr__(self) -> str:
+        return (
+            f"<JitteredSchedule: every {self.human_seconds}, "
+            f"up to {self.jitter:.1f}s late>"
+        )
+
+
+class _LockKeeper(threading.Thread):
+    """Extends a lock's expiry while its task runs; only a dead worker's lock lapses."""
+
+    def __init__(self, lock: Lock, name: str):
+        super().__init__(name=f"lock-keeper-{name}", daemon=True)
+        self.lock = lock
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.lock.timeout / 3):
+            try:
+                self.lock.reacquire()
+            except (LockError, RedisError) as e:
+                logger.warning(f"Could not extend {self.lock.name}: {e}")
+                return
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class PeriodicGuard:
+    """Singleton lock and adaptive spacing for one periodic task.
+
+    A run is skipped when another worker holds the task's lock, or when
+    the last run started less than the current interval ago (minus half the
+    base interval, to absorb beat jitter and queueing). After each run the
+    interval is stretched to backoff_factor x the cycle time, so a cycle never
+    takes more than 1/factor of its period; it returns to the base interval
+    once cycles are fast again.
+    """
+
+    def __init__(self, name: str, base_interval: Optional[float] = None):
+        self.name = name
+        self.base_interval = base_interval
+        self.state_key = f"{KEY_PREFIX}:{name}"
+        self._lock: Optional[Lock] = None
+        self._keeper: Optional[_LockKeeper] = None
+        self._started = 0.0
+        self._handed_off = False
+
+    def enter(self) -> Optional[str]:
+        """Claim this run; return why it should be skipped, or None to go ahead."""
+        self._started = time.time()
+        try:
+            client = get_redis()
+            if self.base_interval:
+                state = client.hgetall(self.state_key)
+                last_started = float(state.get(b"started_at", 0))
+                interval = float(state.get(b"interval", self.base_interval))
+                if self._started < last_started + interval - self.base_interval / 2:
+                    return "backoff"
+
+            lock = self._make_lock()
+            if not lock.acquire():
+                return "running"
+            self._lock = lock
+            if self.base_interval:
+                client.hset(self.state_key, "started_at", self._started)
+        except RedisError as e:
+            # Redis is also the broker, so this is rare; run rather than silently
+            # stop monitoring
+            logger.warning(
+                f"Periodic guard for {self.name} unavailable, running unguarded: {e}"
+            )
+            return None
+
+        self._keeper = _LockKeeper(self._lock, self.name)
+        self._keeper.start()
+        return None
+
+    def _make_lock(self) -> Lock:
+        return get_redis().lock(
+            f"{self.state_key}:lock",
+            timeout=settings.schedule_lock_ttl,
+            blocking=False,
+            thread_local=False
+        )
+
+    def hand_off(self, ttl: float) -> Optional[Dict[str, Any]]:
+        """Pass the run on to a follow-up task, e.g. a chord callback.
+
+        The follow-up must call finish_handed_off. The lock stops being renewed
+        and is set to expire in `ttl` seconds, in case the follow-up never
+        runs. Returns None when running unguarded.
+        """
+        if self._lock is None:
+            return None
+        if self._keeper is not None:
+            self._keeper.stop()
+            self._keeper = None
+        try:
+            self._lock.extend(ttl, replace_ttl=True)
+        except (LockError, RedisError) as e:
+            logger.warning(f"Could not hand off periodic guard for {self.name}: {e}")
+            return None
+        self._handed_off = True
+        return {
+            "name": self.name,
+            "base_interval": self.base_interval,
+            "started": self._started,
+            "token": self._lock.local.token.decode(),
+        }
+
+    @classmethod
+    def resume(cls, state: Dict[str, Any]) -> "PeriodicGuard":
+        """Take over a run handed off with hand_off()."""
+        guard = cls(state["name"], state["base_interval"])
+        guard._started = state["started"]
+        guard._lock = guard._make_lock()
+        guard._lock.local.token = state["token"].encode()
+        return guard
+
+    def exit(self):
+        """Record the cycle time, adapt the interval and release the lock."""
+        if self._handed_off:
+            return
+        duration = time.time() - self._started
+        if self._keeper is not None:
+            self._keeper.stop()
+        try:
+            if self.base_interval and self._lock is not None:
+                interval = min(
+                    self.base_interval * settings.schedule_max_backoff,
+                    max(self.base_interval, duration * settings.schedule_backoff_factor)
+                )
+                if interval > self.base_interval:
+                    logger.warning(
+                        f"{self.name} took {duration:.1f}s of its "
+                        f"{self.base_interval}s period, "
+                        f"next run in {interval:.0f}s"
+                    )
+                get_redis().hset(
+                    self.state_key, mapping={"duration": duration, "interval": interval}
+                )
+            if self._lock is not None:
+                self._lock.release()
+        except (LockError, RedisError) as e:
+            logger.warning(f"Could not release periodic guard for {self.name}: {e}")
+
+
+# Guard of the periodic task running in this thread
+_current_guard: ContextVar[Optional[PeriodicGuard]] = ContextVar(
+    "periodic_guard", default=None
+)
+
+
+def hand_off(ttl: float) -> Optional[Dict[str, Any]]:
+    """Hand the current periodic run on to a follow-up task; see PeriodicGuard.hand_off.
+
+    The run then counts as in progress, and its cycle time is measured, until
+    the follow-up calls finish_handed_off() with the returned state.
+    """
+    guard = _current_guard.get()
+    return guard.hand_off(ttl) if guard is not None else None
+
+
+def finish_handed_off(state: Optional[Dict[str, Any]]):
+    """Finish a run passed on with hand_off(); None (an unguarded run) is ignored."""
+    if state:
+        PeriodicGuard.resume(state).exit()
+
+
+def periodic(name: str, base_interval: Optional[Callable[[], float]] = None):
+    """Decorate a bound Celery task so at most one run is in flight cluster-wide.
+
+    `base_interval` returns the beat interval in seconds and enables adaptive
+    spacing; leave it out for cron-scheduled tasks. Skipped runs return
+    {"status": "skipped", "reason": ...}.
+    """
+    def decorator(run: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(run)
+        def wrapper(task, *args, **kwargs):
+            guard = PeriodicGuard(name, base_interval() if base_interval else None)
+            reason = guard.enter()
+            if reason is not None:
+                logger.info(f"Skipping {name}: {reason}")
+                return {"status": "skipped", "reason": reason}
+            token = _current_guard.set(guard)
+            try:
+                return run(task, *args, **kwargs)
+            finally:
+                _current_guard.reset(token)
+                guard.exit()
+        return wrapper
+    return decorator
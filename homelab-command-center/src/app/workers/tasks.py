@@ -1,17 +1,65 @@
-from celery import current_task
+from celery import chord, current_task
+from celery.exceptions import SoftTimeLimitExceeded
+from redis.exceptions import RedisError
 from sqlalchemy.ext.asyncio import AsyncSession
+import functools
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
+import asyncio
+import time
 
+from app.config import settings
 from app.workers.celery_app import celery_app
-from app.database import async_session, ClusterStats, HealthCheck
+from app.workers.scheduling import finish_handed_off, get_redis, hand_off, periodic
+from app.database import async_session, dispose_engine
+from app.services.admission import priority as kube_priority
 from app.services.cluster_monitoring import cluster_monitoring_service
 from app.services.health_check import health_check_service
+from app.services.archive import archive_service
+from app.services.retention import retention_service
 
 logger = logging.getLogger(__name__)
 
+# Task results are summaries; per-resource checks and stats details are in the database
+HEALTH_SUMMARY_FIELDS = (
+    "overall_status",
+    "total_checks",
+    "healthy",
+    "warning",
+    "unhealthy",
+    "checked",
+    "shards",
+    "error",
+    "checked_at",
+)
+
+
+def _summary(result, fields=None, exclude=()):
+    """The part of a service result worth keeping in the result backend."""
+    return {
+        key: value for key, value in result.items()
+        if (fields is None or key in fields) and key not in exclude
+    }
+
+
+def _run(coro):
+    """Run a task's async body on a fresh event loop.
+    
+    Pooled database connections belong to the loop that opened them, so the
+    engine is disposed before asyncio.run() closes the loop; otherwise the
+    next task in this worker process would get connections from a dead loop.
+    """
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await dispose_engine()
+    
+    return asyncio.run(_main())
+
 
 @celery_app.task(bind=True)
+@periodic("collect_cluster_stats", lambda: settings.cluster_stats_interval)
 def collect_cluster_stats(self):
     """Background task to collect cluster statistics."""
     logger.info("Starting cluster stats collection task")
@@ -20,13 +68,12 @@ def collect_cluster_stats(self):
         # Create async session for the task
         async def _collect_stats():
             async with async_session() as db:
-                stats = await cluster_monitoring_service.collect_cluster_stats(db)
-                logger.info(f"Cluster stats collected: {stats}")
-                return stats
+                with kube_priority("stats"):
+                    stats = await cluster_monitoring_service.collect_cluster_stats(db)
+                return _summary(stats, exclude=("custom_metrics",))
         
         # Run the async function
-        import asyncio
-        result = asyncio.run(_collect_stats())
+        result = _run(_collect_stats())
         
         logger.info("Cluster stats collection task completed successfully")
         return {"status": "success", "data": result}
@@ -38,21 +85,48 @@ def collect_cluster_stats(self):
 
 
 @celery_app.task(bind=True)
+@periodic("perform_health_checks", lambda: settings.health_check_interval)
 def perform_health_checks(self):
-    """Background task to perform health checks."""
+    """Background task to perform health checks.
+    
+    Large clusters are split into shards (see plan_shards) checked in
+    parallel by check_health_shard and combined by finish_health_checks,
+    which also ends the periodic run.
+    """
     logger.info("Starting health checks task")
     
     try:
+        started_at = datetime.utcnow()
+        
+        async def _plan_shards():
+            with kube_priority("health"):
+                return await health_check_service.plan_cluster_shards()
+        
+        shards = _run(_plan_shards())
+        if len(shards) > 1:
+            guard = hand_off(settings.health_shard_timeout + settings.schedule_lock_ttl)
+            chord(
+                check_health_shard.s(shard).set(
+                    soft_time_limit=settings.health_shard_timeout,
+                    time_limit=settings.health_shard_timeout + 10
+                )
+                for shard in shards
+            )(finish_health_checks.s(started_at.isoformat(), guard))
+            logger.info(f"Health checks dispatched in {len(shards)} shards")
+            return {"status": "dispatched", "shards": len(shards)}
+        
         # Create async session for the task
         async def _perform_checks():
             async with async_session() as db:
-                health_result = await health_check_service.perform_cluster_health_check(db)
+                with kube_priority("health"):
+                    health_result = (
+                        await health_check_service.perform_cluster_health_check(db)
+                    )
                 logger.info(f"Health checks completed: {health_result['overall_status']}")
-                return health_result
+                return _summary(health_result, HEALTH_SUMMARY_FIELDS)
         
         # Run the async function
-        import asyncio
-        result = asyncio.run(_perform_checks())
+        result = _run(_perform_checks())
         
         logger.info("Health checks task completed successfully")
         return {"status": "success", "data": result}
@@ -64,50 +138,132 @@ def perform_health_checks(self):
 
 
 @celery_app.task(bind=True)
+def check_health_shard(self, shard):
+    """Check one shard of a health check pass.
+
+    Errors are reported in the result, so the chord still completes.
+    """
+    try:
+        async def _check_shard():
+            async with async_session() as db:
+                with kube_priority("health"):
+                    return await health_check_service.check_shard(db, shard)
+        
+        return _run(_check_shard())
+        
+    except SoftTimeLimitExceeded:
+        logger.error(f"Health check shard {shard['namespaces']} timed out")
+        return {"error": f"timed out after {settings.health_shard_timeout}s"}
+
+
+@celery_app.task(bind=True)
+def finish_health_checks(self, summaries, started_at, guard=None):
+    """Chord callback combining health check shards into the cluster status."""
+    try:
+        async def _combine():
+            async with async_session() as db:
+                return await health_check_service.combine_shards(
+                    db, summaries, datetime.fromisoformat(started_at)
+                )
+        
+        result = _run(_combine())
+        return {"status": "success", "data": result}
+        
+    finally:
+        finish_handed_off(guard)
+
+
+def _cleanup_cursor_key(table):
+    return f"cleanup:{table}"
+
+
+def _load_cleanup_cursor(table):
+    """Last id handled by an interrupted cleanup of `table`, or 0."""
+    try:
+        return int(get_redis().get(_cleanup_cursor_key(table)) or 0)
+    except RedisError as e:
+        logger.warning(f"Could not read cleanup cursor for {table}, starting over: {e}")
+        return 0
+
+
+def _save_cleanup_cursor(table, last_id):
+    """Remember how far cleanup of `table` got; None clears it once it is done."""
+    try:
+        if last_id is None:
+            get_redis().delete(_cleanup_cursor_key(table))
+        else:
+            get_redis().set(_cleanup_cursor_key(table), last_id, ex=7 * 24 * 3600)
+    except RedisError as e:
+        logger.warning(f"Could not save cleanup cursor for {table}: {e}")
+
+
+@celery_app.task(bind=True)
+@periodic("cleanup_old_data")
 def cleanup_old_data(self):
-    """Background task to cleanup old data."""
+    """Background task to cleanup old data.
+    
+    Deletes in batches (see RetentionService) and reports progress as the
+    PROGRESS task state. A run stops after cleanup_max_runtime and queues a
+    follow-up that resumes from the saved cursor.
+    """
     logger.info("Starting data cleanup task")
     
     try:
+        progress = {}
+        reporting = True
+        
+        def _report(table, last_id, deleted):
+            nonlocal reporting
+            _save_cleanup_cursor(table, last_id)
+            progress[table] = {"deleted": deleted, "last_id": last_id}
+            if not reporting:
+                return
+            try:
+                self.update_state(state="PROGRESS", meta=progress)
+            except RedisError as e:
+                # Progress is informational; an unreachable result backend
+                # mustn't fail the cleanup
+                logger.warning(
+                    f"Could not report cleanup progress, continuing without it: {e}"
+                )
+                reporting = False
+        
         # Create async session for the task
         async def _cleanup_data():
+            deadline = time.monotonic() + settings.cleanup_max_runtime
             async with async_session() as db:
-                # Clean up old cluster stats (keep last 7 days)
-                cutoff_date = datetime.utcnow() - timedelta(days=7)
-                
-                from sqlalchemy import delete
-                
-                # Delete old cluster stats
-                result = await db.execute(
-                    delete(ClusterStats).where(ClusterStats.timestamp < cutoff_date)
-                )
-                stats_deleted = result.rowcount
-                
-                # Delete old health checks (keep last 3 days)
-                health_cutoff = datetime.utcnow() - timedelta(days=3)
-                result = await db.execute(
-                    delete(HealthCheck).where(HealthCheck.checked_at < health_cutoff)
-                )
-                health_deleted = result.rowcount
-                
-                await db.commit()
-                
-                logger.info(f"Cleanup completed: {stats_deleted} stats, {health_deleted} health checks deleted")
-                return {
-                    "stats_deleted": stats_deleted,
-                    "health_checks_deleted": health_deleted
-                }
+                for policy in retention_service.policies():
+                    result = await retention_service.purge(
+                        db,
+                        policy,
+                        after_id=_load_cleanup_cursor(policy.table),
+                        deadline=deadline,
+                        on_batch=functools.partial(_report, policy.table)
+                    )
+                    progress[policy.table] = result
+                    if not result["complete"]:
+                        return False
+                    _save_cleanup_cursor(policy.table, None)
+            await asyncio.to_thread(archive_service.prune)
+            return True
         
         # Run the async function
-        import asyncio
-        result = asyncio.run(_cleanup_data())
+        complete = _run(_cleanup_data())
+        
+        if not complete:
+            logger.info(
+                f"Data cleanup stopped after {settings.cleanup_max_runtime}s, "
+                f"continuing in a follow-up run"
+            )
+            cleanup_old_data.apply_async(countdown=60)
+            return {"status": "partial", "data": progress}
         
         logger.info("Data cleanup task completed successfully")
-        return {"status": "success", "data": result}
+        return {"status": "success", "data": progress}
         
     except Exception as e:
         logger.error(f"Error in data cleanup task: {e}")
-        # Retry the task with exponential backoff
+        # Retry the task with exponential backoff; it resumes from the saved cursor
         raise self.retry(exc=e, countdown=300, max_retries=2)  # 5 minute retry for cleanup
 
 
@@ -125,7 +281,8 @@ def sync_kubernetes_resources(self):
                 from sqlalchemy import select, update, insert
                 
                 # Sync nodes
-                nodes = await k8s_client.get_nodes()
+                with kube_priority("sync"):
+                    nodes = await k8s_client.get_nodes()
                 for node_data in nodes:
                     # Check if node exists
                     result = await db.execute(
@@ -166,8 +323,7 @@ def sync_kubernetes_resources(self):
                 return {"nodes_synced": len(nodes)}
         
         # Run the async function
-        import asyncio
-        result = asyncio.run(_sync_resources())
+        result = _run(_sync_resources())
         
         logger.info("Kubernetes resources sync task completed successfully")
         return {"status": "success", "data": result}
@@ -0,0 +1 @@
+"""Offline benchmarks for the HomeLab Command Center hot paths."""
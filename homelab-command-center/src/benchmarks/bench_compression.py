@@ -0,0 +1,56 @@
+"""
+Measure response compression for large JSON snapshots.
+
+Reports bytes on the wire, compression ratio and server CPU time per
+encoding and level for pod list payloads.
+
+Usage (from src/):
+    uv run python -m benchmarks.bench_compression [pods]
+"""
+
+import gzip
+import sys
+import time
+
+import brotli
+import zstandard
+
+from app.responses import dumps
+from benchmarks.bench_encoding import make_pods
+
+LEVELS = {
+    "gzip": [1, 6, 9],
+    "br": [1, 4, 6, 9, 11],
+    "zstd": [1, 3, 9, 19],
+}
+
+COMPRESSORS = {
+    "gzip": lambda body, level: gzip.compress(body, compresslevel=level, mtime=0),
+    "br": lambda body, level: brotli.compress(body, quality=level),
+    "zstd": lambda body, level: zstandard.ZstdCompressor(level=level).compress(body),
+}
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    body = dumps({"pods": make_pods(count), "count": count, "namespace": None})
+    print(f"{count} pods, {len(body) / 1e6:.2f} MB uncompressed")
+    print(
+        f"{'encoding':<9} {'level':>5} {'wire bytes':>12} {'ratio':>7} "
+        f"{'cpu ms':>9} {'MB/s':>8}"
+    )
+
+    for encoding, levels in LEVELS.items():
+        for level in levels:
+            start = time.process_time()
+            compressed = COMPRESSORS[encoding](body, level)
+            cpu = time.process_time() - start
+            print(
+                f"{encoding:<9} {level:>5} {len(compressed):>12,} "
+                f"{len(body) / len(compressed):>6.1f}x "
+                f"{cpu * 1000:>9.1f} {len(body) / max(cpu, 1e-9) / 1e6:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark response encoding for large pod list payloads.
+
+Compares FastAPI's default path (jsonable_encoder + stdlib json, as
+JSONResponse renders it) against orjson, MessagePack and the pre-encoded
+snapshot cache, plus client-side decode time for each wire format.
+
+Usage (from src/):
+    uv run python -m benchmarks.bench_encoding [sizes...]
+"""
+
+import json
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+import msgpack
+import orjson
+
+from app.responses import SnapshotCache, dumps, packb
+
+
+def make_pods(count: int) -> list:
+    """Build `count` pods shaped like KubernetesClient._serialize_pod output."""
+    pods = []
+    for i in range(count):
+        app_name = f"app-{i % 200}"
+        pods.append({
+            "name": f"{app_name}-{i:08x}",
+            "namespace": f"namespace-{i % 40}",
+            "node_name": f"node-{i % 100}",
+            "status": "Running",
+            "phase": "Running",
+            "restart_count": i % 7,
+            "ready": i % 13 != 0,
+            "containers": [
+                {
+                    "name": "app",
+                    "image": f"registry.local/{app_name}:1.{i % 9}.0",
+                    "ports": [{"port": 8080, "protocol": "TCP"}],
+                    "resources": {
+                        "requests": {"cpu": "100m", "memory": "128Mi"},
+                        "limits": {"cpu": "500m", "memory": "512Mi"},
+                    },
+                }
+            ],
+            "labels": {
+                "app": app_name,
+                "tier": "backend",
+                "pod-template-hash": f"{i:08x}",
+            },
+            "annotations": {
+                "kubectl.kubernetes.io/restartedAt": "2025-01-01T00:00:00Z"
+            },
+        })
+    return pods
+
+
+def _stdlib_render(content) -> bytes:
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 50_000]
+    print(
+        f"{'pods':>7} {'encoder':<21} {'time':>10} {'MB/s':>9} {'req/s':>9} "
+        f"{'size':>10}"
+    )
+    for size in sizes:
+        pods = make_pods(size)
+        content = {"pods": pods, "count": len(pods), "namespace": None}
+        cache = SnapshotCache()
+        cache.get_or_encode("pods", pods, lambda: content)
+        json_body = dumps(content)
+        msgpack_body = packb(content)
+
+        cases = [
+            ("jsonable_encoder+json", len(json_body), lambda: _stdlib_render(content)),
+            ("orjson", len(json_body), lambda: dumps(content)),
+            ("msgpack", len(msgpack_body), lambda: packb(content)),
+            (
+                "snapshot cache hit",
+                len(json_body),
+                lambda: cache.get_or_encode("pods", pods, lambda: content),
+            ),
+            ("decode json (stdlib)", len(json_body), lambda: json.loads(json_body)),
+            ("decode json (orjson)", len(json_body), lambda: orjson.loads(json_body)),
+            (
+                "decode msgpack",
+                len(msgpack_body),
+                lambda: msgpack.unpackb(msgpack_body),
+            ),
+        ]
+        for label, body_size, fn in cases:
+            elapsed = _time(fn, repeat=3 if size >= 50_000 else 5)
+            print(
+                f"{size:>7} {label:<21} {elapsed * 1000:>8.2f}ms "
+                f"{body_size / elapsed / 1e6:>9.1f} {1 / elapsed:>9.1f} "
+                f"{body_size / 1e6:>8.2f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
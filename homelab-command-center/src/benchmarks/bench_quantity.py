@@ -0,0 +1,55 @@
+"""
+Benchmark the Kubernetes resource quantity parser.
+
+Usage (from src/):
+    uv run python -m benchmarks.bench_quantity [count]
+"""
+
+import random
+import sys
+import time
+
+from app.services.quantity import parse_quantity
+
+SAMPLE_QUANTITIES = [
+    "250m", "1", "2", "3900m", "1500m", "100m",
+    "128Mi", "256Mi", "7.5Gi", "16Gi", "8039828Ki", "1Ti",
+    "123456789n", "35000u", "1k", "2M", "1e3", "12E6",
+]
+
+
+def _generate(count: int, distinct: int) -> list:
+    """Build a workload with `distinct` unique strings, like a real metrics scrape."""
+    rng = random.Random(42)
+    pool = list(SAMPLE_QUANTITIES)
+    while len(pool) < distinct:
+        pool.append(
+            f"{rng.randint(1, 999999)}{rng.choice(['n', 'm', 'Ki', 'Mi', 'Gi', ''])}"
+        )
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def _run(label: str, quantities: list) -> None:
+    parse_quantity.cache_clear()
+    start = time.perf_counter()
+    total = 0.0
+    for quantity in quantities:
+        total += parse_quantity(quantity)
+    elapsed = time.perf_counter() - start
+    info = parse_quantity.cache_info()
+    print(
+        f"{label:<24} {len(quantities):>9} quantities  {elapsed:8.3f}s  "
+        f"{len(quantities) / elapsed / 1e6:6.2f} M/s  "
+        f"hits={info.hits} misses={info.misses}"
+    )
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    _run("low cardinality (500)", _generate(count, 500))
+    _run("high cardinality (50k)", _generate(count, 50_000))
+    _run("uncached (all unique)", [f"{i}Mi" for i in range(count)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark API container time-to-first-request.
+
+Starts `uvicorn app.main:app` in a fresh process, polls /health until it
+answers, then times the first /api/v1/nodes request.
+
+Usage (from src/):
+    uv run python -m benchmarks.bench_startup [runs]
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+PORT = 8765
+BASE_URL = f"http://127.0.0.1:{PORT}"
+
+
+def _measure_import() -> float:
+    """Time `import app.main` in a fresh interpreter."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "import app.main"], check=True, capture_output=True
+    )
+    return time.perf_counter() - start
+
+
+def _measure_startup() -> tuple:
+    """Return (seconds until /health answers, seconds for the first /api/v1/nodes)."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(PORT),
+            "--log-level",
+            "warning",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=BASE_URL, timeout=5) as http:
+            while True:
+                try:
+                    if http.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.01)
+                if time.perf_counter() - start > 60:
+                    raise RuntimeError("API did not start within 60s")
+            ready = time.perf_counter() - start
+
+            first_start = time.perf_counter()
+            http.get("/api/v1/nodes")
+            first_request = time.perf_counter() - first_start
+        return ready, first_request
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    imports = [_measure_import() for _ in range(runs)]
+    startups = [_measure_startup() for _ in range(runs)]
+
+    imported = statistics.median(imports)
+    health = statistics.median(s[0] for s in startups)
+    first_nodes = statistics.median(s[1] for s in startups)
+    print(f"import app.main           median {imported * 1000:8.1f} ms")
+    print(f"time to /health           median {health * 1000:8.1f} ms")
+    print(f"first /api/v1/nodes       median {first_nodes * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
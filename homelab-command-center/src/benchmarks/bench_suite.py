@@ -0,0 +1,416 @@
+"""
+End-to-end benchmark suite for the API, the periodic cycles and persistence.
+
+For each cluster size, starts the fake apiserver (benchmarks.fake_apiserver)
+on a generated cluster and measures, against a fresh schema:
+
+  - /api/v1/nodes, /pods, /services throughput and p50/p99 latency, through
+    a uvicorn process of app.main:app;
+  - perform_cluster_health_check and collect_cluster_stats cycle time;
+  - sync_kubernetes_resources rows/sec, first run (inserts) and re-runs (updates);
+  - cleanup_old_data duration over seeded expired history.
+
+The Kubernetes list cache and active probing are disabled for the cycles, so
+every cycle pays for its apiserver round trips as it would every 30-60s in
+production. Results are written as JSON to compare across commits.
+
+Usage (from src/):
+    uv run python -m benchmarks.bench_suite --sizes 1000 10000 --output before.json
+    uv run python -m benchmarks.bench_suite --database-url postgresql+asyncpg://bench@localhost/bench_scratch
+
+The default database is a throwaway SQLite file. A --database-url must point
+at a scratch database: the suite drops and recreates the app's tables.
+"""
+
+import argparse
+import asyncio
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List
+
+import httpx
+import orjson
+
+from app.config import settings
+
+API_ENDPOINTS = ("/api/v1/nodes", "/api/v1/pods", "/api/v1/services")
+INSERT_BATCH = 5_000
+
+
+def cluster_shape(pods: int) -> Dict[str, int]:
+    """Node, service and namespace counts for a cluster of `pods` pods.
+
+    The ratios are homelab-ish.
+    """
+    services = max(10, pods // 20)
+    return {
+        "nodes": max(3, pods // 100),
+        "pods": pods,
+        "services": services,
+        "namespaces": max(5, pods // 500),
+        "apps": services,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url: str, process: subprocess.Popen, timeout: float):
+    """Poll `url` until it answers 200, failing early if `process` exits."""
+    deadline = time.monotonic() + timeout
+    with httpx.Client(timeout=5) as http:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(
+                    f"{process.args[2]} exited with code {process.returncode}"
+                )
+            try:
+                if http.get(url).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            time.sleep(0.05)
+    raise RuntimeError(f"{url} did not answer within {timeout:.0f}s")
+
+
+@contextmanager
+def _process(
+    args: List[str], ready_url: str, env: Dict[str, str], timeout: float = 300
+) -> Iterator[None]:
+    """Run a Python module in a subprocess until the block exits."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", *args],
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_for(ready_url, process, timeout)
+        yield
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def _timings(samples: List[float]) -> Dict[str, Any]:
+    return {
+        "runs": len(samples),
+        "min_s": round(min(samples), 4),
+        "median_s": round(statistics.median(samples), 4),
+        "max_s": round(max(samples), 4),
+    }
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+async def _reset_schema():
+    from app.database import Base, dispose_engine, get_engine
+
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await dispose_engine()
+
+
+async def _time_cycles(cycle: Callable, runs: int) -> List[float]:
+    """Time `cycle(db)` `runs` times, each on its own session."""
+    from app.database import async_session, dispose_engine
+
+    samples = []
+    for _ in range(runs):
+        async with async_session() as db:
+            start = time.perf_counter()
+            await cycle(db)
+            samples.append(time.perf_counter() - start)
+    await dispose_engine()
+    return samples
+
+
+def bench_cycles(runs: int) -> Dict[str, Any]:
+    from app.services.cluster_monitoring import cluster_monitoring_service
+    from app.services.health_check import health_check_service
+
+    health_check = health_check_service.perform_cluster_health_check
+    collect_stats = cluster_monitoring_service.collect_cluster_stats
+    return {
+        "health_cycle": _timings(asyncio.run(_time_cycles(health_check, runs))),
+        "stats_cycle": _timings(asyncio.run(_time_cycles(collect_stats, runs))),
+    }
+
+
+def bench_sync(runs: int) -> Dict[str, Any]:
+    """Run the sync task eagerly: the first run inserts every row, the rest update."""
+    from app.workers.tasks import sync_kubernetes_resources
+
+    results = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        outcome = sync_kubernetes_resources.apply(throw=True).get()
+        elapsed = time.perf_counter() - start
+        rows = sum(outcome["data"].values())
+        results.append((rows, elapsed))
+
+    def _rate(subset):
+        rows = sum(r for r, _ in subset)
+        seconds = sum(s for _, s in subset)
+        return {
+            "rows": rows,
+            "seconds": round(seconds, 4),
+            "rows_per_s": round(rows / seconds, 1),
+        }
+
+    summary = {"insert": _rate(results[:1])}
+    if len(results) > 1:
+        summary["update"] = _rate(results[1:])
+    return summary
+
+
+async def _seed_history(health_rows: int, stats_rows: int) -> Dict[str, int]:
+    """Insert expired health checks and cluster stats for cleanup to delete."""
+    from sqlalchemy import insert
+    from app.database import ClusterStats, HealthCheck, async_session, dispose_engine
+
+    health_at = datetime.utcnow() - timedelta(days=4)
+    stats_at = datetime.utcnow() - timedelta(days=8)
+    async with async_session() as db:
+        for offset in range(0, health_rows, INSERT_BATCH):
+            await db.execute(insert(HealthCheck), [
+                {
+                    "resource_type": "pod",
+                    "resource_name": f"seeded-{i}",
+                    "namespace": f"namespace-{i % 20}",
+                    "status": "healthy" if i % 10 else "warning",
+                    "message": "Pod is running and ready",
+                    "details": {"phase": "Running", "restart_count": i % 5},
+                    "checked_at": health_at - timedelta(seconds=i % 86400),
+                }
+                for i in range(offset, min(offset + INSERT_BATCH, health_rows))
+            ])
+        for offset in range(0, stats_rows, INSERT_BATCH):
+            await db.execute(insert(ClusterStats), [
+                {
+                    "timestamp": stats_at - timedelta(minutes=i),
+                    "total_nodes": 10,
+                    "total_pods": 100,
+                }
+                for i in range(offset, min(offset + INSERT_BATCH, stats_rows))
+            ])
+        await db.commit()
+    await dispose_engine()
+    return {"health_checks": health_rows, "cluster_stats": stats_rows}
+
+
+def bench_cleanup(health_rows: int, stats_rows: int) -> Dict[str, Any]:
+    from app.workers.tasks import cleanup_old_data
+
+    seeded = asyncio.run(_seed_history(health_rows, stats_rows))
+    start = time.perf_counter()
+    outcome = cleanup_old_data.apply(throw=True).get()
+    elapsed = time.perf_counter() - start
+    deleted = sum(table["deleted"] for table in outcome["data"].values())
+    return {
+        "seeded": seeded,
+        "deleted": deleted,
+        "seconds": round(elapsed, 4),
+        "rows_per_s": round(deleted / elapsed, 1) if elapsed else None,
+    }
+
+
+async def _load(
+    base_url: str, path: str, requests: int, concurrency: int
+) -> Dict[str, Any]:
+    """Issue `requests` GETs to `path` from `concurrency` workers.
+
+    Latencies include reading the body.
+    """
+    latencies: List[float] = []
+    sizes: List[int] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker(http: httpx.AsyncClient):
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await http.get(path)
+            latencies.append(time.perf_counter() - start)
+            sizes.append(len(response.content))
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as http:
+        await http.get(path)  # warm the client, list cache and encoded snapshot
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "body_bytes": int(statistics.median(sizes)),
+    }
+
+
+def bench_api(
+    kubeconfig: str, database_url: str, requests: int, concurrency: int
+) -> Dict[str, Any]:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {"KUBECONFIG": kubeconfig, "DATABASE_URL": database_url}
+    args = ["uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    with _process(args, f"{base_url}/health", env, timeout=60):
+        return {
+            path: asyncio.run(_load(base_url, path, requests, concurrency))
+            for path in API_ENDPOINTS
+        }
+
+
+def run_size(pods: int, args: argparse.Namespace, workdir: str) -> Dict[str, Any]:
+    from app.database import Base  # noqa: F401 - registers the models before the schema reset
+    from app.services.kubernetes import k8s_client
+
+    shape = cluster_shape(pods)
+    port = _free_port()
+    # One path for every size: the kubernetes package reads KUBECONFIG once, at import
+    kubeconfig = os.path.join(workdir, "kubeconfig")
+    server_args = [
+        "benchmarks.fake_apiserver",
+        "--port",
+        str(port),
+        "--kubeconfig",
+        kubeconfig,
+        "--seed",
+        str(args.seed),
+        *(f"--{option}={value}" for option, value in shape.items()),
+    ]
+    print(f"== {pods} pods: {shape}", flush=True)
+    with _process(server_args, f"http://127.0.0.1:{port}/version", {}):
+        # Point the in-process client at this size's apiserver
+        os.environ["KUBECONFIG"] = kubeconfig
+        k8s_client.close()
+        k8s_client.initialize()
+        asyncio.run(_reset_schema())
+
+        result: Dict[str, Any] = {"cluster": shape}
+        result["sync"] = bench_sync(args.runs)
+        print(f"   sync          {result['sync']}", flush=True)
+        result.update(bench_cycles(args.runs))
+        print(f"   health cycle  {result['health_cycle']}", flush=True)
+        print(f"   stats cycle   {result['stats_cycle']}", flush=True)
+        health_rows = args.history_cycles * (
+            shape["nodes"] + shape["pods"] + shape["services"]
+        )
+        result["cleanup"] = bench_cleanup(health_rows, args.stats_rows)
+        print(f"   cleanup       {result['cleanup']}", flush=True)
+        if args.requests:
+            result["api"] = bench_api(
+                kubeconfig, settings.database_url, args.requests, args.concurrency
+            )
+            for path, load in result["api"].items():
+                print(f"   {path:<18} {load}", flush=True)
+        k8s_client.close()
+    return result
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000],
+        help="cluster sizes, in pods",
+    )
+    parser.add_argument(
+        "--database-url", help="scratch database (default: a temporary SQLite file)"
+    )
+    parser.add_argument(
+        "--runs", type=int, default=3, help="runs per cycle measurement"
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=200,
+        help="requests per API endpoint, 0 skips the API",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--history-cycles",
+        type=int,
+        default=5,
+        help="health cycles of expired history to seed",
+    )
+    parser.add_argument(
+        "--stats-rows",
+        type=int,
+        default=20_000,
+        help="expired cluster_stats rows to seed",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--output", help="results file (default: bench_suite-<commit>.json)"
+    )
+    args = parser.parse_args()
+
+    commit = _git_commit()
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as workdir:
+        settings.database_url = args.database_url or f"sqlite+aiosqlite:///{workdir}/bench.db"
+        settings.kube_list_cache_ttl = 0
+        settings.probe_enabled = False
+
+        results = {
+            "commit": commit,
+            "started_at": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "machine": (
+                f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs"
+            ),
+            "database": settings.database_url.split(":", 1)[0],
+            "runs": args.runs,
+            "sizes": {str(pods): run_size(pods, args, workdir) for pods in args.sizes},
+        }
+
+    output = args.output or f"bench_suite-{commit}.json"
+    with open(output, "wb") as f:
+        f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+Local stand-in Kubernetes apiserver backed by a SyntheticCluster.
+
+Serves what KubernetesClient uses: LIST (with limit/continue pagination
+over a consistent snapshot, like etcd) and WATCH for nodes, pods,
+services, ingresses and events, plus metrics.k8s.io node and pod
+metrics. With --churn-rate, pods change continuously, emitting Events as
+they go, and watchers receive both.
+
+Usage (from src/):
+    uv run python -m benchmarks.fake_apiserver --nodes 500 --pods 50000 \\
+        --services 2000 --churn-rate 50 --kubeconfig /tmp/fake-kubeconfig
+
+Then point the app at it:
+    KUBECONFIG=/tmp/fake-kubeconfig uv run uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import orjson
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from benchmarks.synthetic import SyntheticCluster
+
+LIST_KINDS = {
+    "nodes": ("v1", "NodeList"),
+    "pods": ("v1", "PodList"),
+    "services": ("v1", "ServiceList"),
+    "ingresses": ("networking.k8s.io/v1", "IngressList"),
+    "events": ("v1", "EventList"),
+}
+
+# Paginated LISTs whose snapshot is kept for continue tokens; older ones get 410 Expired
+SNAPSHOTS_KEPT = 32
+
+
+def _json(content: Any, status_code: int = 200) -> Response:
+    return Response(
+        orjson.dumps(content), status_code=status_code, media_type="application/json"
+    )
+
+
+def _status(code: int, reason: str, message: str) -> Dict[str, Any]:
+    return {
+        "kind": "Status",
+        "apiVersion": "v1",
+        "metadata": {},
+        "status": "Failure",
+        "message": message,
+        "reason": reason,
+        "code": code,
+    }
+
+
+def _encode_continue(resource_version: int, snapshot: int, offset: int) -> str:
+    return base64.urlsafe_b64encode(
+        orjson.dumps({"rv": resource_version, "snapshot": snapshot, "offset": offset})
+    ).decode()
+
+
+def _decode_continue(token: str) -> Tuple[int, int]:
+    decoded = orjson.loads(base64.urlsafe_b64decode(token.encode()))
+    return int(decoded["snapshot"]), int(decoded["offset"])
+
+
+class FakeApiServer:
+    """Starlette app serving a SyntheticCluster over the Kubernetes REST API."""
+
+    def __init__(self, cluster: SyntheticCluster, churn_rate: float = 0.0):
+        self.cluster = cluster
+        self.churn_rate = churn_rate
+        self._watchers: Set[Tuple[str, Optional[str], asyncio.Queue]] = set()
+        self._churn_task: Optional[asyncio.Task] = None
+        # Snapshot id -> (resourceVersion, items) of paginated LISTs in progress
+        self._snapshots: "OrderedDict[int, Tuple[int, List[Dict[str, Any]]]]" = (
+            OrderedDict()
+        )
+        self._snapshot_ids = itertools.count(1)
+        self.app = Starlette(
+            routes=[
+                Route("/version", self.version),
+                Route("/api/v1/{kind:str}", self.list_or_watch),
+                Route(
+                    "/api/v1/namespaces/{namespace:str}/{kind:str}", self.list_or_watch
+                ),
+                Route("/apis/networking.k8s.io/v1/{kind:str}", self.list_or_watch),
+                Route(
+                    "/apis/networking.k8s.io/v1/namespaces/{namespace:str}/{kind:str}",
+                    self.list_or_watch,
+                ),
+                Route("/apis/metrics.k8s.io/v1beta1/nodes", self.node_metrics),
+                Route("/apis/metrics.k8s.io/v1beta1/pods", self.pod_metrics),
+                Route(
+                    "/apis/metrics.k8s.io/v1beta1/namespaces/{namespace:str}/pods",
+                    self.pod_metrics,
+                ),
+            ],
+            lifespan=self._lifespan,
+        )
+
+    @asynccontextmanager
+    async def _lifespan(self, app):
+        """Run the churn loop for the server's lifetime."""
+        if self.churn_rate > 0:
+            self._churn_task = asyncio.create_task(self._churn_loop())
+        yield
+        if self._churn_task:
+            self._churn_task.cancel()
+
+    async def _churn_loop(self, interval: float = 0.1):
+        """Apply churn_rate pod changes per second and fan events out to watchers."""
+        pending = 0.0
+        while True:
+            await asyncio.sleep(interval)
+            pending += self.churn_rate * interval
+            changes, pending = int(pending), pending - int(pending)
+            if not changes:
+                continue
+            for event in self.cluster.churn(changes):
+                namespace = event.object["metadata"].get("namespace")
+                for kind, watch_namespace, queue in self._watchers:
+                    if kind == event.kind and watch_namespace in (None, namespace):
+                        queue.put_nowait(event)
+
+    async def version(self, request: Request) -> Response:
+        return _json(
+            {
+                "major": "1",
+                "minor": "30",
+                "gitVersion": "v1.30.4-fake",
+                "platform": "linux/amd64",
+            }
+        )
+
+    async def list_or_watch(self, request: Request) -> Response:
+        kind = request.path_params["kind"]
+        namespace = request.path_params.get("namespace")
+        if kind not in LIST_KINDS or (kind == "nodes" and namespace):
+            return _json(
+                _status(
+                    404,
+                    "NotFound",
+                    f"the server could not find the requested resource ({kind})",
+                ),
+                404,
+            )
+
+        query = request.query_params
+        # The Python client sends watch=True
+        if query.get("watch", "").lower() in ("1", "true"):
+            return self._watch(
+                kind,
+                namespace,
+                query.get("resourceVersion"),
+                query.get("timeoutSeconds"),
+            )
+
+        limit = int(query["limit"]) if query.get("limit") else None
+        snapshot_id = None
+        if query.get("continue"):
+            try:
+                snapshot_id, offset = _decode_continue(query["continue"])
+            except (ValueError, KeyError, TypeError):
+                return _json(_status(400, "BadRequest", "invalid continue token"), 400)
+            if snapshot_id not in self._snapshots:
+                return _json(
+                    _status(
+                        410, "Expired", "The provided continue parameter is too old"
+                    ),
+                    410,
+                )
+            resource_version, items = self._snapshots[snapshot_id]
+        else:
+            # Continued pages come from this snapshot, so a paginated LIST is consistent
+            resource_version = self.cluster.resource_version
+            items, _ = self.cluster.list(kind, namespace)
+            offset = 0
+
+        end = offset + limit if limit else len(items)
+        api_version, list_kind = LIST_KINDS[kind]
+        metadata: Dict[str, Any] = {"resourceVersion": str(resource_version)}
+        if end < len(items):
+            if snapshot_id is None:
+                snapshot_id = next(self._snapshot_ids)
+                self._snapshots[snapshot_id] = (resource_version, items)
+                while len(self._snapshots) > SNAPSHOTS_KEPT:
+                    self._snapshots.popitem(last=False)
+            metadata["continue"] = _encode_continue(resource_version, snapshot_id, end)
+        elif snapshot_id is not None:
+            self._snapshots.pop(snapshot_id, None)
+        return _json(
+            {
+                "kind": list_kind,
+                "apiVersion": api_version,
+                "metadata": metadata,
+                "items": items[offset:end],
+            }
+        )
+
+    def _watch(
+        self,
+        kind: str,
+        namespace: Optional[str],
+        resource_version: Optional[str],
+        timeout_seconds: Optional[str]
+    ) -> StreamingResponse:
+        """Stream watch events as JSON lines from resourceVersion, or replay ADDED."""
+        queue: asyncio.Queue = asyncio.Queue()
+        watcher = (kind, namespace, queue)
+        since = (
+            int(resource_version)
+            if resource_version and resource_version != "0"
+            else None
+        )
+        deadline = (
+            time.monotonic() + float(timeout_seconds) if timeout_seconds else None
+        )
+
+        # Subscribe and read the backlog without yielding in between, so no event
+        # is missed
+        self._watchers.add(watcher)
+        if since is None:
+            items, _ = self.cluster.list(kind, namespace)
+            backlog = [{"type": "ADDED", "object": item} for item in items]
+        else:
+            events = self.cluster.events_since(since)
+            if events is None:
+                self._watchers.discard(watcher)
+                current = self.cluster.resource_version
+                gone = _status(
+                    410, "Expired", f"too old resource version: {since} ({current})"
+                )
+                return StreamingResponse(
+                    iter([orjson.dumps({"type": "ERROR", "object": gone}) + b"\n"])
+                )
+            backlog = [
+                {"type": event.type, "object": event.object}
+                for event in events
+                if event.kind == kind
+                and namespace in (None, event.object["metadata"].get("namespace"))
+            ]
+
+        async def stream():
+            try:
+                for event in backlog:
+                    yield orjson.dumps(event) + b"\n"
+                while True:
+                    timeout = None if deadline is None else deadline - time.monotonic()
+                    if timeout is not None and timeout <= 0:
+                        return
+                    try:
+                        event = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        return
+                    line = {"type": event.type, "object": event.object}
+                    yield orjson.dumps(line) + b"\n"
+            finally:
+                self._watchers.discard(watcher)
+
+        return StreamingResponse(stream(), media_type="application/json")
+
+    async def node_metrics(self, request: Request) -> Response:
+        return _json({
+            "kind": "NodeMetricsList",
+            "apiVersion": "metrics.k8s.io/v1beta1",
+            "metadata": {},
+            "items": self.cluster.node_metrics(),
+        })
+
+    async def pod_metrics(self, request: Request) -> Response:
+        return _json({
+            "kind": "PodMetricsList",
+            "apiVersion": "metrics.k8s.io/v1beta1",
+            "metadata": {},
+            "items": self.cluster.pod_metrics(request.path_params.get("namespace")),
+        })
+
+
+def write_kubeconfig(path: str, host: str, port: int):
+    """Write a kubeconfig whose current context points at the fake apiserver."""
+    with open(path, "w") as f:
+        f.write(
+            "apiVersion: v1\n"
+            "kind: Config\n"
+            "clusters:\n"
+            f"- name: fake\n  cluster:\n    server: http://{host}:{port}\n"
+            "users:\n"
+            "- name: fake\n  user:\n    token: fake\n"
+            "contexts:\n"
+            "- name: fake\n  context:\n    cluster: fake\n    user: fake\n"
+            "current-context: fake\n"
+        )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--pods", type=int, default=2_000)
+    parser.add_argument("--services", type=int, default=200)
+    parser.add_argument("--ingresses", type=int, default=50)
+    parser.add_argument("--namespaces", type=int, default=20)
+    parser.add_argument(
+        "--apps", type=int, default=200, help="distinct app label values"
+    )
+    parser.add_argument("--labels-per-pod", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--churn-rate", type=float, default=0.0, help="pod changes per second"
+    )
+    parser.add_argument(
+        "--max-events",
+        type=int,
+        default=20_000,
+        help="events kept before the oldest expire",
+    )
+    parser.add_argument(
+        "--kubeconfig", help="write a kubeconfig pointing at this server"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cluster = SyntheticCluster(
+        nodes=args.nodes,
+        pods=args.pods,
+        services=args.services,
+        namespaces=args.namespaces,
+        apps=args.apps,
+        labels_per_pod=args.labels_per_pod,
+        ingresses=args.ingresses,
+        seed=args.seed,
+        max_events=args.max_events,
+    )
+    print(
+        f"Generated {args.nodes} nodes, {args.pods} pods, {args.services} services, "
+        f"{args.ingresses} ingresses, {cluster.count('events')} events "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    if args.kubeconfig:
+        write_kubeconfig(args.kubeconfig, args.host, args.port)
+        print(f"Wrote kubeconfig to {args.kubeconfig}")
+
+    uvicorn.run(
+        FakeApiServer(cluster, args.churn_rate).app,
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
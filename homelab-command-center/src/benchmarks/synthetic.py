@@ -0,0 +1,546 @@
+"""
+Deterministic synthetic Kubernetes cluster for offline load testing.
+
+Generates nodes, pods, services and ingresses as raw Kubernetes API JSON
+(what the apiserver would return), plus metrics.k8s.io usage, from a seed.
+The same seed and sizes always give the same cluster. Pods in trouble come
+with core/v1 Events (BackOff, Unhealthy, FailedScheduling). `churn()`
+applies pod changes (replacements, readiness flips, restarts), emits the
+Events they cause (repeats bump an Event's count, as the kubelet does) and
+records everything as watch events with increasing resourceVersions.
+
+Used by benchmarks.fake_apiserver; can also be used directly:
+
+    cluster = SyntheticCluster(nodes=500, pods=50_000, services=2_000)
+    pods = cluster.list("pods")
+"""
+
+from collections import deque
+from datetime import datetime, timedelta
+import bisect
+import hashlib
+import random
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+KINDS = ("nodes", "pods", "services", "ingresses", "events")
+CREATED_AT = "2024-01-01T00:00:00Z"
+EPOCH = datetime(2024, 1, 1)
+TIERS = ("frontend", "backend", "cache", "db")
+
+# Event reason -> (type, message template)
+EVENT_REASONS = {
+    "Scheduled": ("Normal", "Successfully assigned {namespace}/{name} to {node}"),
+    "Killing": ("Normal", "Stopping container app"),
+    "Unhealthy": (
+        "Warning", "Readiness probe failed: HTTP probe failed with statuscode: 503"
+    ),
+    "BackOff": ("Warning", "Back-off restarting failed container app in pod {name}"),
+    "FailedScheduling": ("Warning", "0/{nodes} nodes are available: insufficient cpu."),
+}
+
+
+class WatchEvent(NamedTuple):
+    resource_version: int
+    kind: str
+    type: str  # ADDED, MODIFIED or DELETED
+    object: Dict[str, Any]
+
+
+class SyntheticCluster:
+    """A generated cluster held in memory, keyed like the apiserver stores it.
+
+    Objects of each kind are kept by (namespace, name) with a sorted key list,
+    so namespaced and paginated LISTs are bisect ranges.
+    """
+
+    def __init__(
+        self,
+        nodes: int = 50,
+        pods: int = 2_000,
+        services: int = 200,
+        namespaces: int = 20,
+        apps: int = 200,
+        labels_per_pod: int = 4,
+        ingresses: int = 50,
+        seed: int = 42,
+        event_log_size: int = 100_000,
+        max_events: int = 20_000
+    ):
+        self.seed = seed
+        self.namespaces = [f"namespace-{i}" for i in range(max(1, namespaces))]
+        self.apps = [f"app-{i}" for i in range(max(1, apps))]
+        self.labels_per_pod = labels_per_pod
+        self.max_events = max_events
+        self.resource_version = 1
+        self.events: Deque[WatchEvent] = deque(maxlen=event_log_size)
+        self._rng = random.Random(seed)
+        self._objects: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {
+            kind: {} for kind in KINDS
+        }
+        self._keys: Dict[str, List[Tuple[str, str]]] = {kind: [] for kind in KINDS}
+        self._pod_serial = 0
+        self._tick = 0
+        # Event keys oldest first; the oldest expire past max_events, like the
+        # apiserver's event TTL
+        self._event_order: Deque[Tuple[str, str]] = deque()
+
+        for i in range(nodes):
+            self._put("nodes", self._make_node(i), record=False)
+        for i in range(pods):
+            pod = self._make_pod(i)
+            self._put("pods", pod, record=False)
+            for reason, count in _initial_event_reasons(pod):
+                if self.count("events") < max_events:
+                    self._record_event(pod, reason, count, record=False)
+        for i in range(services):
+            self._put("services", self._make_service(i), record=False)
+        for i in range(ingresses):
+            self._put("ingresses", self._make_ingress(i), record=False)
+        for keys in self._keys.values():
+            keys.sort()
+
+    # -- access -------------------------------------------------------------
+
+    def count(self, kind: str) -> int:
+        return len(self._keys[kind])
+
+    def list(
+        self,
+        kind: str,
+        namespace: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, str]]]:
+        """List objects in key order; returns (items, last key if more remain)."""
+        keys = self._keys[kind]
+        if namespace is not None:
+            start = bisect.bisect_left(keys, (namespace, ""))
+            end = bisect.bisect_left(keys, (namespace + "\x00", ""))
+        else:
+            start, end = 0, len(keys)
+        if after is not None:
+            start = max(start, bisect.bisect_right(keys, after))
+        stop = end if not limit else min(end, start + limit)
+        objects = self._objects[kind]
+        items = [objects[key] for key in keys[start:stop]]
+        more = keys[stop - 1] if stop < end and stop > start else None
+        return items, more
+
+    def events_since(self, resource_version: int) -> Optional[List[WatchEvent]]:
+        """Events after a resourceVersion, or None once it left the log (410 Gone)."""
+        if self.events and self.events[0].resource_version > resource_version + 1:
+            return None
+        if not self.events and resource_version < self.resource_version - 1:
+            return None
+        return [
+            event for event in self.events if event.resource_version > resource_version
+        ]
+
+    def node_metrics(self) -> List[Dict[str, Any]]:
+        """metrics.k8s.io NodeMetrics items for the current tick."""
+        items = []
+        for key in self._keys["nodes"]:
+            node = self._objects["nodes"][key]
+            name = node["metadata"]["name"]
+            noise = self._noise(self._tick, name)
+            items.append({
+                "metadata": {"name": name, "creationTimestamp": CREATED_AT},
+                "timestamp": CREATED_AT,
+                "window": "20s",
+                "usage": {
+                    "cpu": f"{200 + noise % 13_800}m",
+                    "memory": f"{2_000_000 + (noise >> 20) % 58_000_000}Ki",
+                },
+            })
+        return items
+
+    def pod_metrics(self, namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+        """metrics.k8s.io PodMetrics items for running pods at the current tick."""
+        items = []
+        pods, _ = self.list("pods", namespace)
+        for pod in pods:
+            if pod["status"]["phase"] != "Running":
+                continue
+            metadata = pod["metadata"]
+            noise = self._noise(self._tick, metadata["namespace"], metadata["name"])
+            items.append({
+                "metadata": {
+                    "name": metadata["name"],
+                    "namespace": metadata["namespace"],
+                    "labels": metadata["labels"],
+                    "creationTimestamp": CREATED_AT,
+                },
+                "timestamp": CREATED_AT,
+                "window": "20s",
+                "containers": [{
+                    "name": container["name"],
+                    "usage": {
+                        "cpu": f"{1_000_000 + noise % 899_000_000}n",
+                        "memory": f"{10_000 + (noise >> 32) % 1_490_000}Ki",
+                    },
+                } for container in pod["spec"]["containers"]],
+            })
+        return items
+
+    # -- churn --------------------------------------------------------------
+
+    def churn(self, changes: int) -> List[WatchEvent]:
+        """Apply `changes` pod changes and return the watch events they produced.
+
+        About 20% of changes replace a pod (DELETED + ADDED, as a rollout
+        would), the rest flip readiness or bump a restart count (MODIFIED).
+        Each change also emits the Event the kubelet or scheduler would, and
+        Events past max_events are deleted oldest first. Metrics and the
+        event clock (one second per tick) move to the next tick.
+        """
+        self._tick += 1
+        events = []
+        keys = self._keys["pods"]
+        for _ in range(changes):
+            if not keys:
+                break
+            key = keys[self._rng.randrange(len(keys))]
+            pod = self._objects["pods"][key]
+            roll = self._rng.random()
+            if roll < 0.2:
+                events.append(self._record_event(pod, "Killing"))
+                events.append(self._delete("pods", key))
+                pod = self._make_pod(self._rng.randrange(max(1, len(keys) + 1)))
+                events.append(self._put("pods", pod))
+                scheduled = pod["status"]["phase"] != "Pending"
+                outcome = "Scheduled" if scheduled else "FailedScheduling"
+                events.append(self._record_event(pod, outcome))
+            else:
+                pod = _copy_pod_for_update(pod)
+                if roll < 0.6:
+                    ready = _condition(pod, "Ready")
+                    ready["status"] = "False" if ready["status"] == "True" else "True"
+                    for status in pod["status"]["containerStatuses"]:
+                        status["ready"] = ready["status"] == "True"
+                    reason = "Unhealthy" if ready["status"] == "False" else None
+                else:
+                    pod["status"]["containerStatuses"][0]["restartCount"] += 1
+                    reason = "BackOff"
+                events.append(self._put("pods", pod))
+                if reason:
+                    events.append(self._record_event(pod, reason))
+
+        while len(self._keys["events"]) > self.max_events:
+            events.append(self._delete("events", self._event_order.popleft()))
+        return events
+
+    # -- storage ------------------------------------------------------------
+
+    def _put(
+        self, kind: str, obj: Dict[str, Any], record: bool = True
+    ) -> Optional[WatchEvent]:
+        metadata = obj["metadata"]
+        key = (metadata.get("namespace", ""), metadata["name"])
+        self.resource_version += 1
+        metadata["resourceVersion"] = str(self.resource_version)
+        existed = key in self._objects[kind]
+        self._objects[kind][key] = obj
+        if not record:
+            # Initial build: keys are sorted once at the end
+            self._keys[kind].append(key)
+            return None
+        if not existed:
+            bisect.insort(self._keys[kind], key)
+        change = "MODIFIED" if existed else "ADDED"
+        event = WatchEvent(self.resource_version, kind, change, obj)
+        self.events.append(event)
+        return event
+
+    def _delete(self, kind: str, key: Tuple[str, str]) -> WatchEvent:
+        obj = self._objects[kind].pop(key)
+        del self._keys[kind][bisect.bisect_left(self._keys[kind], key)]
+        self.resource_version += 1
+        metadata = dict(obj["metadata"], resourceVersion=str(self.resource_version))
+        obj = dict(obj, metadata=metadata)
+        event = WatchEvent(self.resource_version, kind, "DELETED", obj)
+        self.events.append(event)
+        return event
+
+    def _record_event(
+        self,
+        pod: Dict[str, Any],
+        reason: str,
+        count: int = 1,
+        record: bool = True
+    ) -> Optional[WatchEvent]:
+        """Add `count` occurrences of `reason` to the pod's Event, creating it first."""
+        metadata = pod["metadata"]
+        namespace, pod_name = metadata["namespace"], metadata["name"]
+        name = f"{pod_name}.{self._uid('event', namespace, pod_name, reason)[:8]}"
+        now = _timestamp(self._tick)
+        existing = self._objects["events"].get((namespace, name))
+        if existing is not None:
+            event = dict(
+                existing,
+                metadata=dict(existing["metadata"]),
+                count=existing["count"] + count,
+                lastTimestamp=now,
+            )
+            return self._put("events", event, record)
+
+        event_type, message = EVENT_REASONS[reason]
+        node = pod["spec"]["nodeName"]
+        self._event_order.append((namespace, name))
+        return self._put("events", {
+            "metadata": {
+                "name": name,
+                "namespace": namespace,
+                "uid": self._uid("event-uid", namespace, name, self.resource_version),
+                "creationTimestamp": now,
+            },
+            "involvedObject": {
+                "apiVersion": "v1",
+                "kind": "Pod",
+                "namespace": namespace,
+                "name": pod_name,
+                "uid": metadata["uid"],
+            },
+            "reason": reason,
+            "message": message.format(
+                namespace=namespace, name=pod_name, node=node, nodes=self.count("nodes")
+            ),
+            "type": event_type,
+            "source": {
+                "component": "default-scheduler" if "Schedul" in reason else "kubelet",
+                "host": node,
+            },
+            "count": count,
+            "firstTimestamp": now,
+            "lastTimestamp": now,
+            "reportingComponent": "",
+            "reportingInstance": "",
+        }, record)
+
+    # -- generators ---------------------------------------------------------
+
+    def _noise(self, *parts: Any) -> int:
+        """Deterministic 64-bit value for usage figures."""
+        seed = ":".join(str(part) for part in (self.seed,) + parts)
+        digest = hashlib.blake2b(seed.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def _uid(self, *parts: Any) -> str:
+        seed = ":".join(str(part) for part in (self.seed,) + parts)
+        hex_value = hashlib.blake2b(seed.encode(), digest_size=16).hexdigest()
+        return (
+            f"{hex_value[:8]}-{hex_value[8:12]}-{hex_value[12:16]}-"
+            f"{hex_value[16:20]}-{hex_value[20:]}"
+        )
+
+    def _app_namespace(self, app_index: int) -> str:
+        return self.namespaces[app_index % len(self.namespaces)]
+
+    def _make_node(self, i: int) -> Dict[str, Any]:
+        name = f"node-{i:04d}"
+        role = "node-role.kubernetes.io/" + ("control-plane" if i < 3 else "worker")
+        not_ready = i % 97 == 13
+        conditions = [
+            {
+                "type": "MemoryPressure",
+                "status": "True" if i % 53 == 7 else "False",
+                "reason": "KubeletHasSufficientMemory",
+            },
+            {
+                "type": "DiskPressure",
+                "status": "False",
+                "reason": "KubeletHasNoDiskPressure",
+            },
+            {
+                "type": "PIDPressure",
+                "status": "False",
+                "reason": "KubeletHasSufficientPID",
+            },
+            {
+                "type": "Ready",
+                "status": "False" if not_ready else "True",
+                "reason": "KubeletNotReady" if not_ready else "KubeletReady",
+            },
+        ]
+        for condition in conditions:
+            condition.update({
+                "message": "",
+                "lastHeartbeatTime": CREATED_AT,
+                "lastTransitionTime": CREATED_AT,
+            })
+        return {
+            "metadata": {
+                "name": name,
+                "uid": self._uid("node", i),
+                "creationTimestamp": CREATED_AT,
+                "labels": {
+                    "kubernetes.io/hostname": name,
+                    "kubernetes.io/os": "linux",
+                    "topology.kubernetes.io/zone": f"zone-{i % 3}",
+                    role: "",
+                },
+                "annotations": {},
+            },
+            "spec": {"podCIDR": f"10.{(i // 256) % 256}.{i % 256}.0/24"},
+            "status": {
+                "capacity": {"cpu": "16", "memory": "65842160Ki", "pods": "110"},
+                "allocatable": {"cpu": "15500m", "memory": "64000000Ki", "pods": "110"},
+                "conditions": conditions,
+                "nodeInfo": {
+                    "architecture": "amd64",
+                    "bootID": self._uid("boot", i),
+                    "containerRuntimeVersion": "containerd://1.7.20",
+                    "kernelVersion": "6.8.0-45-generic",
+                    "kubeProxyVersion": "v1.30.4",
+                    "kubeletVersion": "v1.30.4",
+                    "machineID": self._uid("machine", i).replace("-", ""),
+                    "operatingSystem": "linux",
+                    "osImage": "Ubuntu 22.04.4 LTS",
+                    "systemUUID": self._uid("system", i),
+                },
+            },
+        }
+
+    def _make_pod(self, i: int) -> Dict[str, Any]:
+        self._pod_serial += 1
+        app_index = i % len(self.apps)
+        app = self.apps[app_index]
+        namespace = self._app_namespace(app_index)
+        name = f"{app}-{self._uid('pod', i, self._pod_serial)[:10]}"
+        node_count = max(1, len(self._keys["nodes"]))
+        labels = {
+            "app": app,
+            "tier": TIERS[app_index % len(TIERS)],
+            "pod-template-hash": self._uid("hash", app_index)[:10],
+        }
+        for extra in range(max(0, self.labels_per_pod - len(labels))):
+            labels[f"example.com/label-{extra}"] = f"value-{(i + extra) % 8}"
+
+        phase = "Pending" if i % 211 == 5 else "Failed" if i % 503 == 9 else "Running"
+        ready = phase == "Running" and i % 37 != 3
+        return {
+            "metadata": {
+                "name": name,
+                "namespace": namespace,
+                "uid": self._uid("pod-uid", i, self._pod_serial),
+                "creationTimestamp": CREATED_AT,
+                "labels": labels,
+                "annotations": {},
+            },
+            "spec": {
+                "nodeName": (
+                    f"node-{i % node_count:04d}" if phase != "Pending" else None
+                ),
+                "containers": [{
+                    "name": "app",
+                    "image": f"registry.local/{app}:1.{i % 9}.0",
+                    "ports": [{"containerPort": 8080, "protocol": "TCP"}],
+                    "resources": {
+                        "requests": {
+                            "cpu": f"{50 + (i % 8) * 50}m",
+                            "memory": f"{64 * (1 + i % 8)}Mi",
+                        },
+                        "limits": {"cpu": "1", "memory": f"{128 * (1 + i % 8)}Mi"},
+                    },
+                }],
+            },
+            "status": {
+                "phase": phase,
+                "conditions": [
+                    {"type": "Ready", "status": "True" if ready else "False"}
+                ],
+                "containerStatuses": [{
+                    "name": "app",
+                    "image": f"registry.local/{app}:1.{i % 9}.0",
+                    "imageID": "",
+                    "ready": ready,
+                    "restartCount": i % 7 if i % 41 else 12,
+                    "started": phase == "Running",
+                }],
+            },
+        }
+
+    def _make_service(self, i: int) -> Dict[str, Any]:
+        app_index = i % len(self.apps)
+        app = self.apps[app_index]
+        suffix = "" if i < len(self.apps) else f"-{i // len(self.apps)}"
+        return {
+            "metadata": {
+                "name": f"{app}{suffix}",
+                "namespace": self._app_namespace(app_index),
+                "uid": self._uid("service", i),
+                "creationTimestamp": CREATED_AT,
+                "labels": {"app": app},
+                "annotations": {},
+            },
+            "spec": {
+                "type": "ClusterIP",
+                "clusterIP": f"10.96.{(i // 250) % 256}.{i % 250 + 1}",
+                "ports": [
+                    {"name": "http", "port": 80, "targetPort": 8080, "protocol": "TCP"}
+                ],
+                "selector": {"app": app},
+            },
+            "status": {"loadBalancer": {}},
+        }
+
+    def _make_ingress(self, i: int) -> Dict[str, Any]:
+        app_index = i % len(self.apps)
+        app = self.apps[app_index]
+        host = f"{app}-{i}.homelab.test"
+        return {
+            "metadata": {
+                "name": f"{app}-{i}",
+                "namespace": self._app_namespace(app_index),
+                "uid": self._uid("ingress", i),
+                "creationTimestamp": CREATED_AT,
+                "labels": {"app": app},
+                "annotations": {},
+            },
+            "spec": {
+                "ingressClassName": "nginx",
+                "rules": [{
+                    "host": host,
+                    "http": {"paths": [{
+                        "path": "/",
+                        "pathType": "Prefix",
+                        "backend": {"service": {"name": app, "port": {"number": 80}}},
+                    }]},
+                }],
+                "tls": (
+                    [{"hosts": [host], "secretName": f"{app}-tls"}]
+                    if i % 2 == 0
+                    else []
+                ),
+            },
+            "status": {"loadBalancer": {}},
+        }
+
+
+def _timestamp(tick: int) -> str:
+    return (EPOCH + timedelta(seconds=tick)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _initial_event_reasons(pod: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """(reason, count) of the Events a freshly generated pod already has."""
+    status = pod["status"]
+    if status["phase"] == "Pending":
+        return [("FailedScheduling", 3)]
+    reasons = []
+    restarts = status["containerStatuses"][0]["restartCount"]
+    if restarts:
+        reasons.append(("BackOff", restarts))
+    if status["phase"] == "Running" and _condition(pod, "Ready")["status"] == "False":
+        reasons.append(("Unhealthy", 3))
+    return reasons
+
+
+def _condition(pod: Dict[str, Any], condition_type: str) -> Dict[str, Any]:
+    return next(c for c in pod["status"]["conditions"] if c["type"] == condition_type)
+
+
+def _copy_pod_for_update(pod: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy the parts of a pod that churn mutates, so earlier events keep theirs."""
+    status = dict(pod["status"])
+    status["conditions"] = [dict(c) for c in status["conditions"]]
+    status["containerStatuses"] = [dict(s) for s in status["containerStatuses"]]
+    return dict(pod, metadata=dict(pod["metadata"]), status=status)
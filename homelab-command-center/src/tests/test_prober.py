@@ -0,0 +1,247 @@
+"""Prober tests against stand-in HTTP, HTTPS and TCP servers on localhost."""
+
+from pathlib import Path
+import asyncio
+import socket
+import ssl
+
+import pytest
+import pytest_asyncio
+
+from app.config import Settings, settings
+from app.services.prober import ProberService, ProbeTarget
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SLOW_SECONDS = 0.3
+
+
+class StandInServer:
+    """Minimal HTTP server.
+
+    GET /status/<code> answers with that code, /slow after SLOW_SECONDS.
+    """
+
+    def __init__(self, ssl_context=None):
+        self.ssl_context = ssl_context
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(
+            self._handle, "127.0.0.1", 0, ssl=self.ssl_context
+        )
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b""):
+                pass
+            path = request_line.split()[1].decode()
+            code = 200
+            if path.startswith("/status/"):
+                code = int(path.split("/")[2])
+            elif path.startswith("/slow"):
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                try:
+                    await asyncio.sleep(SLOW_SECONDS)
+                finally:
+                    self.in_flight -= 1
+            headers = "Content-Length: 0\r\nConnection: close\r\n\r\n"
+            writer.write(f"HTTP/1.1 {code} X\r\n{headers}".encode())
+            await writer.drain()
+        except (ConnectionError, IndexError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+
+def _target(url: str) -> ProbeTarget:
+    return ProbeTarget("static", url, None, url)
+
+
+def _closed_port() -> int:
+    """A localhost port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(autouse=True)
+def probe_settings(monkeypatch):
+    monkeypatch.setattr(settings, "probe_jitter", 0.0)
+    monkeypatch.setattr(settings, "probe_timeout", 2.0)
+    monkeypatch.setattr(settings, "probe_concurrency", 50)
+    monkeypatch.setattr(settings, "probe_verify_tls", True)
+
+
+@pytest_asyncio.fixture
+async def http_server():
+    server = StandInServer()
+    port = await server.start()
+    yield server, f"http://127.0.0.1:{port}"
+    await server.stop()
+
+
+@pytest_asyncio.fixture
+async def https_server():
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(FIXTURES / "selfsigned.crt", FIXTURES / "selfsigned.key")
+    server = StandInServer(context)
+    port = await server.start()
+    yield f"https://127.0.0.1:{port}"
+    await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_status_codes_map_to_health(http_server):
+    _, base = http_server
+    codes = {200: "healthy", 302: "healthy", 404: "warning", 503: "unhealthy"}
+    results = await ProberService().probe_all(
+        [_target(f"{base}/status/{code}") for code in codes]
+    )
+
+    for result, (code, status) in zip(results, codes.items()):
+        assert result["status_code"] == code
+        assert result["status"] == status
+        assert result["error"] is None
+        assert result["latency"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_timeout_is_unhealthy(http_server, monkeypatch):
+    _, base = http_server
+    monkeypatch.setattr(settings, "probe_timeout", SLOW_SECONDS / 3)
+    [result] = await ProberService().probe_all([_target(f"{base}/slow")])
+
+    assert result["status"] == "unhealthy"
+    assert "Timeout" in result["error"]
+    assert result["latency_ms"] is None
+
+
+@pytest.mark.asyncio
+async def test_connection_refused_is_unhealthy():
+    port = _closed_port()
+    results = await ProberService().probe_all(
+        [
+            _target(f"http://127.0.0.1:{port}/"),
+            _target(f"tcp://127.0.0.1:{port}"),
+        ]
+    )
+
+    assert [result["status"] for result in results] == ["unhealthy", "unhealthy"]
+    assert results[0]["error"].startswith("ConnectError")
+    assert results[1]["error"].startswith("ConnectionRefusedError")
+
+
+@pytest.mark.asyncio
+async def test_tcp_connect():
+    async def accept(reader, writer):
+        writer.close()
+
+    server = await asyncio.start_server(accept, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        [result] = await ProberService().probe_all([_target(f"tcp://127.0.0.1:{port}")])
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    assert result["status"] == "healthy"
+    assert result["status_code"] is None
+    assert result["latency_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_tls_verification(https_server, monkeypatch):
+    prober = ProberService()
+    [verified] = await prober.probe_all([_target(f"{https_server}/status/200")])
+    assert verified["status"] == "unhealthy"
+    assert "CERTIFICATE_VERIFY_FAILED" in verified["error"]
+
+    # The same prober picks up the changed setting
+    monkeypatch.setattr(settings, "probe_verify_tls", False)
+    [unverified] = await prober.probe_all([_target(f"{https_server}/status/200")])
+    assert unverified["status"] == "healthy"
+    assert unverified["status_code"] == 200
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped(http_server, monkeypatch):
+    server, base = http_server
+    monkeypatch.setattr(settings, "probe_concurrency", 3)
+    results = await ProberService().probe_all(
+        [_target(f"{base}/slow?{i}") for i in range(12)]
+    )
+
+    assert all(result["status"] == "healthy" for result in results)
+    assert server.max_in_flight == 3
+
+
+def test_probe_targets_setting_parses_from_env(monkeypatch):
+    monkeypatch.setenv("PROBE_TARGETS", '["https://nas.lan/", "tcp://10.0.0.5:5432"]')
+    assert Settings(_env_file=None).probe_targets == [
+        "https://nas.lan/",
+        "tcp://10.0.0.5:5432",
+    ]
+
+
+def test_build_targets(monkeypatch):
+    monkeypatch.setattr(
+        settings, "probe_targets", ["tcp://10.0.0.5:5432", "http://10.43.0.1:80/"]
+    )
+    services = [
+        {
+            "name": "web",
+            "namespace": "apps",
+            "cluster_ip": "10.43.0.1",
+            "ports": [
+                {"name": "http", "port": 80, "protocol": "TCP"},
+                {"name": "metrics", "port": 9100, "protocol": "TCP"},
+                {"name": "dns", "port": 53, "protocol": "UDP"},
+            ],
+        },
+        {
+            "name": "api",
+            "namespace": "apps",
+            "cluster_ip": "10.43.0.2",
+            "ports": [{"name": "https-api", "port": 6443}],
+        },
+        {
+            "name": "headless",
+            "namespace": "apps",
+            "cluster_ip": "None",
+            "ports": [{"port": 80}],
+        },
+        {
+            "name": "v6",
+            "namespace": "apps",
+            "cluster_ip": "fd00:10:43::5",
+            "ports": [{"port": 8080}],
+        },
+    ]
+    ingresses = [
+        {
+            "name": "web",
+            "namespace": "apps",
+            "hosts": ["web.lan", "plain.lan", "*.apps.lan"],
+            "tls_hosts": ["web.lan"],
+        }
+    ]
+    targets = ProberService().build_targets(services, ingresses)
+
+    assert [(target.kind, target.url) for target in targets] == [
+        ("static", "tcp://10.0.0.5:5432"),
+        ("static", "http://10.43.0.1:80/"),  # also service web:80, probed once
+        ("service", "tcp://10.43.0.1:9100"),
+        ("service", "https://10.43.0.2:6443/"),
+        ("service", "http://[fd00:10:43::5]:8080/"),
+        ("ingress", "https://web.lan/"),
+        ("ingress", "http://plain.lan/"),
+    ]